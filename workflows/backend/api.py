@@ -1,10 +1,50 @@
+import os
+from contextlib import asynccontextmanager
+from typing import Dict, Optional
+
 import uvicorn
 from fastapi import FastAPI
 from fastapi.middleware.cors import CORSMiddleware
+from pydantic import TypeAdapter
+
+from workflow_use.schema.views import RateLimit
+from workflow_use.workflow.rate_limit import OriginRateLimiter
+
+from .routers import router, runs_router
+from .service import WorkflowService
+
+
+def _env_flag(name: str) -> bool:
+	return os.getenv(name, '').strip().lower() in ('1', 'true', 'yes', 'on')
+
+
+def _env_rate_limiter(name: str) -> Optional[OriginRateLimiter]:
+	"""Limiter shared by all runs, from a JSON object of origin globs to limits, e.g.
+	``{"https://*.example.com": {"requests_per_second": 2, "max_concurrent": 4}, "*": {"requests_per_second": 10}}``.
+	"""
+	value = os.getenv(name, '').strip()
+	if not value:
+		return None
+	return OriginRateLimiter(TypeAdapter(Dict[str, RateLimit]).validate_json(value))
+
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+	# A single service per process, so every endpoint sees the same tasks and shares its browser
+	service = WorkflowService(
+		# Cookies and localStorage in checkpoints keep resumed tasks logged in, but put session tokens on disk
+		capture_storage_state=_env_flag('WORKFLOW_CHECKPOINT_STORAGE_STATE'),
+		rate_limiter=_env_rate_limiter('WORKFLOW_RATE_LIMITS'),
+	)
+	await service.start()
+	app.state.workflow_service = service
+	try:
+		yield
+	finally:
+		await service.shutdown()
 
-from .routers import router
 
-app = FastAPI(title='Workflow Execution Service')
+app = FastAPI(title='Workflow Execution Service', lifespan=lifespan)
 
 # Add CORS middleware
 app.add_middleware(
@@ -17,6 +57,7 @@ app.add_middleware(
 
 # Include routers
 app.include_router(router)
+app.include_router(runs_router)
 
 
 # Optional standalone runner
@@ -0,0 +1,108 @@
+import asyncio
+import csv
+import io
+import json
+import time
+from collections import Counter
+from typing import Any, AsyncIterator, Dict, List, Optional, Set
+
+from .views import BatchItemResult, BatchStatusResponse
+
+CSV_CONTENT_TYPES = {'text/csv', 'application/csv'}
+JSONL_CONTENT_TYPES = {'application/x-ndjson', 'application/ndjson', 'application/jsonl', 'application/x-jsonlines'}
+
+
+def parse_batch_inputs(body: bytes, content_type: str) -> List[Dict[str, Any]]:
+	"""Input sets of an uploaded CSV file (header row, then one row per item) or JSONL file (one object per line).
+
+	Raises ValueError for malformed files and unsupported content types.
+	"""
+	text = body.decode('utf-8-sig')
+	media_type = content_type.split(';')[0].strip().lower()
+	if media_type in CSV_CONTENT_TYPES:
+		return [dict(row) for row in csv.DictReader(io.StringIO(text))]
+	if media_type in JSONL_CONTENT_TYPES:
+		items = []
+		for number, line in enumerate(text.splitlines(), start=1):
+			if not line.strip():
+				continue
+			item = json.loads(line)
+			if not isinstance(item, dict):
+				raise ValueError(f'Line {number} is not a JSON object')
+			items.append(item)
+		return items
+	raise ValueError(f'Unsupported content type {media_type!r}, send application/json, text/csv or application/x-ndjson')
+
+
+class BatchRun:
+	"""One batch: its finished items in completion order, which followers can wait on.
+
+	Items only carry their index, task id and status (and the error of items that never became a
+	task); the result and error of a run are loaded from the service's tasks when an item is sent
+	out (see ``WorkflowService.follow_batch``), so memory does not grow with the batch's output.
+	Must be used from the event loop's thread.
+	"""
+
+	def __init__(self, batch_id: str, workflow: str, total: int, concurrency: int) -> None:
+		self.batch_id = batch_id
+		self.workflow = workflow
+		self.total = total
+		self.concurrency = concurrency
+		self.status = 'running'
+		self.created_at = time.time()
+		self.finished_at: Optional[float] = None
+		self.cancelled = False
+
+		self.items: List[BatchItemResult] = []
+		# Item index -> task id of the items that were submitted and did not finish yet
+		self.task_ids: Dict[int, str] = {}
+		self.finished_items: Set[int] = set()
+		self.driver: Optional[asyncio.Task] = None
+		self._changed = asyncio.Event()
+
+	@property
+	def finished(self) -> bool:
+		return self.status != 'running'
+
+	def add_item(self, item: BatchItemResult) -> None:
+		self.items.append(item)
+		self.finished_items.add(item.index)
+		self.task_ids.pop(item.index, None)
+		self._notify()
+
+	def finish(self, status: str) -> None:
+		self.status = status
+		self.finished_at = time.time()
+		self._notify()
+
+	def snapshot(self) -> BatchStatusResponse:
+		return BatchStatusResponse(
+			batch_id=self.batch_id,
+			workflow=self.workflow,
+			status=self.status,
+			total=self.total,
+			concurrency=self.concurrency,
+			counts=dict(Counter(item.status for item in self.items)),
+			created_at=self.created_at,
+			finished_at=self.finished_at,
+		)
+
+	def _notify(self) -> None:
+		changed, self._changed = self._changed, asyncio.Event()
+		changed.set()
+
+	async def wait_for_items(self) -> None:
+		"""Wait until every item finished."""
+		while len(self.items) < self.total:
+			await self._changed.wait()
+
+	async def follow(self, after: int = 0) -> AsyncIterator[BatchItemResult]:
+		"""Yield the items after the first *after* ones, then new ones as they arrive, until the batch finished."""
+		while True:
+			changed = self._changed
+			while after < len(self.items):
+				after += 1
+				yield self.items[after - 1]
+			if self.finished:
+				return
+			await changed.wait()
@@ -1,96 +1,209 @@
-import asyncio
-import uuid
+from typing import Annotated, Any, AsyncIterator, Dict, Literal, Optional
 
-from fastapi import APIRouter, HTTPException
+from fastapi import APIRouter, Depends, Header, HTTPException, Query, Request
+from fastapi.responses import StreamingResponse
 
+from .batches import BatchRun, parse_batch_inputs
+from .scheduler import QueueFullError
 from .service import WorkflowService
+from .task_logs import format_entry
 from .views import (
+	BatchStatusResponse,
+	RunListResponse,
+	RunRecord,
+	WorkflowBatchRequest,
 	WorkflowCancelResponse,
+	WorkflowCatalogResponse,
 	WorkflowExecuteRequest,
 	WorkflowExecuteResponse,
+	WorkflowHistoryResponse,
 	WorkflowListResponse,
 	WorkflowLogsResponse,
 	WorkflowMetadataUpdateRequest,
+	WorkflowPatchRequest,
 	WorkflowResponse,
 	WorkflowStatusResponse,
 	WorkflowUpdateRequest,
 )
+from .workflow_store import PatchError, VersionConflictError
 
 router = APIRouter(prefix='/api/workflows')
+runs_router = APIRouter(prefix='/api/runs')
 
 
-def get_service() -> WorkflowService:
-	return WorkflowService()
+def get_service(request: Request) -> WorkflowService:
+	"""The process-wide service created in the app's lifespan."""
+	return request.app.state.workflow_service
+
+
+ServiceDep = Annotated[WorkflowService, Depends(get_service)]
 
 
 @router.get('', response_model=WorkflowListResponse)
-async def list_workflows():
-	service = get_service()
+async def list_workflows(service: ServiceDep):
 	workflows = service.list_workflows()
 	return WorkflowListResponse(workflows=workflows)
 
 
+@router.get('/catalog', response_model=WorkflowCatalogResponse)
+async def get_catalog(service: ServiceDep):
+	"""All workflows with their metadata (step count, inputs, last modified, content hash)."""
+	return WorkflowCatalogResponse(workflows=service.catalog.list())
+
+
 @router.get('/{name}', response_model=str)
-async def get_workflow(name: str):
-	service = get_service()
-	return service.get_workflow(name)
+async def get_workflow(name: str, service: ServiceDep):
+	workflow = await service.get_workflow(name)
+	if workflow is None:
+		raise HTTPException(status_code=404, detail=f'Workflow {name} not found')
+	return workflow
+
+
+@router.patch('/{name}', response_model=WorkflowResponse)
+async def patch_workflow(name: str, request: WorkflowPatchRequest, service: ServiceDep):
+	"""Apply JSON patch operations atomically; with ``expected_version``, only if nobody changed the workflow since."""
+	try:
+		version = await service.patch_workflow(name, request.operations, request.expected_version)
+	except KeyError:
+		raise HTTPException(status_code=404, detail=f'Workflow {name} not found')
+	except VersionConflictError as exc:
+		raise HTTPException(status_code=409, detail=str(exc))
+	except PatchError as exc:
+		raise HTTPException(status_code=422, detail=str(exc))
+	return WorkflowResponse(success=True, version=version)
+
+
+@router.get('/{name}/history', response_model=WorkflowHistoryResponse)
+async def get_workflow_history(name: str, service: ServiceDep, limit: int = 50):
+	try:
+		return await service.get_workflow_history(name, limit)
+	except KeyError:
+		raise HTTPException(status_code=404, detail=f'Workflow {name} not found')
+
+
+@router.get('/{name}/history/{version}', response_model=Dict[str, Any])
+async def get_workflow_version(name: str, version: int, service: ServiceDep):
+	document = await service.get_workflow_version(name, version)
+	if document is None:
+		raise HTTPException(status_code=404, detail=f'Version {version} of workflow {name} not found')
+	return document
 
 
 @router.post('/update', response_model=WorkflowResponse)
-async def update_workflow(request: WorkflowUpdateRequest):
-	service = get_service()
-	return service.update_workflow(request)
+async def update_workflow(request: WorkflowUpdateRequest, service: ServiceDep):
+	return await service.update_workflow(request)
 
 
 @router.post('/update-metadata', response_model=WorkflowResponse)
-async def update_workflow_metadata(request: WorkflowMetadataUpdateRequest):
-	service = get_service()
-	return service.update_workflow_metadata(request)
+async def update_workflow_metadata(request: WorkflowMetadataUpdateRequest, service: ServiceDep):
+	return await service.update_workflow_metadata(request)
 
 
 @router.post('/execute', response_model=WorkflowExecuteResponse)
-async def execute_workflow(request: WorkflowExecuteRequest):
-	service = get_service()
+async def execute_workflow(request: WorkflowExecuteRequest, service: ServiceDep):
 	workflow_name = request.name
-	inputs = request.inputs
-
 	if not workflow_name:
 		raise HTTPException(status_code=400, detail='Missing workflow name')
 
-	workflow_path = service.tmp_dir / workflow_name
-	if not workflow_path.exists():
+	if service.catalog.get_entry(workflow_name) is None:
 		raise HTTPException(status_code=404, detail=f'Workflow {workflow_name} not found')
 
 	try:
-		task_id = str(uuid.uuid4())
-		cancel_event = asyncio.Event()
-		service.cancel_events[task_id] = cancel_event
-		log_pos = await service._log_file_position()
-
-		task = asyncio.create_task(service.run_workflow_in_background(task_id, request, cancel_event))
-		service.workflow_tasks[task_id] = task
-		task.add_done_callback(
-			lambda _: (
-				service.workflow_tasks.pop(task_id, None),
-				service.cancel_events.pop(task_id, None),
-			)
-		)
-		return WorkflowExecuteResponse(
-			success=True,
-			task_id=task_id,
-			workflow=workflow_name,
-			log_position=log_pos,
-			message=f"Workflow '{workflow_name}' execution started with task ID: {task_id}",
-		)
+		task_id, queue_position = await service.submit_workflow(request)
+	except QueueFullError as exc:
+		raise HTTPException(status_code=429, detail=f'Too many queued workflow runs, try again later: {exc}')
 	except Exception as exc:
 		raise HTTPException(status_code=500, detail=f'Error starting workflow: {exc}')
 
+	return WorkflowExecuteResponse(
+		success=True,
+		task_id=task_id,
+		workflow=workflow_name,
+		log_position=0,
+		queue_position=queue_position,
+		message=f"Workflow '{workflow_name}' queued at position {queue_position} with task ID: {task_id}",
+	)
+
+
+async def _batch_results(service: WorkflowService, batch: BatchRun, after: int = 0) -> AsyncIterator[str]:
+	# NDJSON: the batch's status, one line per finished item as it finishes, then the final status
+	yield batch.snapshot().model_dump_json() + '\n'
+	async for result in service.follow_batch(batch, after):
+		yield result.model_dump_json() + '\n'
+	yield batch.snapshot().model_dump_json() + '\n'
+
+
+@router.post('/execute-batch', response_model=BatchStatusResponse)
+async def execute_batch(
+	http_request: Request,
+	service: ServiceDep,
+	name: Optional[str] = None,
+	concurrency: Optional[int] = None,
+	priority: Literal['interactive', 'batch'] = 'batch',
+	stream: bool = True,
+):
+	"""Run a workflow once per input set, streaming the result of every item as NDJSON.
+
+	The body is either a WorkflowBatchRequest (``application/json``) or a CSV (``text/csv``, with a
+	header row) or JSONL (``application/x-ndjson``) file of input sets, with the workflow given as
+	``name`` query parameter. With ``stream=false`` the batch status is returned right away; the
+	results can then be followed with ``GET /batches/{batch_id}/results``.
+	"""
+	content_type = http_request.headers.get('content-type', 'application/json')
+	body = await http_request.body()
+	try:
+		if content_type.split(';')[0].strip().lower() == 'application/json':
+			request = WorkflowBatchRequest.model_validate_json(body)
+		else:
+			inputs = parse_batch_inputs(body, content_type)
+			request = WorkflowBatchRequest(name=name or '', inputs=inputs, concurrency=concurrency, priority=priority)
+	except ValueError as exc:
+		raise HTTPException(status_code=400, detail=f'Invalid batch: {exc}')
+
+	if not request.name:
+		raise HTTPException(status_code=400, detail='Missing workflow name')
+	if service.catalog.get_entry(request.name) is None:
+		raise HTTPException(status_code=404, detail=f'Workflow {request.name} not found')
+
+	batch = service.submit_batch(request)
+	if not stream:
+		return batch.snapshot()
+	return StreamingResponse(_batch_results(service, batch), media_type='application/x-ndjson')
+
+
+@router.get('/batches/{batch_id}', response_model=BatchStatusResponse)
+async def get_batch_status(batch_id: str, service: ServiceDep):
+	batch = service.batches.get(batch_id)
+	if batch is None:
+		raise HTTPException(status_code=404, detail=f'Batch {batch_id} not found')
+	return batch.snapshot()
+
+
+@router.get('/batches/{batch_id}/results')
+async def stream_batch_results(batch_id: str, service: ServiceDep, after: int = 0):
+	"""NDJSON stream of the batch's item results, skipping the first ``after`` (in completion order)."""
+	batch = service.batches.get(batch_id)
+	if batch is None:
+		raise HTTPException(status_code=404, detail=f'Batch {batch_id} not found')
+	return StreamingResponse(_batch_results(service, batch, after), media_type='application/x-ndjson')
+
+
+@router.post('/batches/{batch_id}/cancel', response_model=BatchStatusResponse)
+async def cancel_batch(batch_id: str, service: ServiceDep):
+	status = await service.cancel_batch(batch_id)
+	if status is None:
+		raise HTTPException(status_code=404, detail=f'Batch {batch_id} not found')
+	return status
+
 
 @router.get('/logs/{task_id}', response_model=WorkflowLogsResponse)
-async def get_logs(task_id: str, position: int = 0):
-	service = get_service()
-	task_info = service.active_tasks.get(task_id)
-	logs, new_pos = await service._read_logs_from_position(position)
+async def get_logs(task_id: str, service: ServiceDep, position: int = 0):
+	task_info = await service.get_task_info(task_id)
+	task_log = service.get_task_log(task_id)
+	# Positions are sequence numbers within the task's own log
+	entries = task_log.since(position) if task_log else []
+	logs = [format_entry(entry) for entry in entries]
+	new_pos = entries[-1].seq if entries else position
 	return WorkflowLogsResponse(
 		logs=logs,
 		position=new_pos,
@@ -101,19 +214,76 @@ async def get_logs(task_id: str, position: int = 0):
 	)
 
 
+@router.get('/tasks/{task_id}/events')
+async def stream_task_events(
+	task_id: str,
+	service: ServiceDep,
+	after: int = 0,
+	last_event_id: Annotated[Optional[str], Header()] = None,
+):
+	"""Server-sent events with the task's log lines, step completions and status changes.
+
+	The stream ends once the task finished; reconnecting clients resume after ``Last-Event-ID``.
+	"""
+	task_log = service.get_task_log(task_id)
+	if task_log is None:
+		raise HTTPException(status_code=404, detail=f'Task {task_id} not found')
+	if last_event_id and last_event_id.isdigit():
+		after = max(after, int(last_event_id))
+
+	async def events():
+		async for entry in task_log.follow(after):
+			yield f'id: {entry.seq}\nevent: {entry.type}\ndata: {entry.model_dump_json()}\n\n'
+
+	return StreamingResponse(events(), media_type='text/event-stream', headers={'Cache-Control': 'no-cache'})
+
+
 @router.get('/tasks/{task_id}/status', response_model=WorkflowStatusResponse)
-async def get_task_status(task_id: str):
-	service = get_service()
-	task_info = service.get_task_status(task_id)
+async def get_task_status(task_id: str, service: ServiceDep):
+	task_info = await service.get_task_status(task_id)
 	if not task_info:
 		raise HTTPException(status_code=404, detail=f'Task {task_id} not found')
 	return task_info
 
 
 @router.post('/tasks/{task_id}/cancel', response_model=WorkflowCancelResponse)
-async def cancel_workflow(task_id: str):
-	service = get_service()
+async def cancel_workflow(task_id: str, service: ServiceDep):
 	result = await service.cancel_workflow(task_id)
 	if not result.success and result.message == 'Task not found':
 		raise HTTPException(status_code=404, detail=f'Task {task_id} not found')
 	return result
+
+
+@runs_router.get('', response_model=RunListResponse)
+async def list_runs(
+	service: ServiceDep,
+	workflow: Optional[str] = None,
+	status: Optional[str] = None,
+	since: Optional[float] = None,
+	until: Optional[float] = None,
+	cursor: Optional[str] = None,
+	limit: Annotated[int, Query(ge=1, le=500)] = 50,
+	include_result: bool = False,
+):
+	"""Past and current runs, newest first; ``since``/``until`` are Unix timestamps of their creation."""
+	try:
+		runs, next_cursor = await service.query_runs(
+			workflow=workflow,
+			status=status,
+			since=since,
+			until=until,
+			cursor=cursor,
+			limit=limit,
+			include_result=include_result,
+		)
+	except ValueError:
+		raise HTTPException(status_code=400, detail=f'Invalid cursor {cursor!r}')
+	return RunListResponse(runs=runs, next_cursor=next_cursor)
+
+
+@runs_router.get('/{task_id}', response_model=RunRecord)
+async def get_run(task_id: str, service: ServiceDep):
+	task_info = await service.get_task_info(task_id)
+	if task_info is None:
+		raise HTTPException(status_code=404, detail=f'Run {task_id} not found')
+	return RunRecord(task_id=task_id, **task_info.model_dump(exclude={'task_id'}))
@@ -0,0 +1,166 @@
+import json
+import sqlite3
+import threading
+import time
+from pathlib import Path
+from typing import List, Optional, Tuple
+
+from .views import RunRecord
+
+DEFAULT_RUN_HISTORY_PATH = Path('./tmp') / 'store' / 'runs.db'
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS runs (
+	task_id TEXT PRIMARY KEY,
+	workflow TEXT NOT NULL,
+	status TEXT NOT NULL,
+	priority TEXT NOT NULL,
+	inputs TEXT,
+	result TEXT,
+	error TEXT,
+	created_at REAL NOT NULL,
+	started_at REAL,
+	finished_at REAL
+);
+CREATE INDEX IF NOT EXISTS runs_by_workflow ON runs (workflow, created_at);
+CREATE INDEX IF NOT EXISTS runs_by_status ON runs (status, created_at);
+CREATE INDEX IF NOT EXISTS runs_by_time ON runs (created_at);
+"""
+
+_COLUMNS = 'task_id, workflow, status, priority, inputs, result, error, created_at, started_at, finished_at'
+
+
+def _record(row: tuple) -> RunRecord:
+	task_id, workflow, status, priority, inputs, result, error, created_at, started_at, finished_at = row
+	return RunRecord(
+		task_id=task_id,
+		workflow=workflow,
+		status=status,
+		priority=priority,
+		inputs=json.loads(inputs) if inputs else None,
+		result=json.loads(result) if result else None,
+		error=error,
+		created_at=created_at,
+		started_at=started_at,
+		finished_at=finished_at,
+	)
+
+
+class RunHistoryStore:
+	"""SQLite-backed history of every workflow run, queryable by workflow, status and time.
+
+	Runs are written when they are queued, when they start and when they finish, so the
+	history also covers runs the process did not get to finish (see :py:meth:`mark_interrupted`).
+	"""
+
+	def __init__(self, path: str | Path = DEFAULT_RUN_HISTORY_PATH) -> None:
+		self.path = Path(path)
+		self.path.parent.mkdir(parents=True, exist_ok=True)
+
+		self._lock = threading.Lock()
+		self._conn = sqlite3.connect(self.path, check_same_thread=False, isolation_level=None)
+		self._conn.execute('PRAGMA journal_mode=WAL')
+		self._conn.execute('PRAGMA synchronous=NORMAL')
+		self._conn.executescript(_SCHEMA)
+
+	def close(self) -> None:
+		with self._lock:
+			self._conn.close()
+
+	# --- Sync API (cheap, local-disk only) ---
+	def save(self, run: RunRecord) -> None:
+		self.save_many([run])
+
+	def save_many(self, runs: List[RunRecord]) -> None:
+		"""Write *runs* in one transaction."""
+		rows = [
+			(
+				run.task_id,
+				run.workflow,
+				run.status,
+				run.priority,
+				json.dumps(run.inputs, default=str) if run.inputs is not None else None,
+				json.dumps(run.result, default=str) if run.result is not None else None,
+				run.error,
+				run.created_at or time.time(),
+				run.started_at,
+				run.finished_at,
+			)
+			for run in runs
+		]
+		with self._lock:
+			self._conn.execute('BEGIN')
+			try:
+				self._conn.executemany(f'INSERT OR REPLACE INTO runs ({_COLUMNS}) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?)', rows)
+				self._conn.execute('COMMIT')
+			except BaseException:
+				self._conn.execute('ROLLBACK')
+				raise
+
+	def get(self, task_id: str) -> Optional[RunRecord]:
+		with self._lock:
+			row = self._conn.execute(f'SELECT {_COLUMNS} FROM runs WHERE task_id = ?', (task_id,)).fetchone()
+		return _record(row) if row else None
+
+	def query(
+		self,
+		*,
+		workflow: Optional[str] = None,
+		status: Optional[str] = None,
+		since: Optional[float] = None,
+		until: Optional[float] = None,
+		cursor: Optional[str] = None,
+		limit: int = 50,
+		include_result: bool = False,
+	) -> Tuple[List[RunRecord], Optional[str]]:
+		"""Runs matching the filters, newest first, and the cursor of the next page (None on the last page).
+
+		Results are left out unless *include_result* is set, since they can hold whole pages of content.
+		"""
+		clauses, params = [], []
+		if workflow is not None:
+			clauses.append('workflow = ?')
+			params.append(workflow)
+		if status is not None:
+			clauses.append('status = ?')
+			params.append(status)
+		if since is not None:
+			clauses.append('created_at >= ?')
+			params.append(since)
+		if until is not None:
+			clauses.append('created_at < ?')
+			params.append(until)
+		if cursor:
+			# Keyset pagination: the page starts right after the last run of the previous one
+			created_at, _, task_id = cursor.partition(':')
+			clauses.append('(created_at, task_id) < (?, ?)')
+			params.extend([float(created_at), task_id])
+
+		columns = _COLUMNS if include_result else _COLUMNS.replace('result', 'NULL')
+		where = f'WHERE {" AND ".join(clauses)}' if clauses else ''
+		with self._lock:
+			rows = self._conn.execute(
+				f'SELECT {columns} FROM runs {where} ORDER BY created_at DESC, task_id DESC LIMIT ?', (*params, limit + 1)
+			).fetchall()
+
+		runs = [_record(row) for row in rows[:limit]]
+		next_cursor = f'{runs[-1].created_at!r}:{runs[-1].task_id}' if len(rows) > limit else None
+		return runs, next_cursor
+
+	def mark_interrupted(self) -> int:
+		"""Fail the runs a previous process left queued or running; returns how many there were."""
+		with self._lock:
+			cursor = self._conn.execute(
+				"UPDATE runs SET status = 'failed', error = 'Interrupted by a restart of the service', finished_at = ? "
+				"WHERE status IN ('queued', 'running', 'cancelling')",
+				(time.time(),),
+			)
+		return cursor.rowcount
+
+	def prune(self, older_than: float) -> int:
+		"""Delete finished runs created before *older_than*; returns the number deleted."""
+		with self._lock:
+			cursor = self._conn.execute(
+				"DELETE FROM runs WHERE created_at < ? AND status IN ('completed', 'failed', 'cancelled')", (older_than,)
+			)
+		return cursor.rowcount
@@ -0,0 +1,106 @@
+import asyncio
+import heapq
+import itertools
+from dataclasses import dataclass, field
+from typing import Awaitable, Callable, Dict, List, Literal, Optional
+
+Priority = Literal['interactive', 'batch']
+
+# Lower runs first
+PRIORITY_ORDER: Dict[str, int] = {'interactive': 0, 'batch': 1}
+
+
+class QueueFullError(Exception):
+	"""Raised when a job is submitted while the queue is at capacity."""
+
+
+@dataclass(order=True)
+class _Job:
+	rank: int
+	seq: int
+	task_id: str = field(compare=False)
+	run: Callable[[], Awaitable[None]] = field(compare=False)
+
+
+class JobScheduler:
+	"""Bounded priority queue drained by a fixed number of workers.
+
+	Each worker runs one job at a time, so ``workers`` should match the number of browser
+	leases available. Within a priority, jobs run in submission order.
+	"""
+
+	def __init__(self, workers: int, max_queued: int) -> None:
+		if workers < 1:
+			raise ValueError('JobScheduler needs at least one worker')
+		self.workers = workers
+		self.max_queued = max_queued
+
+		self._queue: List[_Job] = []
+		self._seq = itertools.count()
+		self._available = asyncio.Condition()
+		self._workers: List[asyncio.Task] = []
+		# task id -> asyncio task of the jobs currently running
+		self.running: Dict[str, asyncio.Task] = {}
+
+	# --- Lifecycle ---
+	def start(self) -> None:
+		if not self._workers:
+			self._workers = [asyncio.create_task(self._worker()) for _ in range(self.workers)]
+
+	async def stop(self) -> None:
+		"""Drop queued jobs, cancel running ones and stop the workers."""
+		self._queue.clear()
+		tasks = [*self.running.values(), *self._workers]
+		for task in tasks:
+			task.cancel()
+		await asyncio.gather(*tasks, return_exceptions=True)
+		self._workers = []
+
+	# --- Jobs ---
+	async def submit(self, task_id: str, run: Callable[[], Awaitable[None]], priority: Priority = 'interactive') -> int:
+		"""Queue *run* and return its 1-based queue position; raises QueueFullError when full."""
+		async with self._available:
+			if len(self._queue) >= self.max_queued:
+				raise QueueFullError(f'{len(self._queue)} runs are already queued')
+			job = _Job(rank=PRIORITY_ORDER[priority], seq=next(self._seq), task_id=task_id, run=run)
+			heapq.heappush(self._queue, job)
+			self._available.notify()
+			return self.position(task_id) or 0
+
+	def position(self, task_id: str) -> Optional[int]:
+		"""1-based position of a queued job, or None if it is not (or no longer) queued."""
+		for position, job in enumerate(sorted(self._queue), start=1):
+			if job.task_id == task_id:
+				return position
+		return None
+
+	@property
+	def queued(self) -> int:
+		return len(self._queue)
+
+	def cancel(self, task_id: str) -> bool:
+		"""Remove a queued job or cancel a running one; returns False for unknown jobs."""
+		for index, job in enumerate(self._queue):
+			if job.task_id == task_id:
+				self._queue.pop(index)
+				heapq.heapify(self._queue)
+				return True
+		task = self.running.get(task_id)
+		if task and not task.done():
+			task.cancel()
+			return True
+		return False
+
+	async def _worker(self) -> None:
+		while True:
+			async with self._available:
+				await self._available.wait_for(lambda: bool(self._queue))
+				job = heapq.heappop(self._queue)
+
+			# Run in a separate task so cancelling the job does not take the worker down with it
+			task = asyncio.create_task(job.run())
+			self.running[job.task_id] = task
+			try:
+				await asyncio.gather(task, return_exceptions=True)
+			finally:
+				self.running.pop(job.task_id, None)
@@ -1,31 +1,66 @@
 import asyncio
+import functools
 import json
+import logging
 import time
+import uuid
 from pathlib import Path
-from typing import Dict, List, Optional, Tuple
+from typing import Any, AsyncIterator, Callable, Dict, List, Optional, Tuple
 
-import aiofiles
-from browser_use.browser.browser import Browser
+from browser_use.agent.views import AgentHistoryList
 from langchain_openai import ChatOpenAI
 
+from workflow_use.browser.service import BrowserPool
+from workflow_use.controller.extraction_cache import ExtractionCache
 from workflow_use.controller.service import WorkflowController
+from workflow_use.schema.views import WorkflowDefinitionSchema
+from workflow_use.workflow.catalog import WorkflowCatalog
+from workflow_use.workflow.checkpoint import CheckpointStore
+from workflow_use.workflow.rate_limit import OriginRateLimiter
+from workflow_use.workflow.repair import RepairStore
+from workflow_use.workflow.selector_cache import SelectorCache
 from workflow_use.workflow.service import Workflow
 
+from .batches import BatchRun
+from .run_history import RunHistoryStore
+from .scheduler import JobScheduler, QueueFullError
+from .task_logs import TERMINAL_STATUSES, TaskLog, TaskLogHandler, TaskLogRegistry, current_task_id
 from .views import (
+	BatchItemResult,
+	BatchStatusResponse,
+	RunRecord,
 	TaskInfo,
+	WorkflowBatchRequest,
 	WorkflowCancelResponse,
 	WorkflowExecuteRequest,
+	WorkflowHistoryResponse,
 	WorkflowMetadataUpdateRequest,
 	WorkflowResponse,
 	WorkflowStatusResponse,
 	WorkflowUpdateRequest,
 )
+from .workflow_store import PatchError, VersionConflictError, WorkflowStore
 
 
 class WorkflowService:
-	"""Workflow execution service."""
+	"""Workflow execution service.
 
-	def __init__(self) -> None:
+	One instance serves the whole process (see ``api.lifespan``): it owns the shared LLM client,
+	controller, browser pool and stores, and the task tables every endpoint reads from.
+	"""
+
+	def __init__(
+		self,
+		*,
+		max_concurrent_runs: int = 4,
+		max_queued_runs: int = 100,
+		spill_task_logs: bool = True,
+		finished_task_ttl: float = 600.0,
+		run_retention_days: float = 30.0,
+		rate_limiter: Optional[OriginRateLimiter] = None,
+		workflow_file_delay: float = 2.0,
+		capture_storage_state: bool = False,
+	) -> None:
 		# ---------- Core resources ----------
 		self.tmp_dir: Path = Path('./tmp')
 		self.log_dir: Path = self.tmp_dir / 'logs'
@@ -38,56 +73,265 @@ class WorkflowService:
 			print(f'Error initializing LLM: {exc}. Ensure OPENAI_API_KEY is set.')
 			self.llm_instance = None
 
-		self.browser_instance = Browser()
-		self.controller_instance = WorkflowController()
-
-		# In‑memory task tracking
+		self.extraction_cache = ExtractionCache(self.tmp_dir / 'cache' / 'extraction_cache.db')
+		self.controller_instance = WorkflowController(extraction_cache=self.extraction_cache)
+		# One warm browser process; every task runs in its own isolated context of it
+		self.browser_pool = BrowserPool(size=1, contexts_per_process=max_concurrent_runs)
+		self.selector_cache = SelectorCache(self.tmp_dir / 'cache' / 'selector_cache.db')
+
+		# Every task checkpoints under its task id, so a failed task can be resumed; with capture_storage_state
+		# the checkpoints include cookies and localStorage, so a resumed task stays logged in
+		self.checkpoint_store = CheckpointStore(self.tmp_dir / 'checkpoints', capture_storage_state=capture_storage_state)
+		# Steps the agent fallback had to rescue are replaced by what it did
+		self.repair_store = RepairStore(self.tmp_dir / 'repairs')
+		# Per-origin limits every workflow's runs share, on top of the limits a workflow defines itself
+		self.rate_limiter = rate_limiter
+
+		# Parsed and compiled workflows of tmp_dir, served from memory
+		self.catalog = WorkflowCatalog(self.tmp_dir, exclude=('temp_recording*',), workflow_factory=self._build_workflow)
+		# Edits go through a versioned store; it writes the files back once edits paused for workflow_file_delay
+		# seconds, or right before an edited workflow is read or run
+		self.workflow_store = WorkflowStore(self.tmp_dir / 'store' / 'workflows.db')
+		self.workflow_file_delay = workflow_file_delay
+		self._last_edit = 0.0
+		self._file_writer: Optional[asyncio.Task] = None
+
+		# In‑memory task tracking; finished tasks are dropped after finished_task_ttl seconds and
+		# then only served from the run history
 		self.active_tasks: Dict[str, TaskInfo] = {}
-		self.workflow_tasks: Dict[str, asyncio.Task] = {}
+		self.finished_task_ttl = finished_task_ttl
+		self.run_history = RunHistoryStore(self.tmp_dir / 'store' / 'runs.db')
+		# Status changes are written by one background task, in order, so the event loop never waits on SQLite
+		self._history_queue: asyncio.Queue[RunRecord] = asyncio.Queue()
+		self._history_writer: Optional[asyncio.Task] = None
+		self.run_retention_days = run_retention_days
+		self._janitor: Optional[asyncio.Task] = None
 		self.cancel_events: Dict[str, asyncio.Event] = {}
+		# Called with the task's id and info once it reached a terminal status
+		self._on_finished: Dict[str, Callable[[str, TaskInfo], None]] = {}
+		self.batches: Dict[str, BatchRun] = {}
+		# Each task logs into its own buffer (and, optionally, its own JSONL file)
+		self.task_logs = TaskLogRegistry(spill_dir=self.log_dir / 'tasks' if spill_task_logs else None)
+		self._log_handler: Optional[TaskLogHandler] = None
+
+		# Runs wait here for a browser context; one worker per context of the pool
+		self.scheduler = JobScheduler(workers=self.browser_pool.capacity, max_queued=max_queued_runs)
+
+	async def start(self) -> None:
+		"""Warm up long-lived resources; called once when the app starts."""
+		self._log_handler = TaskLogHandler(self.task_logs)
+		for name in ('workflow_use', 'browser_use'):
+			logging.getLogger(name).addHandler(self._log_handler)
+		interrupted = self.run_history.mark_interrupted()
+		if interrupted:
+			print(f'Marked {interrupted} runs of a previous process as failed.')
+		self._janitor = asyncio.create_task(self._clean_up_periodically())
+		self._history_writer = asyncio.create_task(self._write_run_history())
+		self.catalog.start()
+		self.scheduler.start()
+		try:
+			await self.browser_pool.start()
+		except Exception as exc:
+			# Not fatal: the pool launches its browser on the first run instead
+			print(f'Error starting browser: {exc}. It will be launched on the first run.')
 
-	async def _log_file_position(self) -> int:
-		log_file = self.log_dir / 'backend.log'
-		if not log_file.exists():
-			async with aiofiles.open(log_file, 'w') as f:
-				await f.write('')
-			return 0
-		return log_file.stat().st_size
-
-	async def _read_logs_from_position(self, position: int) -> Tuple[List[str], int]:
-		log_file = self.log_dir / 'backend.log'
-		if not log_file.exists():
-			return [], 0
-
-		current_size = log_file.stat().st_size
-		if position >= current_size:
-			return [], position
-
-		async with aiofiles.open(log_file, 'r') as f:
-			await f.seek(position)
-			all_logs = await f.readlines()
-			new_logs = [
-				line
-				for line in all_logs
-				if not line.strip().startswith('INFO:')
-				and not line.strip().startswith('WARNING:')
-				and not line.strip().startswith('DEBUG:')
-				and not line.strip().startswith('ERROR:')
-			]
-		return new_logs, current_size
-
-	async def _write_log(self, log_file: Path, message: str) -> None:
-		async with aiofiles.open(log_file, 'a') as f:
-			await f.write(message)
+	async def shutdown(self) -> None:
+		"""Cancel running tasks and release shared resources; called once when the app stops."""
+		for cancel_event in self.cancel_events.values():
+			cancel_event.set()
+		drivers = [batch.driver for batch in self.batches.values() if batch.driver]
+		for driver in drivers:
+			driver.cancel()
+		await asyncio.gather(*drivers, return_exceptions=True)
+		await self.scheduler.stop()
+		await self.catalog.stop()
+		if self._file_writer:
+			self._file_writer.cancel()
+			await asyncio.gather(self._file_writer, return_exceptions=True)
+		try:
+			await asyncio.to_thread(self.workflow_store.flush_files)
+		except Exception as exc:
+			print(f'Error writing edited workflow files: {exc}')
+		if self._janitor:
+			self._janitor.cancel()
+			await asyncio.gather(self._janitor, return_exceptions=True)
+		if self._history_writer:
+			await self.flush_run_history()
+			self._history_writer.cancel()
+			await asyncio.gather(self._history_writer, return_exceptions=True)
+		self.run_history.close()
+
+		await self.browser_pool.close()
+		self.selector_cache.close()
+		stats = self.extraction_cache.stats
+		print(f'Extraction cache: {stats["hits"]} hits ({stats["disk_hits"]} from disk), {stats["misses"]} misses')
+		self.extraction_cache.close()
+		self.workflow_store.close()
+
+		if self._log_handler:
+			for name in ('workflow_use', 'browser_use'):
+				logging.getLogger(name).removeHandler(self._log_handler)
+		self.task_logs.close_all()
+
+	def _log(self, task_id: str, message: str, **kwargs: Any) -> None:
+		log = self.task_logs.get(task_id)
+		if log:
+			log.append(kwargs.pop('type', 'log'), message, **kwargs)
+
+	def _set_status(self, task_id: str, status: str, error: Optional[str] = None) -> None:
+		"""Update a task's status, record it in the run history and push the change to its log followers."""
+		task_info = self.active_tasks[task_id]
+		task_info.status = status
+		if error is not None:
+			task_info.error = error
+		if status == 'running':
+			task_info.started_at = time.time()
+		elif status in TERMINAL_STATUSES:
+			task_info.finished_at = time.time()
+		self._record_run(task_id)
+
+		self._log(task_id, f'Status: {status}', type='status', status=status, data={'error': error} if error else None)
+		log = self.task_logs.get(task_id)
+		if log and status in TERMINAL_STATUSES:
+			log.close()
+		on_finished = self._on_finished.pop(task_id, None) if status in TERMINAL_STATUSES else None
+		if on_finished:
+			on_finished(task_id, task_info)
+
+	def _record_run(self, task_id: str) -> None:
+		"""Queue the task's current state for the run history."""
+		self._history_queue.put_nowait(RunRecord(task_id=task_id, **self.active_tasks[task_id].model_dump()))
+
+	async def _write_run_history(self) -> None:
+		while True:
+			records = [await self._history_queue.get()]
+			while not self._history_queue.empty():
+				records.append(self._history_queue.get_nowait())
+			# Only the latest state of every run needs writing
+			latest = {record.task_id: record for record in records}
+			try:
+				await asyncio.to_thread(self.run_history.save_many, list(latest.values()))
+			except Exception as exc:
+				print(f'Error writing the run history: {exc}')
+			finally:
+				for _ in records:
+					self._history_queue.task_done()
+
+	async def flush_run_history(self) -> None:
+		"""Wait until every status change so far is in the run history."""
+		await self._history_queue.join()
+
+	def _evict_finished_tasks(self) -> None:
+		"""Drop finished tasks older than the TTL from memory; the run history still has them."""
+		cutoff = time.time() - self.finished_task_ttl
+		for task_id in [
+			task_id
+			for task_id, task_info in self.active_tasks.items()
+			if task_info.finished_at and task_info.finished_at < cutoff
+		]:
+			del self.active_tasks[task_id]
+		for batch_id in [
+			batch_id for batch_id, batch in self.batches.items() if batch.finished_at and batch.finished_at < cutoff
+		]:
+			del self.batches[batch_id]
+
+	async def _clean_up_periodically(self, interval: float = 60.0) -> None:
+		while True:
+			await asyncio.sleep(interval)
+			self._evict_finished_tasks()
+			cutoff = time.time() - self.run_retention_days * 86400
+			try:
+				await asyncio.to_thread(self.run_history.prune, cutoff)
+				# Checkpoints of failed or interrupted tasks go with their runs
+				await asyncio.to_thread(self.checkpoint_store.prune, cutoff)
+			except Exception as exc:
+				print(f'Error pruning the run history: {exc}')
+
+	def get_task_log(self, task_id: str) -> Optional[TaskLog]:
+		return self.task_logs.get(task_id)
+
+	def _build_workflow(self, schema: WorkflowDefinitionSchema) -> Workflow:
+		"""Create the Workflow the catalog caches for a definition; it is reused by every run of it."""
+		return Workflow(
+			schema,
+			llm=self.llm_instance,
+			browser_pool=self.browser_pool,
+			controller=self.controller_instance,
+			selector_cache=self.selector_cache,
+			checkpoint_store=self.checkpoint_store,
+			repair_store=self.repair_store,
+			rate_limiter=self.rate_limiter,
+		)
 
 	def list_workflows(self) -> List[str]:
-		return [f.name for f in self.tmp_dir.iterdir() if f.is_file() and not f.name.startswith('temp_recording')]
+		return [entry.file for entry in self.catalog.list()]
+
+	async def get_workflow(self, name: str) -> Optional[str]:
+		await self._write_workflow_files([name])
+		return self.catalog.get_text(name)
+
+	def _workflow_path(self, name: str) -> Path:
+		if Path(name).name != name or self.catalog.get_entry(name) is None:
+			raise KeyError(f'Workflow {name} not found')
+		return self.tmp_dir / name
+
+	async def patch_workflow(self, name: str, operations: List[Dict[str, Any]], expected_version: Optional[int] = None) -> int:
+		"""Apply a JSON patch to a workflow and return its new version.
+
+		Raises KeyError for unknown workflows, VersionConflictError when *expected_version* is
+		outdated and PatchError for patches that fail or would leave an invalid workflow.
+		"""
+		path = self._workflow_path(name)
+		version = await asyncio.to_thread(self.workflow_store.patch_file, name, path, operations, expected_version)
+		# Every edit restarts the delay, so a burst of them is written once
+		self._last_edit = time.monotonic()
+		if self._file_writer is None or self._file_writer.done():
+			self._file_writer = asyncio.create_task(self._write_workflow_files_later())
+		return version
+
+	async def _write_workflow_files(self, names: Optional[List[str]] = None) -> None:
+		"""Write the files of edited workflows (all, or those in *names*) and reload them in the catalog."""
+		if names is not None and not any(self.workflow_store.has_pending_file(name) for name in names):
+			return
+		for name in await asyncio.to_thread(self.workflow_store.flush_files, names):
+			self.catalog.invalidate(name)
+
+	async def _write_workflow_files_later(self) -> None:
+		while True:
+			remaining = self._last_edit + self.workflow_file_delay - time.monotonic()
+			if remaining > 0:
+				await asyncio.sleep(remaining)
+				continue
+			started = time.monotonic()
+			try:
+				await self._write_workflow_files()
+			except Exception as exc:
+				print(f'Error writing edited workflow files: {exc}')
+			# Edits made while writing need another pass
+			if self._last_edit < started:
+				return
 
-	def get_workflow(self, name: str) -> str:
-		wf_file = self.tmp_dir / name
-		return wf_file.read_text()
+	async def get_workflow_history(self, name: str, limit: int = 50) -> WorkflowHistoryResponse:
+		path = self._workflow_path(name)
+		version = await asyncio.to_thread(self.workflow_store.sync_file, name, path)
+		history = await asyncio.to_thread(self.workflow_store.history, name, limit)
+		return WorkflowHistoryResponse(name=name, version=version or 0, history=history)
 
-	def update_workflow(self, request: WorkflowUpdateRequest) -> WorkflowResponse:
+	async def get_workflow_version(self, name: str, version: int) -> Optional[Dict[str, Any]]:
+		return await asyncio.to_thread(self.workflow_store.document, name, version)
+
+	async def _patch_response(
+		self, name: str, operations: List[Dict[str, Any]], expected_version: Optional[int]
+	) -> WorkflowResponse:
+		try:
+			version = await self.patch_workflow(name, operations, expected_version)
+		except KeyError:
+			return WorkflowResponse(success=False, error=f"Workflow file '{name}' not found")
+		except (PatchError, VersionConflictError) as e:
+			return WorkflowResponse(success=False, error=str(e))
+		return WorkflowResponse(success=True, version=version)
+
+	async def update_workflow(self, request: WorkflowUpdateRequest) -> WorkflowResponse:
 		workflow_filename = request.filename
 		node_id = request.nodeId
 		updated_step_data = request.stepData
@@ -95,41 +339,124 @@ class WorkflowService:
 		if not (workflow_filename and node_id is not None and updated_step_data):
 			return WorkflowResponse(success=False, error='Missing required fields')
 
-		wf_file = self.tmp_dir / workflow_filename
-		if not wf_file.exists():
-			return WorkflowResponse(success=False, error=f"Workflow file '{workflow_filename}' not found")
-
-		workflow_content = json.loads(wf_file.read_text())
-		steps = workflow_content.get('steps', [])
-
-		if 0 <= int(node_id) < len(steps):
-			steps[int(node_id)] = updated_step_data
-			wf_file.write_text(json.dumps(workflow_content, indent=2))
-			return WorkflowResponse(success=True)
+		operations = [{'op': 'replace', 'path': f'/steps/{int(node_id)}', 'value': updated_step_data}]
+		return await self._patch_response(workflow_filename, operations, request.expected_version)
 
-		return WorkflowResponse(success=False, error='Node not found in workflow')
-
-	def update_workflow_metadata(self, request: WorkflowMetadataUpdateRequest) -> WorkflowResponse:
+	async def update_workflow_metadata(self, request: WorkflowMetadataUpdateRequest) -> WorkflowResponse:
 		workflow_name = request.name
 		updated_metadata = request.metadata
 
 		if not (workflow_name and updated_metadata):
 			return WorkflowResponse(success=False, error='Missing required fields')
 
-		wf_file = self.tmp_dir / workflow_name
-		if not wf_file.exists():
-			return WorkflowResponse(success=False, error='Workflow not found')
-
-		workflow_content = json.loads(wf_file.read_text())
-		workflow_content['name'] = updated_metadata.get('name', workflow_content.get('name', ''))
-		workflow_content['description'] = updated_metadata.get('description', workflow_content.get('description', ''))
-		workflow_content['version'] = updated_metadata.get('version', workflow_content.get('version', ''))
-
-		if 'input_schema' in updated_metadata:
-			workflow_content['input_schema'] = updated_metadata['input_schema']
+		# 'add' sets a field whether or not the file already has it
+		operations = [
+			{'op': 'add', 'path': f'/{field}', 'value': updated_metadata[field]}
+			for field in ('name', 'description', 'version', 'input_schema')
+			if field in updated_metadata
+		]
+		return await self._patch_response(workflow_name, operations, request.expected_version)
+
+	async def submit_workflow(
+		self, request: WorkflowExecuteRequest, on_finished: Optional[Callable[[str, TaskInfo], None]] = None
+	) -> Tuple[str, int]:
+		"""Queue a run of *request* and return its task id and queue position.
+
+		*on_finished* is called with the task's id and info once it completed, failed or was cancelled.
+		Raises QueueFullError when too many runs are already waiting.
+		"""
+		task_id = str(uuid.uuid4())
+		cancel_event = asyncio.Event()
+
+		async def run() -> None:
+			try:
+				await self.run_workflow_in_background(task_id, request, cancel_event)
+			finally:
+				self.cancel_events.pop(task_id, None)
 
-		wf_file.write_text(json.dumps(workflow_content, indent=2))
-		return WorkflowResponse(success=True)
+		self.active_tasks[task_id] = TaskInfo(
+			status='queued', workflow=request.name, inputs=request.inputs, priority=request.priority, created_at=time.time()
+		)
+		self.cancel_events[task_id] = cancel_event
+		if on_finished:
+			self._on_finished[task_id] = on_finished
+		try:
+			position = await self.scheduler.submit(task_id, run, priority=request.priority)
+		except Exception:
+			self.active_tasks.pop(task_id, None)
+			self.cancel_events.pop(task_id, None)
+			self._on_finished.pop(task_id, None)
+			raise
+		self.task_logs.create(task_id)
+		self._record_run(task_id)
+		self._log(task_id, f'Queued at position {position}', type='status', status='queued')
+		return task_id, position
+
+	def submit_batch(self, request: WorkflowBatchRequest) -> BatchRun:
+		"""Start running *request*'s items as individual tasks, at most ``concurrency`` of them at a time."""
+		concurrency = max(1, min(request.concurrency or self.browser_pool.capacity, self.scheduler.max_queued))
+		batch = BatchRun(str(uuid.uuid4()), request.name, len(request.inputs), concurrency)
+		self.batches[batch.batch_id] = batch
+		batch.driver = asyncio.create_task(self._run_batch(batch, request))
+		return batch
+
+	async def _run_batch(self, batch: BatchRun, request: WorkflowBatchRequest) -> None:
+		# Items are only submitted while a slot is free, so a batch never floods the shared queue
+		slots = asyncio.Semaphore(batch.concurrency)
+
+		def on_finished(index: int, task_id: str, task_info: TaskInfo) -> None:
+			slots.release()
+			# The run's result stays with the task (and the run history), the batch only tracks its status
+			batch.add_item(BatchItemResult(index=index, task_id=task_id, status=task_info.status))
+
+		submitted = 0
+		try:
+			for index, inputs in enumerate(request.inputs):
+				await slots.acquire()
+				if batch.cancelled:
+					break
+				item_request = WorkflowExecuteRequest(name=request.name, inputs=inputs, priority=request.priority)
+				task_id: Optional[str] = None
+				while task_id is None:
+					try:
+						task_id, _ = await self.submit_workflow(item_request, functools.partial(on_finished, index))
+					except QueueFullError:
+						# Other clients filled the queue: wait for room instead of failing the item
+						await asyncio.sleep(1)
+				submitted += 1
+				if index not in batch.finished_items:
+					batch.task_ids[index] = task_id
+				if batch.cancelled:
+					await self.cancel_workflow(task_id)
+
+			for index in range(submitted, batch.total):
+				batch.add_item(BatchItemResult(index=index, status='cancelled'))
+			await batch.wait_for_items()
+			batch.finish('cancelled' if batch.cancelled else 'completed')
+		except Exception as exc:
+			print(f'Error running batch {batch.batch_id}: {exc}')
+			for index in range(submitted, batch.total):
+				batch.add_item(BatchItemResult(index=index, status='failed', error=f'Batch failed: {exc}'))
+			batch.finish('failed')
+
+	async def follow_batch(self, batch: BatchRun, after: int = 0) -> AsyncIterator[BatchItemResult]:
+		"""Like ``BatchRun.follow``, with the result and error of every item's run filled in."""
+		async for item in batch.follow(after):
+			task_info = await self.get_task_info(item.task_id) if item.task_id else None
+			if task_info:
+				item = item.model_copy(update={'result': task_info.result, 'error': task_info.error})
+			yield item
+
+	async def cancel_batch(self, batch_id: str) -> Optional[BatchStatusResponse]:
+		"""Stop submitting the batch's items and cancel the ones queued or running."""
+		batch = self.batches.get(batch_id)
+		if batch is None:
+			return None
+		if not batch.finished and not batch.cancelled:
+			batch.cancelled = True
+			for task_id in list(batch.task_ids.values()):
+				await self.cancel_workflow(task_id)
+		return batch.snapshot()
 
 	async def run_workflow_in_background(
 		self,
@@ -139,67 +466,97 @@ class WorkflowService:
 	) -> None:
 		workflow_name = request.name
 		inputs = request.inputs
-		log_file = self.log_dir / 'backend.log'
+		# Library log records emitted while this task runs end up in its own log
+		current_task_id.set(task_id)
+		log = self.task_logs.get(task_id) or self.task_logs.create(task_id)
 		try:
-			self.active_tasks[task_id] = TaskInfo(status='running', workflow=workflow_name)
-			ts = time.strftime('%Y-%m-%d %H:%M:%S')
-			await self._write_log(log_file, f"[{ts}] Starting workflow '{workflow_name}'\n")
-			await self._write_log(log_file, f'[{ts}] Input parameters: {json.dumps(inputs)}\n')
+			self.active_tasks.setdefault(
+				task_id, TaskInfo(status='queued', workflow=workflow_name, inputs=inputs, created_at=time.time())
+			)
+			self._set_status(task_id, 'running')
+			self._log(task_id, f"Starting workflow '{workflow_name}'")
+			self._log(task_id, f'Input parameters: {json.dumps(inputs)}')
 
 			if cancel_event.is_set():
-				await self._write_log(log_file, f'[{ts}] Workflow cancelled before execution\n')
-				self.active_tasks[task_id].status = 'cancelled'
+				self._log(task_id, 'Workflow cancelled before execution')
+				self._set_status(task_id, 'cancelled')
 				return
 
-			workflow_path = self.tmp_dir / workflow_name
 			try:
-				self.workflow_obj = Workflow.load_from_file(
-					str(workflow_path), llm=self.llm_instance, browser=self.browser_instance, controller=self.controller_instance
-				)
+				await self._write_workflow_files([workflow_name])
+				workflow = self.catalog.get_workflow(workflow_name)
 			except Exception as e:
-				print(f'Error loading workflow: {e}')
+				self._log(task_id, f'Error loading workflow: {e}', level='ERROR')
+				self._set_status(task_id, 'failed', error=f'Error loading workflow: {e}')
 				return
 
-			await self._write_log(log_file, f'[{ts}] Executing workflow...\n')
+			if request.resume_from:
+				self._log(task_id, f'Resuming task {request.resume_from} from its last checkpoint...')
+			else:
+				self._log(task_id, 'Executing workflow...')
 
 			if cancel_event.is_set():
-				await self._write_log(log_file, f'[{ts}] Workflow cancelled before execution\n')
-				self.active_tasks[task_id].status = 'cancelled'
+				self._log(task_id, 'Workflow cancelled before execution')
+				self._set_status(task_id, 'cancelled')
 				return
 
-			result = await self.workflow_obj.run(inputs, close_browser_at_end=True, cancel_event=cancel_event)
+			# Steps are logged and reported as they complete instead of once the whole run is done
+			formatted_result: List[Dict] = []
+			self.active_tasks[task_id].result = formatted_result
+			async for event in workflow.run_iter(
+				inputs,
+				close_browser_at_end=True,
+				cancel_event=cancel_event,
+				run_id=task_id,
+				resume_from=request.resume_from,
+			):
+				if event.type == 'step_started':
+					log.current_step = event.step_index
+				if event.type != 'step_completed':
+					continue
+				result = event.result
+				extracted_content = result.final_result() if isinstance(result, AgentHistoryList) else result.extracted_content
+				step_result = {'step_id': event.step_index, 'extracted_content': extracted_content, 'status': 'completed'}
+				formatted_result.append(step_result)
+				self._log(
+					task_id,
+					f'Completed step {event.step_index}: {extracted_content}',
+					type='step',
+					data={**step_result, 'rate_limit_wait_ms': event.rate_limit_wait_ms},
+				)
+			log.current_step = None
 
 			if cancel_event.is_set():
-				await self._write_log(log_file, f'[{ts}] Workflow execution was cancelled\n')
-				self.active_tasks[task_id].status = 'cancelled'
+				self._log(task_id, 'Workflow execution was cancelled')
+				self._set_status(task_id, 'cancelled')
 				return
 
-			formatted_result = [
-				{
-					'step_id': i,
-					'extracted_content': s.extracted_content,
-					'status': 'completed',
-				}
-				for i, s in enumerate(result.step_results)
-			]
-			for step in formatted_result:
-				await self._write_log(log_file, f'[{ts}] Completed step {step["step_id"]}: {step["extracted_content"]}\n')
-
-			self.active_tasks[task_id].status = 'completed'
-			self.active_tasks[task_id].result = formatted_result
-			await self._write_log(log_file, f'[{ts}] Workflow completed successfully with {len(result.step_results)} steps\n')
+			self._log(task_id, f'Workflow completed successfully with {len(formatted_result)} steps')
+			self._set_status(task_id, 'completed')
 
 		except asyncio.CancelledError:
-			await self._write_log(log_file, f'[{time.strftime("%Y-%m-%d %H:%M:%S")}] Workflow force‑cancelled\n')
-			self.active_tasks[task_id].status = 'cancelled'
+			self._log(task_id, 'Workflow force‑cancelled')
+			self._set_status(task_id, 'cancelled')
 			raise
 		except Exception as exc:
-			await self._write_log(log_file, f'[{time.strftime("%Y-%m-%d %H:%M:%S")}] Error: {exc}\n')
-			self.active_tasks[task_id].status = 'failed'
-			self.active_tasks[task_id].error = str(exc)
+			self._log(task_id, f'Error: {exc}', level='ERROR')
+			self._set_status(task_id, 'failed', error=str(exc))
 
-	def get_task_status(self, task_id: str) -> Optional[WorkflowStatusResponse]:
+	async def get_task_info(self, task_id: str) -> Optional[TaskInfo]:
+		"""The task from memory, or from the run history once it was evicted (or ran in an earlier process)."""
 		task_info = self.active_tasks.get(task_id)
+		if task_info is None:
+			task_info = await asyncio.to_thread(self.run_history.get, task_id)
+		return task_info
+
+	async def query_runs(self, **filters: Any) -> Tuple[List[RunRecord], Optional[str]]:
+		"""Page through the run history; see RunHistoryStore.query for the filters."""
+		# Include status changes still waiting for the writer
+		await self.flush_run_history()
+		return await asyncio.to_thread(lambda: self.run_history.query(**filters))
+
+	async def get_task_status(self, task_id: str) -> Optional[WorkflowStatusResponse]:
+		task_info = await self.get_task_info(task_id)
 		if not task_info:
 			return None
 
@@ -209,27 +566,28 @@ class WorkflowService:
 			workflow=task_info.workflow,
 			result=task_info.result,
 			error=task_info.error,
+			queue_position=self.scheduler.position(task_id) if task_info.status == 'queued' else None,
 		)
 
 	async def cancel_workflow(self, task_id: str) -> WorkflowCancelResponse:
-		task_info = self.active_tasks.get(task_id)
+		task_info = await self.get_task_info(task_id)
 		if not task_info:
 			return WorkflowCancelResponse(success=False, message='Task not found')
-		if task_info.status != 'running':
+		if task_info.status not in ('queued', 'running'):
 			return WorkflowCancelResponse(success=False, message=f'Task is already {task_info.status}')
 
-		task = self.workflow_tasks.get(task_id)
 		cancel_event = self.cancel_events.get(task_id)
-
 		if cancel_event:
 			cancel_event.set()
-		if task and not task.done():
-			task.cancel()
 
-		await self._write_log(
-			self.log_dir / 'backend.log',
-			f'[{time.strftime("%Y-%m-%d %H:%M:%S")}] Workflow execution for task {task_id} cancelled by user\n',
-		)
+		if task_info.status == 'queued':
+			# Never started, so there is nothing to wind down
+			self.scheduler.cancel(task_id)
+			self.cancel_events.pop(task_id, None)
+			self._set_status(task_id, 'cancelled')
+			return WorkflowCancelResponse(success=True, message='Queued workflow cancelled')
 
-		self.active_tasks[task_id].status = 'cancelling'
+		self.scheduler.cancel(task_id)
+		self._log(task_id, f'Workflow execution for task {task_id} cancelled by user')
+		self._set_status(task_id, 'cancelling')
 		return WorkflowCancelResponse(success=True, message='Workflow cancellation requested')
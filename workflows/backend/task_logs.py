@@ -0,0 +1,219 @@
+import asyncio
+import logging
+import queue
+import threading
+import time
+from collections import OrderedDict, deque
+from contextvars import ContextVar
+from pathlib import Path
+from typing import IO, Any, AsyncIterator, Deque, Dict, List, Optional, Tuple
+
+from .views import TaskLogEntry
+
+TERMINAL_STATUSES = {'completed', 'failed', 'cancelled'}
+
+# Id of the task the current coroutine runs for; asyncio tasks and threads started from it inherit it
+current_task_id: ContextVar[Optional[str]] = ContextVar('current_task_id', default=None)
+
+
+def format_entry(entry: TaskLogEntry) -> str:
+	"""Render an entry as the plain log line the log viewer shows."""
+	return f'[{time.strftime("%Y-%m-%d %H:%M:%S", time.localtime(entry.timestamp))}] {entry.message}\n'
+
+
+class LogSpiller:
+	"""Appends log lines to their files from one background thread, so the event loop never waits on disk.
+
+	Lines are only queued by the callers; the thread writes whatever queued up since its last
+	pass with one write and one flush per file.
+	"""
+
+	def __init__(self) -> None:
+		# (file, line) to append, (file, None) to close the file, None to stop
+		self._queue: 'queue.SimpleQueue[Optional[Tuple[Path, Optional[str]]]]' = queue.SimpleQueue()
+		self._thread = threading.Thread(target=self._run, name='task-log-spill', daemon=True)
+		self._thread.start()
+
+	def write(self, path: Path, line: str) -> None:
+		self._queue.put((path, line))
+
+	def close_file(self, path: Path) -> None:
+		self._queue.put((path, None))
+
+	def stop(self) -> None:
+		"""Write everything queued so far, close all files and end the thread."""
+		if self._thread.is_alive():
+			self._queue.put(None)
+			self._thread.join()
+
+	def _run(self) -> None:
+		files: Dict[Path, IO[str]] = {}
+		stopping = False
+		while not stopping:
+			batch = [self._queue.get()]
+			while True:
+				try:
+					batch.append(self._queue.get_nowait())
+				except queue.Empty:
+					break
+
+			lines: Dict[Path, List[str]] = {}
+			closing: List[Path] = []
+			for item in batch:
+				if item is None:
+					stopping = True
+				elif item[1] is None:
+					closing.append(item[0])
+				else:
+					lines.setdefault(item[0], []).append(item[1])
+
+			for path, path_lines in lines.items():
+				try:
+					file = files.get(path)
+					if file is None:
+						file = files[path] = path.open('a', encoding='utf-8')
+					file.write(''.join(path_lines))
+					file.flush()
+				except OSError as exc:
+					print(f'Could not write task log {path}: {exc}')
+			for path in list(files) if stopping else closing:
+				file = files.pop(path, None)
+				if file:
+					file.close()
+
+
+class TaskLog:
+	"""Ring buffer of one task's log entries that followers can wait on.
+
+	Only the last ``capacity`` entries are kept in memory; with a ``spill_path`` every entry is
+	also appended to that file as a JSON line, by the ``spiller``'s thread. Must be used from the
+	event loop's thread.
+	"""
+
+	def __init__(
+		self, task_id: str, capacity: int, spill_path: Optional[Path] = None, spiller: Optional[LogSpiller] = None
+	) -> None:
+		self.task_id = task_id
+		self.entries: Deque[TaskLogEntry] = deque(maxlen=capacity)
+		self.last_seq = 0
+		self.closed = False
+		# Step the task is currently running; log lines are tagged with it
+		self.current_step: Optional[int] = None
+		self._changed = asyncio.Event()
+		self._spill_path = spill_path if spiller else None
+		self._spiller = spiller
+
+	def append(
+		self,
+		type: str,
+		message: str,
+		*,
+		level: str = 'INFO',
+		step_index: Optional[int] = None,
+		status: Optional[str] = None,
+		data: Optional[Dict[str, Any]] = None,
+	) -> Optional[TaskLogEntry]:
+		if self.closed:
+			return None
+		self.last_seq += 1
+		entry = TaskLogEntry(
+			seq=self.last_seq,
+			timestamp=time.time(),
+			task_id=self.task_id,
+			type=type,
+			message=message,
+			level=level,
+			step_index=step_index if step_index is not None else self.current_step,
+			status=status,
+			data=data,
+		)
+		self.entries.append(entry)
+		if self._spiller and self._spill_path:
+			self._spiller.write(self._spill_path, entry.model_dump_json() + '\n')
+		self._notify()
+		return entry
+
+	def since(self, seq: int) -> List[TaskLogEntry]:
+		"""Entries newer than *seq* that are still in the buffer."""
+		return [entry for entry in self.entries if entry.seq > seq]
+
+	def close(self) -> None:
+		"""Mark the log as complete; followers stop after the last entry."""
+		if self.closed:
+			return
+		self.closed = True
+		if self._spiller and self._spill_path:
+			self._spiller.close_file(self._spill_path)
+		self._notify()
+
+	def _notify(self) -> None:
+		changed, self._changed = self._changed, asyncio.Event()
+		changed.set()
+
+	async def follow(self, after: int = 0) -> AsyncIterator[TaskLogEntry]:
+		"""Yield the entries after *after*, then new ones as they arrive, until the log closes."""
+		while True:
+			changed = self._changed
+			for entry in self.since(after):
+				after = entry.seq
+				yield entry
+			if self.closed and after >= self.last_seq:
+				return
+			if after >= self.last_seq:
+				await changed.wait()
+
+
+class TaskLogRegistry:
+	"""The task logs of the service; closed logs are evicted once more than ``max_tasks`` exist."""
+
+	def __init__(self, capacity: int = 1000, max_tasks: int = 500, spill_dir: Optional[Path] = None) -> None:
+		self.capacity = capacity
+		self.max_tasks = max_tasks
+		self.spill_dir = spill_dir
+		self._spiller: Optional[LogSpiller] = None
+		if spill_dir:
+			spill_dir.mkdir(parents=True, exist_ok=True)
+			self._spiller = LogSpiller()
+		self._logs: 'OrderedDict[str, TaskLog]' = OrderedDict()
+
+	def create(self, task_id: str) -> TaskLog:
+		spill_path = self.spill_dir / f'{task_id}.jsonl' if self.spill_dir else None
+		log = self._logs[task_id] = TaskLog(task_id, self.capacity, spill_path, self._spiller)
+		for old_id in [old_id for old_id, old in self._logs.items() if old.closed][: max(0, len(self._logs) - self.max_tasks)]:
+			del self._logs[old_id]
+		return log
+
+	def get(self, task_id: str) -> Optional[TaskLog]:
+		return self._logs.get(task_id)
+
+	def close_all(self) -> None:
+		"""Close every log and wait until all spilled entries are on disk."""
+		for log in self._logs.values():
+			log.close()
+		if self._spiller:
+			self._spiller.stop()
+
+
+class TaskLogHandler(logging.Handler):
+	"""Routes records logged while a task is running into that task's log, found via ``current_task_id``."""
+
+	def __init__(self, registry: TaskLogRegistry, level: int = logging.INFO) -> None:
+		super().__init__(level)
+		self.registry = registry
+		self.loop = asyncio.get_running_loop()
+		self.loop_thread = threading.get_ident()
+		self.setFormatter(logging.Formatter('%(message)s'))
+
+	def emit(self, record: logging.LogRecord) -> None:
+		task_id = current_task_id.get()
+		log = self.registry.get(task_id) if task_id else None
+		if log is None:
+			return
+		try:
+			message = self.format(record)
+			if threading.get_ident() == self.loop_thread:
+				log.append('log', message, level=record.levelname)
+			else:
+				self.loop.call_soon_threadsafe(lambda: log.append('log', message, level=record.levelname))
+		except Exception:
+			self.handleError(record)
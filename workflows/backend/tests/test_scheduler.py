@@ -0,0 +1,129 @@
+import asyncio
+
+import pytest
+
+from backend.scheduler import JobScheduler, QueueFullError
+
+
+class Jobs:
+	"""Makes jobs that record the order they start in, and waits for a number of them to finish."""
+
+	def __init__(self) -> None:
+		self.started = []
+		self.finished = 0
+		self._changed = asyncio.Condition()
+
+	def job(self, name, release=None):
+		async def run():
+			async with self._changed:
+				self.started.append(name)
+				self._changed.notify_all()
+			if release is not None:
+				await release.wait()
+			async with self._changed:
+				self.finished += 1
+				self._changed.notify_all()
+
+		return run
+
+	async def wait_started(self, count):
+		async with self._changed:
+			await self._changed.wait_for(lambda: len(self.started) >= count)
+
+	async def wait_finished(self, count):
+		async with self._changed:
+			await self._changed.wait_for(lambda: self.finished >= count)
+
+
+def test_interactive_jobs_run_before_batch_jobs():
+	async def main():
+		jobs = Jobs()
+		scheduler = JobScheduler(workers=1, max_queued=10)
+		positions = [
+			await scheduler.submit('b1', jobs.job('b1'), 'batch'),
+			await scheduler.submit('b2', jobs.job('b2'), 'batch'),
+			await scheduler.submit('i1', jobs.job('i1')),
+			await scheduler.submit('i2', jobs.job('i2'), 'interactive'),
+		]
+		assert [scheduler.position(task_id) for task_id in ('i1', 'i2', 'b1', 'b2')] == [1, 2, 3, 4]
+
+		scheduler.start()
+		await jobs.wait_finished(4)
+		await scheduler.stop()
+		return positions, jobs.started
+
+	positions, started = asyncio.run(main())
+
+	assert positions == [1, 2, 1, 2]
+	assert started == ['i1', 'i2', 'b1', 'b2']
+
+
+def test_full_queue_rejects_jobs():
+	async def main():
+		jobs = Jobs()
+		scheduler = JobScheduler(workers=1, max_queued=2)
+		await scheduler.submit('a', jobs.job('a'), 'batch')
+		await scheduler.submit('b', jobs.job('b'), 'batch')
+
+		# Interactive jobs do not skip the bound either
+		with pytest.raises(QueueFullError):
+			await scheduler.submit('c', jobs.job('c'), 'interactive')
+		assert scheduler.queued == 2
+		assert scheduler.position('c') is None
+
+		assert scheduler.cancel('a')
+		assert await scheduler.submit('c', jobs.job('c')) == 1
+
+	asyncio.run(main())
+
+
+def test_running_jobs_do_not_count_against_the_queue():
+	async def main():
+		jobs = Jobs()
+		release = asyncio.Event()
+		scheduler = JobScheduler(workers=2, max_queued=1)
+		scheduler.start()
+		await scheduler.submit('a', jobs.job('a', release))
+		await jobs.wait_started(1)
+		await scheduler.submit('b', jobs.job('b', release))
+		await jobs.wait_started(2)
+
+		assert set(scheduler.running) == {'a', 'b'}
+		await scheduler.submit('c', jobs.job('c'))
+		with pytest.raises(QueueFullError):
+			await scheduler.submit('d', jobs.job('d'))
+
+		release.set()
+		await jobs.wait_finished(3)
+		await scheduler.stop()
+		return jobs.started
+
+	assert asyncio.run(main()) == ['a', 'b', 'c']
+
+
+def test_cancel_and_failures_keep_the_workers_running():
+	async def main():
+		jobs = Jobs()
+
+		async def fail():
+			raise RuntimeError('boom')
+
+		scheduler = JobScheduler(workers=1, max_queued=10)
+		scheduler.start()
+		await scheduler.submit('blocked', jobs.job('blocked', asyncio.Event()))
+		await scheduler.submit('failing', fail)
+		await scheduler.submit('after', jobs.job('after'))
+		await jobs.wait_started(1)
+
+		assert scheduler.cancel('blocked')
+		assert not scheduler.cancel('unknown')
+		await jobs.wait_finished(1)
+		await scheduler.stop()
+		return jobs.started
+
+	assert asyncio.run(main()) == ['blocked', 'after']
+
+
+def test_needs_a_worker():
+	with pytest.raises(ValueError):
+		JobScheduler(workers=0, max_queued=1)
@@ -0,0 +1,131 @@
+import json
+
+import pytest
+
+from backend.workflow_store import PatchError, VersionConflictError, WorkflowStore, apply_patch
+
+WORKFLOW = {
+	'name': 'Search',
+	'description': 'Search the docs',
+	'version': '1.0',
+	'input_schema': [],
+	'steps': [
+		{'type': 'navigation', 'url': 'https://example.com'},
+		{'type': 'click', 'cssSelector': '#search'},
+		{'type': 'input', 'cssSelector': '#query', 'value': '{query}'},
+	],
+}
+
+
+@pytest.fixture
+def store(tmp_path):
+	store = WorkflowStore(tmp_path / 'store' / 'workflows.db')
+	yield store
+	store.close()
+
+
+@pytest.fixture
+def workflow_file(tmp_path):
+	path = tmp_path / 'search.workflow.json'
+	path.write_text(json.dumps(WORKFLOW), encoding='utf-8')
+	return path
+
+
+def test_apply_patch_does_not_change_its_input():
+	document = {'steps': [{'a': 1}]}
+	patched = apply_patch(
+		document, [{'op': 'replace', 'path': '/steps/0/a', 'value': 2}, {'op': 'add', 'path': '/b', 'value': 3}]
+	)
+	assert patched == {'steps': [{'a': 2}], 'b': 3}
+	assert document == {'steps': [{'a': 1}]}
+
+
+def test_patch_changes_one_step(store, workflow_file):
+	assert store.sync_file('search', workflow_file) == 1
+
+	version = store.patch('search', [{'op': 'replace', 'path': '/steps/1/cssSelector', 'value': '#go'}])
+
+	assert version == 2
+	document = store.document('search')
+	assert document['steps'][1] == {'type': 'click', 'cssSelector': '#go'}
+	assert document['steps'][0] == WORKFLOW['steps'][0]
+	assert document['description'] == WORKFLOW['description']
+
+
+def test_patch_adds_and_removes_steps(store, workflow_file):
+	store.sync_file('search', workflow_file)
+
+	store.patch(
+		'search',
+		[
+			{'op': 'add', 'path': '/steps/1', 'value': {'type': 'scroll', 'scrollX': 0, 'scrollY': 100}},
+			{'op': 'remove', 'path': '/steps/0'},
+		],
+	)
+
+	assert [step['type'] for step in store.document('search')['steps']] == ['scroll', 'click', 'input']
+
+
+def test_invalid_patch_changes_nothing(store, workflow_file):
+	store.sync_file('search', workflow_file)
+
+	with pytest.raises(PatchError):
+		store.patch('search', [{'op': 'remove', 'path': '/steps/1/cssSelector'}])
+	with pytest.raises(PatchError):
+		store.patch('search', [{'op': 'replace', 'path': '/name', 'value': 'Renamed'}, {'op': 'remove', 'path': '/steps/9'}])
+
+	assert store.version('search') == 1
+	assert store.document('search') == WORKFLOW
+
+
+def test_patch_with_outdated_version_conflicts(store, workflow_file):
+	store.sync_file('search', workflow_file)
+	store.patch('search', [{'op': 'replace', 'path': '/description', 'value': 'First'}], expected_version=1)
+
+	with pytest.raises(VersionConflictError) as conflict:
+		store.patch('search', [{'op': 'replace', 'path': '/description', 'value': 'Second'}], expected_version=1)
+
+	assert (conflict.value.expected, conflict.value.current) == (1, 2)
+	assert store.document('search')['description'] == 'First'
+
+
+def test_unknown_workflow(store):
+	with pytest.raises(KeyError):
+		store.patch('missing', [{'op': 'replace', 'path': '/description', 'value': 'x'}])
+
+
+def test_history_replays_every_version(store, workflow_file):
+	store.sync_file('search', workflow_file)
+	store.patch('search', [{'op': 'replace', 'path': '/description', 'value': 'Edited'}])
+	store.patch('search', [{'op': 'remove', 'path': '/steps/2'}])
+
+	assert store.document('search', 1) == WORKFLOW
+	assert store.document('search', 2) == {**WORKFLOW, 'description': 'Edited'}
+	assert store.document('search', 3) == store.document('search')
+	assert store.document('search', 4) is None
+	assert [entry.version for entry in store.history('search')] == [3, 2, 1]
+	assert store.history('search')[-1].source == 'import'
+
+
+def test_patch_file_writes_the_file_on_flush(store, workflow_file):
+	store.patch_file('search', workflow_file, [{'op': 'replace', 'path': '/steps/1/cssSelector', 'value': '#a'}])
+	store.patch_file('search', workflow_file, [{'op': 'replace', 'path': '/steps/1/cssSelector', 'value': '#b'}])
+
+	# Edits stay in the store until the file is flushed, and the file is not imported over them
+	assert store.has_pending_file('search')
+	assert json.loads(workflow_file.read_text(encoding='utf-8')) == WORKFLOW
+	assert store.sync_file('search', workflow_file) == 3
+
+	assert store.flush_files() == ['search']
+	assert not store.has_pending_file('search')
+	assert json.loads(workflow_file.read_text(encoding='utf-8'))['steps'][1]['cssSelector'] == '#b'
+	# The file written by the store is not imported again as a new version
+	assert store.sync_file('search', workflow_file) == 3
+
+
+def test_external_file_edit_becomes_a_version(store, workflow_file):
+	store.sync_file('search', workflow_file)
+	workflow_file.write_text(json.dumps({**WORKFLOW, 'description': 'Edited by hand'}), encoding='utf-8')
+
+	assert store.sync_file('search', workflow_file) == 2
+	assert store.document('search')['description'] == 'Edited by hand'
@@ -1,7 +1,9 @@
-from typing import Any, Dict, List, Optional
+from typing import Any, Dict, List, Literal, Optional
 
 from pydantic import BaseModel
 
+from workflow_use.workflow.views import CatalogEntry
+
 
 # Task Models
 class TaskInfo(BaseModel):
@@ -9,6 +11,29 @@ class TaskInfo(BaseModel):
 	workflow: str
 	result: Optional[List[Dict[str, Any]]] = None
 	error: Optional[str] = None
+	inputs: Optional[Dict[str, Any]] = None
+	priority: str = 'interactive'
+	# Unix timestamps
+	created_at: Optional[float] = None
+	started_at: Optional[float] = None
+	finished_at: Optional[float] = None
+
+
+class RunRecord(TaskInfo):
+	task_id: str
+
+
+class TaskLogEntry(BaseModel):
+	seq: int
+	timestamp: float
+	task_id: str
+	# 'log' for log lines, 'step' for completed steps, 'status' for status changes
+	type: Literal['log', 'step', 'status']
+	message: str
+	level: str = 'INFO'
+	step_index: Optional[int] = None
+	status: Optional[str] = None
+	data: Optional[Dict[str, Any]] = None
 
 
 # Request Models
@@ -16,34 +41,77 @@ class WorkflowUpdateRequest(BaseModel):
 	filename: str
 	nodeId: int
 	stepData: Dict[str, Any]
+	# Only apply the change if the workflow is still at this version
+	expected_version: Optional[int] = None
 
 
 class WorkflowMetadataUpdateRequest(BaseModel):
 	name: str
 	metadata: Dict[str, Any]
+	expected_version: Optional[int] = None
+
+
+class WorkflowBatchRequest(BaseModel):
+	name: str
+	# One set of workflow inputs per item
+	inputs: List[Dict[str, Any]]
+	# Items of this batch running (or queued) at the same time; defaults to the number of browser contexts
+	concurrency: Optional[int] = None
+	priority: Literal['interactive', 'batch'] = 'batch'
+
+
+class WorkflowPatchRequest(BaseModel):
+	# JSON patch (RFC 6902) operations on the workflow document, applied all or nothing
+	operations: List[Dict[str, Any]]
+	expected_version: Optional[int] = None
 
 
 class WorkflowExecuteRequest(BaseModel):
 	name: str
 	inputs: Dict[str, Any]
+	# Task id of an earlier, failed run to continue from its last checkpoint
+	resume_from: Optional[str] = None
+	# Interactive runs are started before queued batch runs
+	priority: Literal['interactive', 'batch'] = 'interactive'
 
 
 # Response Models
 class WorkflowResponse(BaseModel):
 	success: bool
 	error: Optional[str] = None
+	# Version of the workflow after the change
+	version: Optional[int] = None
+
+
+class WorkflowHistoryEntry(BaseModel):
+	version: int
+	# 'import' when the workflow file was (re)read, 'edit' for changes made through the API
+	source: str
+	operations: List[Dict[str, Any]]
+	created_at: float
+
+
+class WorkflowHistoryResponse(BaseModel):
+	name: str
+	version: int
+	history: List[WorkflowHistoryEntry]
 
 
 class WorkflowListResponse(BaseModel):
 	workflows: List[str]
 
 
+class WorkflowCatalogResponse(BaseModel):
+	workflows: List[CatalogEntry]
+
+
 class WorkflowExecuteResponse(BaseModel):
 	success: bool
 	task_id: str
 	workflow: str
 	log_position: int
 	message: str
+	queue_position: Optional[int] = None
 
 
 class WorkflowLogsResponse(BaseModel):
@@ -61,6 +129,38 @@ class WorkflowStatusResponse(BaseModel):
 	workflow: str
 	result: Optional[List[Dict[str, Any]]] = None
 	error: Optional[str] = None
+	# 1-based position while the task waits for a free browser
+	queue_position: Optional[int] = None
+
+
+class BatchItemResult(BaseModel):
+	type: Literal['item'] = 'item'
+	index: int
+	# None for items that were cancelled before they were started
+	task_id: Optional[str] = None
+	status: str
+	result: Optional[List[Dict[str, Any]]] = None
+	error: Optional[str] = None
+
+
+class BatchStatusResponse(BaseModel):
+	type: Literal['batch'] = 'batch'
+	batch_id: str
+	workflow: str
+	# 'running', 'completed' (every item finished, successfully or not) or 'cancelled'
+	status: str
+	total: int
+	concurrency: int
+	# Finished items per status
+	counts: Dict[str, int]
+	created_at: float
+	finished_at: Optional[float] = None
+
+
+class RunListResponse(BaseModel):
+	runs: List[RunRecord]
+	# Pass as ``cursor`` to get the next page; None on the last page
+	next_cursor: Optional[str] = None
 
 
 class WorkflowCancelResponse(BaseModel):
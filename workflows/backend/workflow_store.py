@@ -0,0 +1,502 @@
+import copy
+import hashlib
+import json
+import os
+import sqlite3
+import tempfile
+import threading
+import time
+from pathlib import Path
+from typing import Any, Dict, List, Optional, Set
+
+from pydantic import TypeAdapter, ValidationError
+
+from workflow_use.schema.views import WorkflowDefinitionSchema, WorkflowStep
+
+from .views import WorkflowHistoryEntry
+
+DEFAULT_WORKFLOW_STORE_PATH = Path('./tmp') / 'store' / 'workflows.db'
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS workflows (
+	name TEXT PRIMARY KEY,
+	version INTEGER NOT NULL,
+	-- Everything but the steps; "steps" is kept as a null placeholder to preserve the key order
+	metadata TEXT NOT NULL,
+	step_count INTEGER NOT NULL,
+	-- The workflow file as last imported or exported, to notice edits made outside the store
+	source_hash TEXT,
+	source_mtime_ns INTEGER,
+	source_size INTEGER,
+	updated_at REAL NOT NULL
+);
+CREATE TABLE IF NOT EXISTS workflow_steps (
+	workflow TEXT NOT NULL,
+	position INTEGER NOT NULL,
+	data TEXT NOT NULL,
+	PRIMARY KEY (workflow, position)
+);
+CREATE TABLE IF NOT EXISTS workflow_history (
+	workflow TEXT NOT NULL,
+	version INTEGER NOT NULL,
+	source TEXT NOT NULL,
+	operations TEXT NOT NULL,
+	created_at REAL NOT NULL,
+	PRIMARY KEY (workflow, version)
+);
+"""
+
+_step_adapter: TypeAdapter = TypeAdapter(WorkflowStep)
+
+
+class VersionConflictError(Exception):
+	"""Raised when a write expects another version of the workflow than the stored one."""
+
+	def __init__(self, name: str, expected: int, current: int) -> None:
+		super().__init__(f'Workflow {name} is at version {current}, not {expected}')
+		self.expected = expected
+		self.current = current
+
+
+class PatchError(ValueError):
+	"""Raised for a JSON patch that cannot be applied, or that would make the workflow invalid."""
+
+
+# --- JSON patch (RFC 6902) ---
+def _pointer(path: Any) -> List[str]:
+	if path == '':
+		return []
+	if not isinstance(path, str) or not path.startswith('/'):
+		raise PatchError(f'Invalid JSON pointer {path!r}')
+	return [token.replace('~1', '/').replace('~0', '~') for token in path[1:].split('/')]
+
+
+def _list_index(container: list, token: str, *, append: bool = False) -> int:
+	if append and token == '-':
+		return len(container)
+	if not token.isdigit() or (len(token) > 1 and token.startswith('0')):
+		raise PatchError(f'Invalid list index {token!r}')
+	index = int(token)
+	if index > len(container) or (index == len(container) and not append):
+		raise PatchError(f'List index {index} is out of range')
+	return index
+
+
+def _parent(document: Any, tokens: List[str]) -> Any:
+	for token in tokens[:-1]:
+		if isinstance(document, list):
+			document = document[_list_index(document, token)]
+		elif isinstance(document, dict) and token in document:
+			document = document[token]
+		else:
+			raise PatchError(f'Path /{"/".join(tokens)} does not exist')
+	return document
+
+
+def _get(document: Any, tokens: List[str]) -> Any:
+	if not tokens:
+		return document
+	parent = _parent(document, tokens)
+	if isinstance(parent, list):
+		return parent[_list_index(parent, tokens[-1])]
+	if isinstance(parent, dict) and tokens[-1] in parent:
+		return parent[tokens[-1]]
+	raise PatchError(f'Path /{"/".join(tokens)} does not exist')
+
+
+def _add(document: Any, tokens: List[str], value: Any) -> Any:
+	if not tokens:
+		return value
+	parent = _parent(document, tokens)
+	if isinstance(parent, list):
+		parent.insert(_list_index(parent, tokens[-1], append=True), value)
+	elif isinstance(parent, dict):
+		parent[tokens[-1]] = value
+	else:
+		raise PatchError(f'Cannot add to /{"/".join(tokens[:-1])}')
+	return document
+
+
+def _remove(document: Any, tokens: List[str]) -> Any:
+	if not tokens:
+		raise PatchError('Cannot remove the whole document')
+	parent = _parent(document, tokens)
+	if isinstance(parent, list):
+		return parent.pop(_list_index(parent, tokens[-1]))
+	if isinstance(parent, dict) and tokens[-1] in parent:
+		return parent.pop(tokens[-1])
+	raise PatchError(f'Path /{"/".join(tokens)} does not exist')
+
+
+def apply_patch(document: Any, operations: List[Dict[str, Any]]) -> Any:
+	"""Apply JSON patch *operations* to a copy of *document* and return it."""
+	document = copy.deepcopy(document)
+	for operation in operations:
+		op = operation.get('op')
+		tokens = _pointer(operation.get('path'))
+		if op in ('add', 'replace', 'test') and 'value' not in operation:
+			raise PatchError(f'"{op}" operation without a value')
+
+		if op == 'add':
+			document = _add(document, tokens, copy.deepcopy(operation['value']))
+		elif op == 'remove':
+			_remove(document, tokens)
+		elif op == 'replace':
+			if tokens:
+				_remove(document, tokens)
+			document = _add(document, tokens, copy.deepcopy(operation['value']))
+		elif op in ('move', 'copy'):
+			source = _pointer(operation.get('from'))
+			if op == 'move' and tokens[: len(source)] == source and tokens != source:
+				raise PatchError('Cannot move a value into one of its children')
+			value = _remove(document, source) if op == 'move' else copy.deepcopy(_get(document, source))
+			document = _add(document, tokens, value)
+		elif op == 'test':
+			if _get(document, tokens) != operation['value']:
+				raise PatchError(f'Test of {operation["path"]} failed')
+		else:
+			raise PatchError(f'Unknown patch operation {op!r}')
+	return document
+
+
+def _rebased(operation: Dict[str, Any], depth: int) -> Dict[str, Any]:
+	"""*operation* with its paths made relative to the value *depth* tokens down."""
+	rebased = dict(operation)
+	for key in ('path', 'from'):
+		if key in operation:
+			tokens = _pointer(operation[key])[depth:]
+			rebased[key] = ''.join('/' + token.replace('~', '~0').replace('/', '~1') for token in tokens)
+	return rebased
+
+
+class WorkflowStore:
+	"""Transactional, versioned storage of workflow definitions with one row per step.
+
+	Edits are JSON patches applied in a single SQLite transaction: a patch touching one field of
+	one step reads and writes that step's row only. Every edit bumps the workflow's version, can
+	be made conditional on the version the client last saw, and is kept in the history.
+
+	The workflow files stay the format every other tool reads: a file is imported when it changed
+	since the store last wrote it. Edits only touch the database; the file is written back later,
+	once for any number of edits (see :py:meth:`patch_file` and :py:meth:`flush_files`).
+	"""
+
+	def __init__(self, path: str | Path = DEFAULT_WORKFLOW_STORE_PATH) -> None:
+		self.path = Path(path)
+		self.path.parent.mkdir(parents=True, exist_ok=True)
+
+		self._lock = threading.RLock()
+		self._conn = sqlite3.connect(self.path, check_same_thread=False, isolation_level=None)
+		self._conn.execute('PRAGMA journal_mode=WAL')
+		self._conn.execute('PRAGMA synchronous=NORMAL')
+		self._conn.executescript(_SCHEMA)
+		# Workflows edited since their file was last written -> that file
+		self._pending_files: Dict[str, Path] = {}
+
+	def close(self) -> None:
+		with self._lock:
+			self._conn.close()
+
+	# --- Reads ---
+	def version(self, name: str) -> Optional[int]:
+		with self._lock:
+			row = self._conn.execute('SELECT version FROM workflows WHERE name = ?', (name,)).fetchone()
+		return row[0] if row else None
+
+	def _document(self, name: str) -> Optional[Dict[str, Any]]:
+		row = self._conn.execute('SELECT metadata FROM workflows WHERE name = ?', (name,)).fetchone()
+		if row is None:
+			return None
+		document = json.loads(row[0])
+		steps = self._conn.execute('SELECT data FROM workflow_steps WHERE workflow = ? ORDER BY position', (name,)).fetchall()
+		document['steps'] = [json.loads(data) for (data,) in steps]
+		return document
+
+	def document(self, name: str, version: Optional[int] = None) -> Optional[Dict[str, Any]]:
+		"""The workflow as stored now, or as it was at *version* (replayed from the history)."""
+		with self._lock:
+			if version is None:
+				return self._document(name)
+			current = self.version(name)
+			if current is None or not 1 <= version <= current:
+				return None
+			rows = self._conn.execute(
+				'SELECT operations FROM workflow_history WHERE workflow = ? AND version <= ? ORDER BY version',
+				(name, version),
+			).fetchall()
+		document: Any = None
+		for (operations,) in rows:
+			document = apply_patch(document, json.loads(operations))
+		return document
+
+	def history(self, name: str, limit: int = 50) -> List[WorkflowHistoryEntry]:
+		"""The most recent changes of *name*, newest first."""
+		with self._lock:
+			rows = self._conn.execute(
+				'SELECT version, source, operations, created_at FROM workflow_history '
+				'WHERE workflow = ? ORDER BY version DESC LIMIT ?',
+				(name, limit),
+			).fetchall()
+		return [
+			WorkflowHistoryEntry(version=version, source=source, operations=json.loads(operations), created_at=created_at)
+			for version, source, operations, created_at in rows
+		]
+
+	# --- Writes ---
+	def _write_document(self, name: str, document: Any) -> None:
+		steps = document.get('steps') if isinstance(document, dict) else None
+		if not isinstance(steps, list):
+			raise PatchError('A workflow needs a list of steps')
+		metadata = {**document, 'steps': None}
+		self._conn.execute('DELETE FROM workflow_steps WHERE workflow = ?', (name,))
+		self._conn.executemany(
+			'INSERT INTO workflow_steps (workflow, position, data) VALUES (?, ?, ?)',
+			[(name, position, json.dumps(step)) for position, step in enumerate(steps)],
+		)
+		self._conn.execute(
+			'UPDATE workflows SET metadata = ?, step_count = ? WHERE name = ?', (json.dumps(metadata), len(steps), name)
+		)
+
+	def _shift_steps(self, name: str, start: int, delta: int) -> None:
+		# Two passes through negative positions, so no intermediate state violates the primary key
+		self._conn.execute(
+			'UPDATE workflow_steps SET position = -(position + ?) - 1 WHERE workflow = ? AND position >= ?',
+			(delta, name, start),
+		)
+		self._conn.execute('UPDATE workflow_steps SET position = -position - 1 WHERE workflow = ? AND position < 0', (name,))
+
+	def _step(self, name: str, position: int) -> Any:
+		row = self._conn.execute(
+			'SELECT data FROM workflow_steps WHERE workflow = ? AND position = ?', (name, position)
+		).fetchone()
+		if row is None:
+			raise PatchError(f'Step {position} does not exist')
+		return json.loads(row[0])
+
+	def _put_step(self, name: str, position: int, step: Any) -> None:
+		self._conn.execute(
+			'INSERT OR REPLACE INTO workflow_steps (workflow, position, data) VALUES (?, ?, ?)',
+			(name, position, json.dumps(step)),
+		)
+
+	def _apply_operation(self, name: str, operation: Dict[str, Any], touched: Set[Any]) -> None:
+		"""Apply one patch operation to the rows it touches; *touched* collects them for validation.
+
+		*touched* holds the positions of changed steps, 'metadata' and/or 'document'.
+		"""
+		tokens = _pointer(operation.get('path'))
+		source = _pointer(operation.get('from')) if operation.get('op') in ('move', 'copy') else None
+		step_count, metadata = self._conn.execute('SELECT step_count, metadata FROM workflows WHERE name = ?', (name,)).fetchone()
+
+		def step_position(token: str, *, append: bool = False) -> int:
+			return _list_index([None] * step_count, token, append=append)
+
+		def shift_touched(start: int, delta: int) -> None:
+			shifted = {item + delta for item in touched if isinstance(item, int) and item >= start}
+			touched.difference_update({item for item in touched if isinstance(item, int) and item >= start})
+			touched.update(shifted)
+
+		# Inside a single step
+		if len(tokens) >= 3 and tokens[0] == 'steps' and (source is None or source[:2] == tokens[:2]):
+			position = step_position(tokens[1])
+			self._put_step(name, position, apply_patch(self._step(name, position), [_rebased(operation, 2)]))
+			touched.add(position)
+		# Top-level fields other than the steps
+		elif tokens and tokens[0] != 'steps' and (source is None or (source and source[0] != 'steps')):
+			document = apply_patch(json.loads(metadata), [operation])
+			if not isinstance(document, dict) or document.get('steps', None) is not None:
+				raise PatchError('Steps can only be changed through /steps')
+			self._conn.execute('UPDATE workflows SET metadata = ? WHERE name = ?', (json.dumps(document), name))
+			touched.add('metadata')
+		# Whole steps
+		elif len(tokens) == 2 and tokens[0] == 'steps' and source is None:
+			op = operation.get('op')
+			if op == 'test':
+				apply_patch({'step': self._step(name, step_position(tokens[1]))}, [{**operation, 'path': '/step'}])
+			elif op == 'add':
+				position = step_position(tokens[1], append=True)
+				self._shift_steps(name, position, 1)
+				self._put_step(name, position, operation.get('value'))
+				self._conn.execute('UPDATE workflows SET step_count = step_count + 1 WHERE name = ?', (name,))
+				shift_touched(position, 1)
+				touched.add(position)
+			elif op == 'remove':
+				position = step_position(tokens[1])
+				self._conn.execute('DELETE FROM workflow_steps WHERE workflow = ? AND position = ?', (name, position))
+				self._shift_steps(name, position + 1, -1)
+				self._conn.execute('UPDATE workflows SET step_count = step_count - 1 WHERE name = ?', (name,))
+				touched.discard(position)
+				shift_touched(position + 1, -1)
+			elif op == 'replace':
+				position = step_position(tokens[1])
+				apply_patch(None, [{**operation, 'path': ''}])  # checks the operation is complete
+				self._put_step(name, position, operation['value'])
+				touched.add(position)
+			else:
+				raise PatchError(f'Unknown patch operation {op!r}')
+		# Anything spanning several parts of the workflow: rewrite it as a whole
+		else:
+			self._write_document(name, apply_patch(self._document(name), [operation]))
+			touched.add('document')
+
+	def _validate(self, name: str, touched: Set[Any]) -> None:
+		try:
+			if 'document' in touched:
+				WorkflowDefinitionSchema.model_validate(self._document(name))
+				return
+			if 'metadata' in touched:
+				metadata = json.loads(self._conn.execute('SELECT metadata FROM workflows WHERE name = ?', (name,)).fetchone()[0])
+				for field_name, field in WorkflowDefinitionSchema.model_fields.items():
+					if field_name == 'steps':
+						continue
+					if field_name in metadata:
+						TypeAdapter(field.annotation).validate_python(metadata[field_name])
+					elif field.is_required():
+						raise PatchError(f'Workflow field {field_name!r} is required')
+			(step_count,) = self._conn.execute('SELECT step_count FROM workflows WHERE name = ?', (name,)).fetchone()
+			if step_count < 1:
+				raise PatchError('A workflow needs at least one step')
+			for position in sorted(item for item in touched if isinstance(item, int)):
+				_step_adapter.validate_python(self._step(name, position))
+		except ValidationError as e:
+			raise PatchError(f'The patch makes the workflow invalid: {e}') from e
+
+	def _commit_version(self, name: str, source: str, operations: List[Dict[str, Any]]) -> int:
+		now = time.time()
+		self._conn.execute('UPDATE workflows SET version = version + 1, updated_at = ? WHERE name = ?', (now, name))
+		(version,) = self._conn.execute('SELECT version FROM workflows WHERE name = ?', (name,)).fetchone()
+		self._conn.execute(
+			'INSERT INTO workflow_history (workflow, version, source, operations, created_at) VALUES (?, ?, ?, ?, ?)',
+			(name, version, source, json.dumps(operations), now),
+		)
+		return version
+
+	def patch(self, name: str, operations: List[Dict[str, Any]], expected_version: Optional[int] = None) -> int:
+		"""Apply JSON patch *operations* atomically and return the new version.
+
+		With *expected_version*, the patch only applies if nobody changed the workflow since
+		(raises VersionConflictError). Raises KeyError for unknown workflows and PatchError when
+		the patch fails or leaves an invalid workflow; nothing is changed in both cases.
+		"""
+		if not isinstance(operations, list) or not all(isinstance(operation, dict) for operation in operations):
+			raise PatchError('A JSON patch is a list of operations')
+		with self._lock:
+			self._conn.execute('BEGIN IMMEDIATE')
+			try:
+				row = self._conn.execute('SELECT version FROM workflows WHERE name = ?', (name,)).fetchone()
+				if row is None:
+					raise KeyError(f'Workflow {name} not found')
+				if expected_version is not None and row[0] != expected_version:
+					raise VersionConflictError(name, expected_version, row[0])
+				touched: Set[Any] = set()
+				for operation in operations:
+					self._apply_operation(name, operation, touched)
+				self._validate(name, touched)
+				version = self._commit_version(name, 'edit', operations)
+			except BaseException:
+				self._conn.execute('ROLLBACK')
+				raise
+			self._conn.execute('COMMIT')
+			return version
+
+	# --- Workflow files ---
+	def sync_file(self, name: str, path: Path) -> Optional[int]:
+		"""Import the workflow file at *path* if it changed since the store last read or wrote it.
+
+		Returns the current version, or None when neither the file nor a stored copy exists.
+		"""
+		with self._lock:
+			row = self._conn.execute(
+				'SELECT source_hash, source_mtime_ns, source_size, version FROM workflows WHERE name = ?', (name,)
+			).fetchone()
+			if row and name in self._pending_files:
+				# The stored edits are newer than the file, which is about to be overwritten with them
+				return row[3]
+			try:
+				stat = path.stat()
+			except FileNotFoundError:
+				return row[3] if row else None
+			if row and (row[1], row[2]) == (stat.st_mtime_ns, stat.st_size):
+				return row[3]
+
+			data = path.read_bytes()
+			content_hash = hashlib.sha256(data).hexdigest()
+			if row and row[0] == content_hash:
+				self._conn.execute(
+					'UPDATE workflows SET source_mtime_ns = ?, source_size = ? WHERE name = ?',
+					(stat.st_mtime_ns, stat.st_size, name),
+				)
+				return row[3]
+
+			try:
+				document = json.loads(data)
+			except ValueError as e:
+				raise PatchError(f'Workflow file {path} is not valid JSON: {e}') from e
+			self._conn.execute('BEGIN IMMEDIATE')
+			try:
+				self._conn.execute(
+					'INSERT OR IGNORE INTO workflows (name, version, metadata, step_count, updated_at) VALUES (?, 0, ?, 0, ?)',
+					(name, '{}', time.time()),
+				)
+				self._write_document(name, document)
+				self._conn.execute(
+					'UPDATE workflows SET source_hash = ?, source_mtime_ns = ?, source_size = ? WHERE name = ?',
+					(content_hash, stat.st_mtime_ns, stat.st_size, name),
+				)
+				version = self._commit_version(name, 'import', [{'op': 'replace', 'path': '', 'value': document}])
+			except BaseException:
+				self._conn.execute('ROLLBACK')
+				raise
+			self._conn.execute('COMMIT')
+			return version
+
+	def export_file(self, name: str, path: Path) -> None:
+		"""Atomically write the stored workflow to *path*."""
+		with self._lock:
+			document = self._document(name)
+			if document is None:
+				raise KeyError(f'Workflow {name} not found')
+			data = json.dumps(document, indent=2).encode('utf-8')
+			# Written next to the database, so a half-written file never shows up among the workflows
+			fd, tmp_path = tempfile.mkstemp(dir=self.path.parent, suffix='.json.tmp')
+			with os.fdopen(fd, 'wb') as tmp_file:
+				tmp_file.write(data)
+			os.replace(tmp_path, path)
+			stat = path.stat()
+			self._conn.execute(
+				'UPDATE workflows SET source_hash = ?, source_mtime_ns = ?, source_size = ? WHERE name = ?',
+				(hashlib.sha256(data).hexdigest(), stat.st_mtime_ns, stat.st_size, name),
+			)
+
+	def patch_file(self, name: str, path: Path, operations: List[Dict[str, Any]], expected_version: Optional[int] = None) -> int:
+		"""Patch the workflow stored in the file at *path*; the file is written by the next :py:meth:`flush_files`.
+
+		External edits of the file are imported first, so they become a version of their own.
+		"""
+		with self._lock:
+			if self.sync_file(name, path) is None:
+				raise KeyError(f'Workflow {name} not found')
+			version = self.patch(name, operations, expected_version)
+			self._pending_files[name] = path
+			return version
+
+	def has_pending_file(self, name: str) -> bool:
+		"""Whether *name* was edited since its file was last written."""
+		# A plain dict lookup, safe without the lock; callers on the event loop must not wait for it
+		return name in self._pending_files
+
+	def flush_files(self, names: Optional[List[str]] = None) -> List[str]:
+		"""Write the files of the edited workflows (all of them, or those in *names*); returns the names written."""
+		with self._lock:
+			written = []
+			for name in list(self._pending_files) if names is None else names:
+				path = self._pending_files.pop(name, None)
+				if path is None:
+					continue
+				try:
+					self.export_file(name, path)
+				except BaseException:
+					self._pending_files.setdefault(name, path)
+					raise
+				written.append(name)
+			return written
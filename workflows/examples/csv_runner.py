@@ -1,33 +1,77 @@
 import asyncio
 import csv
+import hashlib
+import json
+import multiprocessing
+import queue
+import re
 import sys
+import threading
+import time
+from collections import Counter
 from pathlib import Path
-from typing import Dict, List
+from typing import AsyncIterable, AsyncIterator, Callable, Dict, Iterable, Iterator, List, Optional, Set, Tuple, Union
 import argparse
 import logging
-from datetime import datetime
 
+from browser_use.agent.views import AgentHistoryList
+
+from workflow_use.browser.service import BrowserPool
+from workflow_use.controller.extraction_cache import DEFAULT_EXTRACTION_CACHE_PATH, ExtractionCache
+from workflow_use.controller.service import WorkflowController
+from workflow_use.schema.views import RateLimit
+from workflow_use.workflow.checkpoint import CheckpointStore
+from workflow_use.workflow.rate_limit import OriginRateLimiter
+from workflow_use.workflow.repair import RepairStore
 from workflow_use.workflow.service import Workflow
-from browser_use import Browser
 
 
 logging.basicConfig(
     level=logging.INFO,
-    format='%(asctime)s - %(levelname)s - %(message)s'
+    format='%(asctime)s - %(processName)s - %(levelname)s - %(message)s'
 )
 logger = logging.getLogger(__name__)
 
 
-async def run_workflow_for_row(workflow: Workflow, row_data: Dict[str, str], row_index: int) -> Dict:
+def row_run_id(csv_path: str, workflow_path: str, row_index: int, row_data: Dict[str, str]) -> str:
+    """Stable checkpoint id of a row, so a restarted runner finds the row's checkpoint again.
+
+    The id covers the CSV's full path and the row's inputs: a row that was edited or moved, or
+    a same-named CSV elsewhere, never resumes from a checkpoint of other inputs.
+    """
+    source = hashlib.sha256(str(Path(csv_path).resolve()).encode('utf-8')).hexdigest()[:12]
+    name = f"{Path(csv_path).stem}-{source}-{Path(workflow_path).stem}-row{row_index}-{row_hash(row_data)[:16]}"
+    return re.sub(r'[^A-Za-z0-9_.-]', '_', name)
+
+
+async def run_workflow_for_row(workflow: Workflow, row_data: Dict[str, str], row_index: int, run_id: str) -> Dict:
     """Run workflow for a single CSV row"""
     try:
-        logger.info(f"Processing row {row_index + 1}: {row_data}")
+        # A row that crashed mid-way continues after its last completed step
+        resume_from = run_id if workflow.checkpoint_store and await workflow.checkpoint_store.aload(run_id) else None
+        if resume_from:
+            logger.info(f"Resuming row {row_index + 1} from its checkpoint")
+        else:
+            logger.info(f"Processing row {row_index + 1}: {row_data}")
         
-        # Run the workflow with the row data as inputs
-        result = await workflow.run(
+        # Run the workflow with the row data as inputs, keeping only the extracted text of each step
+        result = []
+        rate_limit_wait_ms = 0.0
+        async for event in workflow.run_iter(
             inputs=row_data,
             close_browser_at_end=True,
-        )
+            run_id=run_id,
+            resume_from=resume_from,
+        ):
+            rate_limit_wait_ms += event.rate_limit_wait_ms or 0.0
+            if event.type == 'step_completed':
+                step_result = event.result
+                if isinstance(step_result, AgentHistoryList):
+                    result.append(step_result.final_result())
+                else:
+                    result.append(step_result.extracted_content)
+        if rate_limit_wait_ms:
+            logger.info(f"Row {row_index + 1} waited {rate_limit_wait_ms / 1000:.1f}s for rate limits")
 
         return {
             'row_index': row_index,
@@ -45,88 +89,386 @@ async def run_workflow_for_row(workflow: Workflow, row_data: Dict[str, str], row
         }
 
 
-async def process_csv(csv_path: str, workflow_path: str, batch_size: int = 1, headless: bool = False) -> List[Dict]:
-    """Process CSV file and run workflow for each row"""
+def row_hash(row_data: Dict[str, str]) -> str:
+    """Hash of a row's inputs; results are matched to rows by it when resuming"""
+    return hashlib.sha256(json.dumps(row_data, sort_keys=True).encode('utf-8')).hexdigest()
+
+
+def iter_rows(csv_path: str) -> Iterator[Tuple[int, Dict[str, str]]]:
+    """Yield (row_index, row) pairs, reading the file lazily"""
+    with open(csv_path, 'r', newline='', encoding='utf-8') as csvfile:
+        yield from enumerate(csv.DictReader(csvfile))
+
+
+def csv_columns(csv_path: str) -> List[str]:
+    with open(csv_path, 'r', newline='', encoding='utf-8') as csvfile:
+        return csv.DictReader(csvfile).fieldnames or []
+
+
+class ResultWriter:
+    """Appends each row's result to the output CSV as soon as it is known.
+
+    Rows recorded as successful by an earlier (interrupted) run are reported by
+    successful_rows(), so a restart only processes the rest.
+    """
+
+    def __init__(self, output_file: str, input_columns: List[str]):
+        self.output_file = Path(output_file)
+        self.fieldnames = ['row_index', 'row_hash', 'status'] + [f'input_{c}' for c in input_columns] + ['error', 'result']
+        self.counts: Counter = Counter()
+
+        exists = self.output_file.exists() and self.output_file.stat().st_size > 0
+        if exists:
+            with open(self.output_file, 'r', newline='', encoding='utf-8') as f:
+                header = next(csv.reader(f), [])
+            if header != self.fieldnames:
+                raise ValueError(f"{self.output_file} was written for other input columns, choose another --output")
+
+        self._file = open(self.output_file, 'a', newline='', encoding='utf-8')
+        self._writer = csv.DictWriter(self._file, fieldnames=self.fieldnames)
+        if not exists:
+            self._writer.writeheader()
+            self._file.flush()
+
+    def successful_rows(self) -> Counter:
+        """Number of successful results per row hash already in the output"""
+        done: Counter = Counter()
+        with open(self.output_file, 'r', newline='', encoding='utf-8') as f:
+            for row in csv.DictReader(f):
+                if row['status'] == 'success':
+                    done[row['row_hash']] += 1
+        return done
+
+    def write(self, result: Dict):
+        row = {
+            'row_index': result['row_index'],
+            'row_hash': row_hash(result['data']),
+            'status': result['status'],
+            'error': result.get('error'),
+            'result': json.dumps(result['result'], ensure_ascii=False, default=str) if 'result' in result else None,
+        }
+        for k, v in result['data'].items():
+            row[f'input_{k}'] = v
+        self._writer.writerow(row)
+        # Flushed per row, so a crash loses at most the rows still running
+        self._file.flush()
+        self.counts[result['status']] += 1
+
+    def close(self):
+        self._file.close()
+
+
+async def _rows_async(rows: Union[Iterable, AsyncIterable]) -> AsyncIterator:
+    if isinstance(rows, AsyncIterable):
+        async for item in rows:
+            yield item
+    else:
+        for item in rows:
+            yield item
+
+
+async def run_rows(
+    workflow: Workflow,
+    rows: Union[Iterable[Tuple[int, Dict[str, str]]], AsyncIterable[Tuple[int, Dict[str, str]]]],
+    run_id_for: Callable[[int, Dict[str, str]], str],
+    on_result: Callable[[Dict], None],
+    concurrency: int = 1,
+    delay: float = 0.0,
+    skip: Optional[Counter] = None,
+) -> int:
+    """Run the workflow for every row, keeping up to *concurrency* rows in flight.
+
+    A new row starts as soon as any running row finishes (no batch barrier), and *on_result*
+    gets each result as it completes. Rows whose hash is in *skip* are skipped (once per
+    count). Returns the number of skipped rows.
+    """
+    skip = skip if skip is not None else Counter()
+    window = asyncio.Semaphore(concurrency)
+    running: Set[asyncio.Task] = set()
+    skipped = 0
+
+    async def run_row(row_index: int, row: Dict[str, str]):
+        try:
+            on_result(await run_workflow_for_row(workflow, row, row_index, run_id_for(row_index, row)))
+        finally:
+            window.release()
+
+    try:
+        async for row_index, row in _rows_async(rows):
+            key = row_hash(row)
+            if skip[key] > 0:
+                skip[key] -= 1
+                skipped += 1
+                continue
+
+            await window.acquire()
+            task = asyncio.create_task(run_row(row_index, row))
+            running.add(task)
+            task.add_done_callback(running.discard)
+            if delay:
+                # Optional pause between row starts, e.g. to follow the runs in the VNC viewer
+                await asyncio.sleep(delay)
+
+        await asyncio.gather(*running)
+    finally:
+        for task in running:
+            task.cancel()
+        await asyncio.gather(*running, return_exceptions=True)
+    return skipped
+
+
+async def process_csv(
+    csv_path: str,
+    workflow_path: str,
+    output_file: str,
+    batch_size: int = 1,
+    headless: bool = False,
+    delay: float = 0.0,
+    rate_limit: Optional[RateLimit] = None,
+    extraction_cache: bool = False,
+    capture_storage_state: bool = False,
+) -> Counter:
+    """Process CSV file and run workflow for each row, appending results to output_file.
+
+    Returns the number of rows per status, including 'skipped' rows that already succeeded in an earlier run.
+    With a *rate_limit*, the rows' navigations and page interactions share it per origin.
+    With *extraction_cache*, page extractions are cached on disk across rows and runs.
+    With *capture_storage_state*, checkpoints include cookies and localStorage, so a resumed row stays logged in.
+    """
     
-    # Create browser with headless mode setting
-    browser = Browser(headless=headless)
+    # Warm browser processes shared by all rows; each row leases an isolated context
+    browser_pool = BrowserPool(size=batch_size, headless=headless)
+    cache = ExtractionCache() if extraction_cache else None
     
-    # Load the workflow with the browser
-    workflow = Workflow.load_from_file(workflow_path, browser=browser)
+    # Load the workflow with the browser pool; checkpoints let rows resume after a crash
+    workflow = Workflow.load_from_file(
+        workflow_path,
+        controller=WorkflowController(extraction_cache=cache),
+        browser_pool=browser_pool,
+        checkpoint_store=CheckpointStore(capture_storage_state=capture_storage_state),
+        repair_store=RepairStore(),
+        rate_limiter=OriginRateLimiter(default=rate_limit) if rate_limit else None,
+    )
     logger.info(f"Loaded workflow: {workflow.name}")
     logger.info(f"Browser mode: {'Headless' if headless else 'Visual (check http://localhost:6080/vnc.html)'}")
     
-    # Read CSV file
-    results = []
-    with open(csv_path, 'r', encoding='utf-8') as csvfile:
-        reader = csv.DictReader(csvfile)
-        rows = list(reader)
-        total_rows = len(rows)
-        
-        logger.info(f"Found {total_rows} rows in CSV file")
-        
-        # Process rows in batches
-        for i in range(0, total_rows, batch_size):
-            batch = rows[i:i + batch_size]
-            batch_tasks = []
-            
-            for j, row in enumerate(batch):
-                row_index = i + j
-                task = run_workflow_for_row(workflow, row, row_index)
-                # 5秒待機
-                await asyncio.sleep(5)
-                batch_tasks.append(task)
-            
-            # Run batch concurrently
-            batch_results = await asyncio.gather(*batch_tasks)
-            results.extend(batch_results)
-            
-            # Progress update
-            processed = min(i + batch_size, total_rows)
-            logger.info(f"Progress: {processed}/{total_rows} rows processed ({processed/total_rows*100:.1f}%)")
-    
-    return results
+    writer = ResultWriter(output_file, csv_columns(csv_path))
+    done = writer.successful_rows()
+    if done:
+        logger.info(f"Resuming: {sum(done.values())} rows already succeeded according to {output_file}")
 
+    def on_result(result: Dict):
+        writer.write(result)
+        processed = sum(writer.counts.values())
+        logger.info(f"Progress: {processed} rows processed ({writer.counts['success']} successful, {writer.counts['error']} errors)")
 
-def save_results(results: List[Dict], output_path: str):
-    """Save processing results to a file"""
-    timestamp = datetime.now().strftime('%Y%m%d_%H%M%S')
-    output_file = f"{output_path}_{timestamp}.csv"
-    
-    with open(output_file, 'w', newline='', encoding='utf-8') as csvfile:
-        if not results:
-            return
-            
-        # Create fieldnames from the first result
-        fieldnames = ['row_index', 'status']
-        if 'data' in results[0] and results[0]['data']:
-            fieldnames.extend([f'input_{k}' for k in results[0]['data'].keys()])
-        fieldnames.extend(['error', 'result'])
-        
-        writer = csv.DictWriter(csvfile, fieldnames=fieldnames)
-        writer.writeheader()
-        
-        for result in results:
-            row = {
-                'row_index': result['row_index'],
-                'status': result['status']
-            }
-            
-            # Add input data with prefix
-            if 'data' in result:
-                for k, v in result['data'].items():
-                    row[f'input_{k}'] = v
-            
-            # Add error or result
-            if 'error' in result:
-                row['error'] = result['error']
-            if 'result' in result:
-                row['result'] = str(result['result'])
-                
-            writer.writerow(row)
-    
+    try:
+        async with browser_pool:
+            skipped = await run_rows(
+                workflow,
+                iter_rows(csv_path),
+                lambda row_index, row: row_run_id(csv_path, workflow_path, row_index, row),
+                on_result,
+                concurrency=batch_size,
+                delay=delay,
+                skip=done,
+            )
+    finally:
+        writer.close()
+        if cache:
+            logger.info(f"Extraction cache: {cache.stats['hits']} hits, {cache.stats['misses']} misses")
+            cache.close()
+
+    counts = Counter(writer.counts)
+    counts['skipped'] = skipped
     logger.info(f"Results saved to: {output_file}")
-    return output_file
+    return counts
+
+
+# --- Multi-process mode ---
+# The coordinator (main process) reads the CSV and hands rows to worker processes through a
+# bounded queue; every worker runs its own event loop, browser and Workflow. Results come back
+# through a second queue and are written in input order.
+
+def _worker_main(
+    csv_path: str, workflow_path: str, tasks, results, concurrency: int, headless: bool, delay: float, rate_limit: Optional[RateLimit],
+    extraction_cache_path: Optional[Path], capture_storage_state: bool,
+):
+    try:
+        asyncio.run(_worker(
+            csv_path, workflow_path, tasks, results, concurrency, headless, delay, rate_limit, extraction_cache_path, capture_storage_state,
+        ))
+    except KeyboardInterrupt:
+        # Ctrl-C reaches the whole process group; the coordinator reports it
+        pass
+
+
+async def _worker(
+    csv_path: str, workflow_path: str, tasks, results, concurrency: int, headless: bool, delay: float, rate_limit: Optional[RateLimit],
+    extraction_cache_path: Optional[Path], capture_storage_state: bool,
+):
+    browser_pool = BrowserPool(size=1, contexts_per_process=concurrency, headless=headless)
+    cache = ExtractionCache(extraction_cache_path) if extraction_cache_path else None
+    workflow = Workflow.load_from_file(
+        workflow_path,
+        controller=WorkflowController(extraction_cache=cache),
+        browser_pool=browser_pool,
+        checkpoint_store=CheckpointStore(capture_storage_state=capture_storage_state),
+        repair_store=RepairStore(),
+        rate_limiter=OriginRateLimiter(default=rate_limit) if rate_limit else None,
+    )
+    sequence_numbers: Dict[int, int] = {}
+
+    async def rows():
+        while True:
+            try:
+                # Polled with a timeout, so a cancelled worker does not hang on an empty queue
+                item = await asyncio.to_thread(tasks.get, True, 0.5)
+            except queue.Empty:
+                continue
+            if item is None:
+                return
+            seq, row_index, row = item
+            sequence_numbers[row_index] = seq
+            yield row_index, row
+
+    def on_result(result: Dict):
+        results.put((sequence_numbers.pop(result['row_index']), result))
+
+    try:
+        async with browser_pool:
+            await run_rows(
+                workflow,
+                rows(),
+                lambda row_index, row: row_run_id(csv_path, workflow_path, row_index, row),
+                on_result,
+                concurrency=concurrency,
+                delay=delay,
+            )
+    finally:
+        if cache:
+            cache.close()
+
+
+async def process_csv_sharded(
+    csv_path: str,
+    workflow_path: str,
+    output_file: str,
+    processes: int,
+    batch_size: int = 1,
+    headless: bool = False,
+    delay: float = 0.0,
+    rate_limit: Optional[RateLimit] = None,
+    extraction_cache: bool = False,
+    capture_storage_state: bool = False,
+) -> Counter:
+    """Like process_csv, but runs rows in *processes* worker processes with *batch_size* rows in flight each.
+
+    Results are written in input order; rows finishing early wait in a reorder buffer, which is
+    bounded by only handing out rows while few enough results are outstanding.
+    A *rate_limit* is split evenly between the workers, as they cannot share one limiter.
+    With *extraction_cache*, every worker keeps its own cache file, so they never wait on each other's writes.
+    """
+    writer = ResultWriter(output_file, csv_columns(csv_path))
+    done = writer.successful_rows()
+    if done:
+        logger.info(f"Resuming: {sum(done.values())} rows already succeeded according to {output_file}")
+
+    worker_rate_limit = None
+    if rate_limit:
+        worker_rate_limit = RateLimit(
+            requests_per_second=rate_limit.requests_per_second / processes, burst=max(1, rate_limit.burst // processes)
+        )
+
+    ctx = multiprocessing.get_context('spawn')
+    window = processes * batch_size
+    tasks = ctx.Queue(maxsize=window)
+    results = ctx.Queue()
+    workers = [
+        ctx.Process(
+            target=_worker_main,
+            args=(
+                csv_path, workflow_path, tasks, results, batch_size, headless, delay, worker_rate_limit,
+                DEFAULT_EXTRACTION_CACHE_PATH.with_suffix(f'.worker-{i}.db') if extraction_cache else None, capture_storage_state,
+            ),
+            name=f'worker-{i}',
+        )
+        for i in range(processes)
+    ]
+    for worker in workers:
+        worker.start()
+
+    # Rows handed out but not written yet; bounds both the task queue and the reorder buffer
+    outstanding = threading.Semaphore(window * 4)
+    stop = threading.Event()
+    feeder_state = {'fed': 0, 'skipped': 0, 'finished': False, 'error': None}
+
+    def feed():
+        try:
+            for row_index, row in iter_rows(csv_path):
+                key = row_hash(row)
+                if done[key] > 0:
+                    done[key] -= 1
+                    feeder_state['skipped'] += 1
+                    continue
+                while not outstanding.acquire(timeout=0.5):
+                    if stop.is_set():
+                        return
+                tasks.put((feeder_state['fed'], row_index, row))
+                feeder_state['fed'] += 1
+        except Exception as e:
+            feeder_state['error'] = e
+        finally:
+            feeder_state['finished'] = True
+            if not stop.is_set():
+                for _ in workers:
+                    tasks.put(None)
+
+    feeder = threading.Thread(target=feed, name='feeder', daemon=True)
+    feeder.start()
+
+    pending: Dict[int, Dict] = {}
+    written = 0
+    started = time.monotonic()
+    try:
+        while not (feeder_state['finished'] and written == feeder_state['fed']):
+            try:
+                seq, result = await asyncio.to_thread(results.get, True, 1.0)
+            except queue.Empty:
+                dead = [w for w in workers if w.exitcode not in (None, 0)]
+                if dead:
+                    raise RuntimeError(f"{dead[0].name} exited with code {dead[0].exitcode}, rerun to resume")
+                if all(w.exitcode is not None for w in workers) and not (feeder_state['finished'] and written == feeder_state['fed']):
+                    raise RuntimeError("All workers exited before every row was processed, rerun to resume")
+                continue
+
+            pending[seq] = result
+            while written in pending:
+                writer.write(pending.pop(written))
+                written += 1
+                outstanding.release()
+
+            processed = sum(writer.counts.values())
+            rate = processed / max(time.monotonic() - started, 1e-9)
+            logger.info(
+                f"Progress: {processed} rows processed ({writer.counts['success']} successful, "
+                f"{writer.counts['error']} errors, {len(pending)} waiting for earlier rows, {rate:.2f} rows/s)"
+            )
+        if feeder_state['error']:
+            raise feeder_state['error']
+    finally:
+        stop.set()
+        writer.close()
+        for worker in workers:
+            worker.join(timeout=30)
+            if worker.is_alive():
+                worker.terminate()
+                worker.join()
+
+    counts = Counter(writer.counts)
+    counts['skipped'] = feeder_state['skipped']
+    logger.info(f"Results saved to: {output_file}")
+    return counts
 
 
 async def main():
@@ -134,8 +476,14 @@ async def main():
     parser.add_argument('csv_file', help='Path to the CSV file')
     parser.add_argument('workflow_file', help='Path to the workflow JSON file')
     parser.add_argument('--batch-size', type=int, default=1, help='Number of rows to process concurrently (default: 1)')
-    parser.add_argument('--output', default='results', help='Output file prefix for results (default: results)')
+    parser.add_argument('--output', default='results', help='Output file prefix for results; an existing file is resumed (default: results)')
     parser.add_argument('--headless', action='store_true', help='Run browser in headless mode (default: visual mode)')
+    parser.add_argument('--delay', type=float, default=0.0, help='Seconds to wait between row starts (default: 0)')
+    parser.add_argument('--processes', type=int, default=1, help='Worker processes, each with its own browser running --batch-size rows (default: 1, in-process)')
+    parser.add_argument('--rate-limit', type=float, default=None, help='Maximum navigations and page interactions per second and origin, across all rows (default: unlimited)')
+    parser.add_argument('--burst', type=int, default=1, help='Actions per origin that may run back to back before --rate-limit applies (default: 1)')
+    parser.add_argument('--extraction-cache', action='store_true', help='Cache page extraction results under ./tmp/cache, across rows and runs (default: off)')
+    parser.add_argument('--checkpoint-storage-state', action='store_true', help='Save cookies and localStorage in row checkpoints, so resumed rows stay logged in; they hold session tokens (default: off)')
     
     args = parser.parse_args()
     
@@ -158,20 +506,26 @@ async def main():
             logger.info("="*60 + "\n")
             await asyncio.sleep(3)  # Give user time to open VNC viewer
         
-        # Process the CSV
-        results = await process_csv(args.csv_file, args.workflow_file, args.batch_size, args.headless)
-        
-        # Save results
-        output_file = save_results(results, args.output)
+        # Process the CSV, results are appended to the output file as rows finish
+        output_file = f"{args.output}.csv"
+        rate_limit = RateLimit(requests_per_second=args.rate_limit, burst=args.burst) if args.rate_limit else None
+        if args.processes > 1:
+            counts = await process_csv_sharded(
+                args.csv_file, args.workflow_file, output_file, args.processes, args.batch_size, args.headless, args.delay, rate_limit,
+                args.extraction_cache, args.checkpoint_storage_state,
+            )
+        else:
+            counts = await process_csv(
+                args.csv_file, args.workflow_file, output_file, args.batch_size, args.headless, args.delay, rate_limit,
+                args.extraction_cache, args.checkpoint_storage_state,
+            )
         
         # Summary
-        success_count = sum(1 for r in results if r['status'] == 'success')
-        error_count = sum(1 for r in results if r['status'] == 'error')
-        
         logger.info(f"\nProcessing complete!")
-        logger.info(f"Total rows: {len(results)}")
-        logger.info(f"Successful: {success_count}")
-        logger.info(f"Errors: {error_count}")
+        logger.info(f"Total rows: {sum(counts.values())}")
+        logger.info(f"Successful: {counts['success']}")
+        logger.info(f"Errors: {counts['error']}")
+        logger.info(f"Skipped (already successful): {counts['skipped']}")
         
     except Exception as e:
         logger.error(f"Fatal error: {str(e)}")
@@ -179,4 +533,9 @@ async def main():
 
 
 if __name__ == '__main__':
-    asyncio.run(main())
\ No newline at end of file
+    try:
+        asyncio.run(main())
+    except KeyboardInterrupt:
+        # Finished rows are already in the output file
+        logger.info("Interrupted, run the same command again to resume")
+        sys.exit(130)
\ No newline at end of file
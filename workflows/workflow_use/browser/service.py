@@ -0,0 +1,294 @@
+from __future__ import annotations
+
+import asyncio
+import logging
+import os
+from contextlib import asynccontextmanager
+from typing import AsyncIterator, List, Optional
+
+import psutil
+from browser_use import Browser
+from browser_use.browser.profile import BrowserProfile
+from playwright.async_api import Browser as PlaywrightBrowser
+from playwright.async_api import BrowserContext as PlaywrightBrowserContext
+from playwright.async_api import Playwright, async_playwright
+
+logger = logging.getLogger(__name__)
+
+
+class BrowserPoolExhaustedError(Exception):
+	"""Raised when no browser lease becomes available within the acquire timeout."""
+
+
+class _PooledProcess:
+	"""Book-keeping for one warm browser process owned by the pool."""
+
+	def __init__(self, browser: PlaywrightBrowser, pid: Optional[int]) -> None:
+		self.browser = browser
+		self.pid = pid
+		self.active_leases = 0
+		self.leases_served = 0
+		self.draining = False
+
+	def memory_mb(self) -> float:
+		"""Resident memory of the browser process and all of its children, in MB."""
+		if not self.pid:
+			return 0.0
+		try:
+			proc = psutil.Process(self.pid)
+			total = proc.memory_info().rss
+			for child in proc.children(recursive=True):
+				try:
+					total += child.memory_info().rss
+				except psutil.Error:
+					continue
+			return total / (1024 * 1024)
+		except psutil.Error:
+			return 0.0
+
+
+class BrowserLease:
+	"""An isolated browser context leased from a :class:`BrowserPool`.
+
+	``browser`` is a regular browser-use ``Browser`` session bound to a fresh
+	playwright context, so it can be handed to a Workflow, controller or Agent
+	as-is. Call :py:meth:`release` (or use ``BrowserPool.lease()``) when done.
+	"""
+
+	def __init__(self, pool: BrowserPool, process: _PooledProcess, context: PlaywrightBrowserContext, browser: Browser) -> None:
+		self._pool = pool
+		self._process = process
+		self.context = context
+		self.browser = browser
+		self.released = False
+
+	async def release(self) -> None:
+		"""Return the lease to the pool, discarding all state of its context."""
+		await self._pool.release(self)
+
+
+class BrowserPool:
+	"""Keeps N warm browser processes and leases isolated contexts out of them.
+
+	Startup cost is paid once per process. Every lease gets its own browser
+	context (cookies, storage and pages are not shared between leases) which is
+	closed again on release. Processes are recycled after ``max_leases_per_process``
+	leases or when their memory grows above ``max_memory_mb``. When all leases are
+	taken, ``acquire()`` waits for one to be returned.
+	"""
+
+	def __init__(
+		self,
+		size: int = 1,
+		*,
+		contexts_per_process: int = 1,
+		max_leases_per_process: int = 50,
+		max_memory_mb: float | None = None,
+		acquire_timeout: float | None = None,
+		browser_profile: BrowserProfile | None = None,
+		headless: bool | None = None,
+	) -> None:
+		"""Initialize a new BrowserPool.
+
+		Args:
+			size: Number of warm browser processes to keep
+			contexts_per_process: Number of concurrent leases a single process may serve
+			max_leases_per_process: Recycle a process after it has served this many leases
+			max_memory_mb: Recycle a process once its resident memory exceeds this limit
+			acquire_timeout: Seconds to wait for a free lease before raising BrowserPoolExhaustedError
+			browser_profile: Optional browser-use profile used to launch processes and create contexts
+			headless: Optional override of the profile's headless setting
+		"""
+		if size < 1:
+			raise ValueError('BrowserPool size must be at least 1')
+		if contexts_per_process < 1:
+			raise ValueError('contexts_per_process must be at least 1')
+
+		self.size = size
+		self.contexts_per_process = contexts_per_process
+		self.max_leases_per_process = max_leases_per_process
+		self.max_memory_mb = max_memory_mb
+		self.acquire_timeout = acquire_timeout
+
+		profile = browser_profile or BrowserProfile()
+		if headless is not None:
+			profile = profile.model_copy(update={'headless': headless})
+		self.browser_profile = profile
+
+		self._playwright: Playwright | None = None
+		self._processes: List[_PooledProcess] = []
+		self._semaphore = asyncio.Semaphore(size * contexts_per_process)
+		self._lock = asyncio.Lock()
+		self._closed = False
+
+	@property
+	def capacity(self) -> int:
+		"""Maximum number of leases that can be held at the same time."""
+		return self.size * self.contexts_per_process
+
+	@property
+	def active_leases(self) -> int:
+		return sum(process.active_leases for process in self._processes)
+
+	# --- Lifecycle ---
+	async def start(self) -> BrowserPool:
+		"""Launch all browser processes up front (otherwise they are launched lazily)."""
+		async with self._lock:
+			await self._ensure_playwright()
+			while len(self._processes) < self.size:
+				self._processes.append(await self._launch_process())
+		return self
+
+	async def close(self) -> None:
+		"""Shut down every browser process owned by the pool."""
+		async with self._lock:
+			self._closed = True
+			processes, self._processes = self._processes, []
+			for process in processes:
+				await self._close_process(process)
+			if self._playwright:
+				await self._playwright.stop()
+				self._playwright = None
+
+	async def __aenter__(self) -> BrowserPool:
+		return await self.start()
+
+	async def __aexit__(self, exc_type, exc_val, exc_tb) -> None:
+		await self.close()
+
+	# --- Leasing ---
+	async def acquire(self) -> BrowserLease:
+		"""Lease an isolated browser context, waiting while the pool is at capacity."""
+		if self._closed:
+			raise RuntimeError('BrowserPool is closed')
+
+		try:
+			await asyncio.wait_for(self._semaphore.acquire(), timeout=self.acquire_timeout)
+		except asyncio.TimeoutError as e:
+			raise BrowserPoolExhaustedError(f'No browser lease available after {self.acquire_timeout}s') from e
+
+		try:
+			async with self._lock:
+				process = await self._pick_process()
+				process.active_leases += 1
+				process.leases_served += 1
+
+			try:
+				context = await process.browser.new_context(**self.browser_profile.kwargs_for_new_context().model_dump())
+			except Exception:
+				# The process most likely died underneath us, retire it so the next acquire relaunches
+				async with self._lock:
+					process.active_leases -= 1
+					process.draining = True
+					await self._recycle_if_idle(process)
+				raise
+
+			browser = Browser(
+				browser_profile=self.browser_profile,
+				playwright=self._playwright,
+				browser=process.browser,
+				browser_context=context,
+				keep_alive=True,
+			)
+			try:
+				await browser.start()
+			except Exception:
+				await context.close()
+				async with self._lock:
+					process.active_leases -= 1
+				raise
+			logger.debug(f'Leased browser context ({self.active_leases}/{self.capacity} leases in use)')
+			return BrowserLease(self, process, context, browser)
+		except BaseException:
+			self._semaphore.release()
+			raise
+
+	async def release(self, lease: BrowserLease) -> None:
+		"""Close the lease's context and recycle its process if it hit a limit."""
+		if lease.released:
+			return
+		lease.released = True
+
+		process = lease._process
+		try:
+			await lease.context.close()
+		except Exception as e:
+			logger.debug(f'Error closing leased browser context: {type(e).__name__}: {e}')
+
+		try:
+			async with self._lock:
+				process.active_leases -= 1
+				if process.leases_served >= self.max_leases_per_process:
+					logger.info(f'Recycling browser process after {process.leases_served} leases')
+					process.draining = True
+				elif self.max_memory_mb is not None and process.memory_mb() > self.max_memory_mb:
+					logger.info(f'Recycling browser process above memory limit of {self.max_memory_mb}MB')
+					process.draining = True
+				await self._recycle_if_idle(process)
+		finally:
+			self._semaphore.release()
+
+	@asynccontextmanager
+	async def lease(self) -> AsyncIterator[BrowserLease]:
+		"""Context manager around :py:meth:`acquire` / :py:meth:`release`."""
+		browser_lease = await self.acquire()
+		try:
+			yield browser_lease
+		finally:
+			await browser_lease.release()
+
+	# --- Internals (callers must hold self._lock) ---
+	async def _ensure_playwright(self) -> Playwright:
+		if self._playwright is None:
+			self._playwright = await async_playwright().start()
+		return self._playwright
+
+	async def _launch_process(self) -> _PooledProcess:
+		playwright = await self._ensure_playwright()
+
+		# Same trick browser-use uses: diff our child processes to learn the browser pid
+		current_process = psutil.Process(os.getpid())
+		children_before = {child.pid for child in current_process.children(recursive=True)}
+		browser = await playwright.chromium.launch(**self.browser_profile.kwargs_for_launch().model_dump())
+		pid = None
+		try:
+			new_children = [
+				psutil.Process(child.pid)
+				for child in current_process.children(recursive=True)
+				if child.pid not in children_before
+			]
+			candidates = [proc for proc in new_children if 'Helper' not in proc.name() and 'node' not in proc.name()]
+			pid = min(candidates, key=lambda proc: proc.create_time()).pid if candidates else None
+		except psutil.Error:
+			pass
+
+		logger.info(f'🌎 Launched pooled browser process pid={pid}')
+		return _PooledProcess(browser, pid)
+
+	async def _close_process(self, process: _PooledProcess) -> None:
+		try:
+			await process.browser.close()
+		except Exception as e:
+			logger.debug(f'Error closing pooled browser process: {type(e).__name__}: {e}')
+
+	async def _pick_process(self) -> _PooledProcess:
+		# Drop processes that crashed since the last lease
+		for process in list(self._processes):
+			if not process.browser.is_connected() and process.active_leases == 0:
+				self._processes.remove(process)
+
+		available = [
+			process for process in self._processes if not process.draining and process.active_leases < self.contexts_per_process
+		]
+		if available:
+			return min(available, key=lambda process: process.active_leases)
+
+		# Draining processes finish their current leases but do not count against the pool size
+		process = await self._launch_process()
+		self._processes.append(process)
+		return process
+
+	async def _recycle_if_idle(self, process: _PooledProcess) -> None:
+		if process.draining and process.active_leases == 0 and process in self._processes:
+			self._processes.remove(process)
+			await self._close_process(process)
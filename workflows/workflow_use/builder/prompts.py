@@ -35,6 +35,7 @@ Follow these rules when generating the output JSON:
      - Break complex tasks into multiple specific agentic steps rather than one broad task.
      - **Use the user’s goal (if provided) or inferred intent from the recording** to identify where agentic steps are needed for dynamic content, even if the recording uses deterministic steps.
    - **extract_page_content** - Use this type when you want to extract data from the page. If the task is simply extracting data from the page, use this instead of agentic steps (never create agentic step for simple data extraction).
+   - **extract_fields** - Prefer this over `extract_page_content` when the data sits in elements with stable selectors in the recording (e.g. the rows of a results table or labelled fields). It takes a `"fields"` object mapping names to `{{"selector": ..., "attribute": ..., "multiple": ..., "fields": {{...}}}}` and needs no LLM.
    - **Deterministic events** → keep the original recorder event structure. The
      value of `"type"` MUST match **exactly** one of the available action
      names listed below; all additional keys are interpreted as parameters for
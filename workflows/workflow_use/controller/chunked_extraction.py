@@ -0,0 +1,209 @@
+"""
+Map-reduce extraction for pages too long for one prompt.
+
+The reduced page content is split into overlapping chunks, every chunk is extracted by its
+own LLM call (a bounded number at a time), and the partial JSON answers are merged without
+the LLM; only answers that are not JSON need one more call to combine them.
+"""
+
+import asyncio
+import json
+import logging
+import re
+from typing import Any, List, Optional, Tuple
+
+from langchain_core.language_models.chat_models import BaseChatModel
+from langchain_core.prompts import PromptTemplate
+
+from workflow_use.controller.extraction import CHARS_PER_TOKEN, estimate_tokens
+from workflow_use.controller.extraction_cache import ExtractionCache, extraction_key
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_CHUNK_TOKENS = 4_000
+DEFAULT_CHUNK_CONCURRENCY = 8
+# Chunks repeat this much of the end of the previous one, so items on a boundary are seen whole once
+CHUNK_OVERLAP_TOKENS = 200
+# A chunked extraction reads at most this many chunks (with the default chunk size), in about two rounds of calls
+MAX_CHUNKS = 16
+
+CHUNK_PROMPT = (
+	'Your task is to extract the content of a page. The page is too long to read at once, so you are given part '
+	'{part} of {parts}; neighbouring parts overlap slightly. Extract all information relevant to the goal from this '
+	'part only, without guessing what other parts contain. Respond in json format, using a structure that would fit '
+	'every part of the page; respond with {{}} if this part holds nothing relevant. Extraction goal: {goal}, Page part: {page}'
+)
+COMBINE_PROMPT = (
+	'Your task is to combine partial extraction results into one. Each result was extracted from a different part of '
+	'the same page for the same goal; parts overlapped, so drop duplicates. Respond in json format. '
+	'Extraction goal: {goal}, Partial results: {results}'
+)
+
+_FENCE = re.compile(r'^```(?:json)?\s*(.*?)\s*```$', re.DOTALL)
+
+
+def split_chunks(content: str, chunk_tokens: int, overlap_tokens: int = CHUNK_OVERLAP_TOKENS) -> List[str]:
+	"""Split *content* at paragraph boundaries into chunks of about *chunk_tokens*, overlapping by *overlap_tokens*.
+
+	Paragraphs longer than a chunk are cut at word boundaries.
+	"""
+	max_chars = chunk_tokens * CHARS_PER_TOKEN
+	overlap_chars = min(overlap_tokens * CHARS_PER_TOKEN, max_chars // 4)
+	paragraphs: List[str] = []
+	for paragraph in content.split('\n\n'):
+		while len(paragraph) > max_chars:
+			cut = paragraph.rfind(' ', 0, max_chars)
+			cut = cut if cut > 0 else max_chars
+			paragraphs.append(paragraph[:cut])
+			paragraph = paragraph[cut:].lstrip()
+		if paragraph.strip():
+			paragraphs.append(paragraph)
+
+	chunks: List[str] = []
+	current: List[str] = []
+	size = 0
+	for paragraph in paragraphs:
+		if current and size + len(paragraph) > max_chars:
+			chunks.append('\n\n'.join(current))
+			# Carry the tail of this chunk over into the next one
+			tail: List[str] = []
+			tail_size = 0
+			for previous in reversed(current):
+				if tail_size + len(previous) > overlap_chars:
+					break
+				tail.insert(0, previous)
+				tail_size += len(previous) + 2
+			current, size = (tail, tail_size) if tail_size + len(paragraph) <= max_chars else ([], 0)
+		current.append(paragraph)
+		size += len(paragraph) + 2
+	if current:
+		chunks.append('\n\n'.join(current))
+	return chunks
+
+
+def parse_json_output(text: str) -> Optional[Any]:
+	"""The JSON value of an LLM answer, also when it is wrapped in a code fence or in prose; None if there is none."""
+	text = text.strip()
+	fenced = _FENCE.match(text)
+	if fenced:
+		text = fenced.group(1)
+	try:
+		return json.loads(text)
+	except ValueError:
+		pass
+	start = min((index for index in (text.find('{'), text.find('[')) if index >= 0), default=-1)
+	if start < 0:
+		return None
+	try:
+		value, _ = json.JSONDecoder().raw_decode(text[start:])
+		return value
+	except ValueError:
+		return None
+
+
+def _is_empty(value: Any) -> bool:
+	return value is None or value == '' or value == [] or value == {}
+
+
+def _canonical(value: Any) -> str:
+	return json.dumps(value, sort_keys=True, ensure_ascii=False)
+
+
+def merge_values(first: Any, second: Any) -> Any:
+	"""Merge two partial results: objects key by key, lists as a union in order, and for scalars the first one wins."""
+	if _is_empty(first):
+		return second
+	if _is_empty(second):
+		return first
+	if isinstance(first, dict) and isinstance(second, dict):
+		merged = dict(first)
+		for key, value in second.items():
+			merged[key] = merge_values(merged[key], value) if key in merged else value
+		return merged
+	if isinstance(first, list) or isinstance(second, list):
+		items = first if isinstance(first, list) else [first]
+		seen = {_canonical(item) for item in items}
+		merged_list = list(items)
+		for item in second if isinstance(second, list) else [second]:
+			if _canonical(item) not in seen:
+				seen.add(_canonical(item))
+				merged_list.append(item)
+		return merged_list
+	# Conflicting scalars: the earlier part of the page wins
+	return first
+
+
+def merge_results(results: List[Any]) -> Any:
+	merged: Any = None
+	for result in results:
+		merged = merge_values(merged, result)
+	return merged if merged is not None else {}
+
+
+async def _extract_chunk(
+	llm: BaseChatModel, chunk: str, part: int, parts: int, goal: str, model: str, cache: Optional[ExtractionCache]
+) -> Optional[str]:
+	key = extraction_key(chunk, goal, f'{model}/chunk') if cache else None
+	if cache and key:
+		cached = await cache.lookup(key)
+		if cached is not None:
+			return cached
+	template = PromptTemplate(input_variables=['part', 'parts', 'goal', 'page'], template=CHUNK_PROMPT)
+	try:
+		output = await llm.ainvoke(template.format(part=part, parts=parts, goal=goal, page=chunk))
+	except Exception as e:
+		logger.warning(f'Extraction of part {part}/{parts} failed: {e}')
+		return None
+	if not isinstance(output.content, str):
+		return None
+	if cache and key:
+		await cache.store(key, f'{model}/chunk', output.content)
+	return output.content
+
+
+async def extract_chunked(
+	llm: BaseChatModel,
+	content: str,
+	goal: str,
+	*,
+	model: str,
+	chunk_tokens: int = DEFAULT_CHUNK_TOKENS,
+	concurrency: int = DEFAULT_CHUNK_CONCURRENCY,
+	cache: Optional[ExtractionCache] = None,
+) -> Tuple[str, bool]:
+	"""Extract *goal* from *content* chunk by chunk and return the merged answer, and whether it is complete.
+
+	Parts whose extraction failed are left out and make the answer incomplete, as does a failed
+	combining call; incomplete answers must not be cached for the whole page, so a later run
+	retries the failed parts. Raises RuntimeError if all parts failed.
+	"""
+	chunks = split_chunks(content, chunk_tokens)
+	logger.info(f'Extracting from {estimate_tokens(content)} tokens in {len(chunks)} parts, {concurrency} at a time')
+	semaphore = asyncio.Semaphore(concurrency)
+
+	async def extract(index: int, chunk: str) -> Optional[str]:
+		async with semaphore:
+			return await _extract_chunk(llm, chunk, index + 1, len(chunks), goal, model, cache)
+
+	outputs = [output for output in await asyncio.gather(*(extract(i, chunk) for i, chunk in enumerate(chunks))) if output]
+	if not outputs:
+		raise RuntimeError(f'Extraction failed for all {len(chunks)} parts of the page')
+	if len(outputs) < len(chunks):
+		logger.warning(
+			f'{len(chunks) - len(outputs)} of {len(chunks)} parts could not be extracted, the result may be incomplete'
+		)
+
+	complete = len(outputs) == len(chunks)
+	parsed = [parse_json_output(output) for output in outputs]
+	if all(value is not None for value in parsed):
+		return json.dumps(merge_results(parsed), ensure_ascii=False), complete
+
+	# Some parts answered in prose: let the LLM combine them, or hand them out as they are
+	template = PromptTemplate(input_variables=['goal', 'results'], template=COMBINE_PROMPT)
+	try:
+		combined = await llm.ainvoke(template.format(goal=goal, results='\n\n'.join(outputs)))
+		if isinstance(combined.content, str):
+			return combined.content, complete
+	except Exception as e:
+		logger.warning(f'Combining the extracted parts failed: {e}')
+	return '\n\n'.join(outputs), False
@@ -0,0 +1,287 @@
+"""
+Reduces a page to the content worth sending to the extraction LLM.
+
+The DOM is pruned inside the browser (only visible text, headings, tables and the landmark
+they belong to come back), all frames are read concurrently, and the result is cut into
+sections that are ranked against the extraction goal when the page exceeds the token budget.
+"""
+
+import asyncio
+import logging
+import math
+import re
+from dataclasses import dataclass, replace
+from typing import Any, Dict, List, Optional, Sequence, Tuple
+
+from playwright.async_api import Frame, Page
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_EXTRACTION_TOKEN_BUDGET = 16_000
+# Rough size of a token in characters, good enough for budgeting without a tokenizer
+CHARS_PER_TOKEN = 4
+# The page stops collecting once it has this many times the budget, so huge pages are not shipped whole
+COLLECT_FACTOR = 8
+FRAME_TIMEOUT_S = 5.0
+# A section that does not fit is only cut down if at least this much budget is left for it
+MIN_PARTIAL_TOKENS = 200
+
+# Walks the rendered DOM (including open shadow roots, excluding iframes) and returns its visible content as
+# blocks of {type: 'heading' | 'text' | 'table', text, level?, rows?, landmark}
+PRUNE_DOM_SCRIPT = """
+({ maxChars }) => {
+	const SKIP = new Set(['SCRIPT', 'STYLE', 'NOSCRIPT', 'TEMPLATE', 'SVG', 'CANVAS', 'IFRAME', 'FRAME', 'OBJECT', 'EMBED', 'HEAD', 'IMG', 'VIDEO', 'AUDIO']);
+	const LANDMARK_TAGS = { HEADER: 'banner', NAV: 'navigation', MAIN: 'main', ASIDE: 'complementary', FOOTER: 'contentinfo' };
+	const LANDMARK_ROLES = new Set(['banner', 'navigation', 'main', 'complementary', 'contentinfo', 'search', 'region']);
+	const clean = (text) => text.replace(/\\s+/g, ' ').trim();
+
+	const blocks = [];
+	let size = 0;
+	let truncated = false;
+	let parts = [];
+	let prefix = '';
+
+	const push = (block) => {
+		if (size >= maxChars) {
+			truncated = true;
+			return;
+		}
+		size += block.text.length;
+		blocks.push(block);
+	};
+	const flush = (landmark) => {
+		const text = clean(parts.join(''));
+		parts = [];
+		if (text) {
+			push({ type: 'text', text: prefix + text, landmark });
+			prefix = '';
+		}
+	};
+	// Computed style of a rendered element, null for hidden ones
+	const renderedStyle = (el) => {
+		if (el.hidden || el.getAttribute('aria-hidden') === 'true') return null;
+		const style = getComputedStyle(el);
+		return style.display === 'none' || style.visibility === 'hidden' || style.visibility === 'collapse' ? null : style;
+	};
+
+	const walk = (node, landmark) => {
+		if (truncated) return;
+		if (node.nodeType === Node.TEXT_NODE) {
+			parts.push(node.nodeValue);
+			return;
+		}
+		if (node.nodeType !== Node.ELEMENT_NODE) return;
+		const tag = node.tagName.toUpperCase();
+		if (SKIP.has(tag)) return;
+		const style = renderedStyle(node);
+		if (!style) return;
+		if (tag === 'BR') {
+			parts.push(' ');
+			return;
+		}
+
+		const role = node.getAttribute('role');
+		const region = LANDMARK_TAGS[tag] || (LANDMARK_ROLES.has(role) ? role : null);
+		const inner = region || landmark;
+		if (/^H[1-6]$/.test(tag)) {
+			flush(landmark);
+			const text = clean(node.innerText);
+			if (text) push({ type: 'heading', level: Number(tag[1]), text, landmark: inner });
+			return;
+		}
+		if (tag === 'TABLE') {
+			flush(landmark);
+			const rows = [];
+			for (const row of node.rows) {
+				const cells = Array.from(row.cells, (cell) => clean(cell.innerText));
+				if (cells.some(Boolean)) rows.push(cells);
+			}
+			if (rows.length) push({ type: 'table', rows, text: rows.map((cells) => cells.join(' | ')).join('\\n'), landmark: inner });
+			return;
+		}
+
+		// Inline elements continue the current text block; inline-blocks (buttons, menu items) are at least separate words
+		const inline = !region && (style.display.startsWith('inline') || style.display === 'contents');
+		const spaced = inline && style.display !== 'inline';
+		if (!inline) flush(landmark);
+		if (spaced) parts.push(' ');
+		if (tag === 'LI') prefix = '- ';
+		for (const child of node.childNodes) walk(child, inner);
+		if (node.shadowRoot) for (const child of node.shadowRoot.childNodes) walk(child, inner);
+		if (spaced) parts.push(' ');
+		if (!inline) flush(inner);
+	};
+
+	if (document.body) walk(document.body, null);
+	flush(null);
+	return { blocks, truncated };
+}
+"""
+
+# How much a section's landmark counts when ranking; page chrome is the first thing to go
+LANDMARK_WEIGHTS = {
+	'main': 1.5,
+	'region': 1.0,
+	'complementary': 0.6,
+	'search': 0.4,
+	'banner': 0.3,
+	'navigation': 0.3,
+	'contentinfo': 0.3,
+}
+
+_STOPWORDS = {'the', 'and', 'for', 'all', 'from', 'with', 'that', 'this', 'are', 'page', 'get', 'extract', 'find', 'list'}
+
+
+@dataclass
+class ContentSection:
+	"""Content under one heading (or one landmark) of one frame, rendered as markdown."""
+
+	frame: int
+	frame_url: Optional[str]
+	position: int
+	title: Optional[str]
+	landmark: Optional[str]
+	text: str
+
+	@property
+	def tokens(self) -> int:
+		return estimate_tokens(self.text)
+
+
+def estimate_tokens(text: str) -> int:
+	return math.ceil(len(text) / CHARS_PER_TOKEN)
+
+
+def _render_table(rows: List[List[str]]) -> str:
+	width = max(len(row) for row in rows)
+	rows = [row + [''] * (width - len(row)) for row in rows]
+	lines = ['| ' + ' | '.join(rows[0]) + ' |', '|' + ' --- |' * width]
+	lines.extend('| ' + ' | '.join(row) + ' |' for row in rows[1:])
+	return '\n'.join(lines)
+
+
+def build_sections(frames: Sequence[Tuple[Optional[str], List[Dict[str, Any]]]]) -> List[ContentSection]:
+	"""Group the pruned blocks of every frame into sections; a heading or a new landmark starts a section."""
+	sections: List[ContentSection] = []
+	lines: List[List[str]] = []
+	for frame, (frame_url, blocks) in enumerate(frames):
+		current: Optional[ContentSection] = None
+		for block in blocks:
+			landmark = block.get('landmark')
+			if current is None or block['type'] == 'heading' or landmark != current.landmark:
+				current = ContentSection(frame, frame_url, len(sections), None, landmark, '')
+				sections.append(current)
+				lines.append([])
+			if block['type'] == 'heading':
+				current.title = block['text']
+				lines[-1].append(f'{"#" * block["level"]} {block["text"]}')
+			elif block['type'] == 'table':
+				lines[-1].append(_render_table(block['rows']))
+			else:
+				lines[-1].append(block['text'])
+	for section, section_lines in zip(sections, lines):
+		section.text = '\n\n'.join(section_lines)
+	return sections
+
+
+def _goal_terms(goal: str) -> List[str]:
+	return [term for term in re.findall(r'\w+', goal.lower()) if len(term) > 2 and term not in _STOPWORDS]
+
+
+def _score(section: ContentSection, terms: List[str]) -> float:
+	text = section.text.lower()
+	hits = sum(text.count(term) for term in terms)
+	if section.title:
+		title = section.title.lower()
+		hits += 2 * sum(term in title for term in terms)
+	weight = LANDMARK_WEIGHTS.get(section.landmark or '', 1.0)
+	# Hits per square root of size: relevant sections win without favouring sheer length
+	return weight * (1 + hits / math.sqrt(section.tokens + 1))
+
+
+def select_sections(sections: List[ContentSection], goal: str, token_budget: int) -> Tuple[List[ContentSection], int]:
+	"""Pick the sections that best match *goal* within *token_budget*, in page order.
+
+	Returns the selected sections and the number of sections dropped or cut short.
+	"""
+	if sum(section.tokens for section in sections) <= token_budget:
+		return sections, 0
+
+	terms = _goal_terms(goal)
+	ranked = sorted(sections, key=lambda section: (-_score(section, terms), section.position))
+	selected: List[ContentSection] = []
+	shortened = 0
+	remaining = token_budget
+	for section in ranked:
+		if section.tokens <= remaining:
+			selected.append(section)
+			remaining -= section.tokens
+		elif remaining >= MIN_PARTIAL_TOKENS:
+			cut = section.text[: remaining * CHARS_PER_TOKEN].rsplit(' ', 1)[0]
+			selected.append(replace(section, text=f'{cut} […]'))
+			shortened += 1
+			remaining = 0
+	return sorted(selected, key=lambda section: section.position), len(sections) - len(selected) + shortened
+
+
+def render_sections(sections: List[ContentSection], omitted: int) -> str:
+	parts: List[str] = []
+	frame = 0
+	for section in sections:
+		if section.frame != frame:
+			frame = section.frame
+			parts.append(f'IFRAME {section.frame_url}:')
+		parts.append(section.text)
+	if omitted:
+		parts.append(f'[{omitted} less relevant sections were left out or shortened to fit the token budget]')
+	return '\n\n'.join(parts)
+
+
+def _reduce(frames: List[Tuple[Optional[str], List[Dict[str, Any]]]], goal: str, token_budget: int) -> Tuple[str, int, int]:
+	sections = build_sections(frames)
+	selected, omitted = select_sections(sections, goal, token_budget)
+	return render_sections(selected, omitted), len(sections), omitted
+
+
+async def _frame_blocks(frame: Frame, max_chars: int) -> List[Dict[str, Any]]:
+	"""Pruned content of one frame, falling back to markdownified HTML where the script cannot run."""
+	try:
+		pruned = await asyncio.wait_for(frame.evaluate(PRUNE_DOM_SCRIPT, {'maxChars': max_chars}), FRAME_TIMEOUT_S)
+		return pruned['blocks']
+	except asyncio.TimeoutError:
+		logger.debug(f'Timed out reading frame {frame.url}')
+		return []
+	except Exception as e:
+		logger.debug(f'Could not prune frame {frame.url}, converting its HTML instead: {e}')
+
+	import markdownify
+
+	try:
+		html = await asyncio.wait_for(frame.content(), FRAME_TIMEOUT_S)
+	except Exception as e:
+		logger.debug(f'Could not read frame {frame.url}: {e}')
+		return []
+	text = await asyncio.to_thread(markdownify.markdownify, html[: max_chars * 4], strip=['a', 'img'])
+	return [{'type': 'text', 'text': text[:max_chars], 'landmark': None}]
+
+
+async def reduce_page_content(page: Page, goal: str, token_budget: int = DEFAULT_EXTRACTION_TOKEN_BUDGET) -> str:
+	"""Return the content of *page* and its iframes as markdown of at most about *token_budget* tokens."""
+	frames = [page.main_frame] + [
+		frame
+		for frame in page.frames
+		if frame is not page.main_frame and frame.url not in ('', 'about:blank') and not frame.url.startswith('data:')
+	]
+	max_chars = token_budget * CHARS_PER_TOKEN * COLLECT_FACTOR
+	blocks = await asyncio.gather(*(_frame_blocks(frame, max_chars) for frame in frames))
+
+	frame_contents = [
+		(None if index == 0 else frame.url, frame_blocks) for index, (frame, frame_blocks) in enumerate(zip(frames, blocks))
+	]
+	# Building and ranking sections is plain CPU work, keep it off the event loop
+	content, section_count, omitted = await asyncio.to_thread(_reduce, frame_contents, goal, token_budget)
+	logger.debug(
+		f'Reduced {page.url} to {estimate_tokens(content)} tokens from {len(frames)} frames '
+		f'({section_count} sections, {omitted} left out or shortened)'
+	)
+	return content
@@ -0,0 +1,187 @@
+"""
+Content-addressed cache of page-extraction LLM results: an in-memory LRU in front of a SQLite file.
+"""
+
+import asyncio
+import hashlib
+import logging
+import re
+import sqlite3
+import threading
+import time
+from collections import OrderedDict
+from pathlib import Path
+from typing import Dict, Optional, Tuple
+
+from langchain_core.language_models.chat_models import BaseChatModel
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_EXTRACTION_CACHE_PATH = Path('./tmp') / 'cache' / 'extraction_cache.db'
+DEFAULT_TTL = 24 * 3600.0
+DEFAULT_MEMORY_ENTRIES = 256
+DEFAULT_MAX_DISK_BYTES = 100 * 1024 * 1024
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS extraction_cache (
+	key TEXT PRIMARY KEY,
+	model TEXT NOT NULL,
+	result TEXT NOT NULL,
+	size INTEGER NOT NULL,
+	created_at REAL NOT NULL,
+	accessed_at REAL NOT NULL
+);
+CREATE INDEX IF NOT EXISTS extraction_cache_by_access ON extraction_cache (accessed_at);
+"""
+
+
+def model_id(llm: BaseChatModel) -> str:
+	"""Identify the model behind *llm*; results of different models are never mixed up."""
+	name = getattr(llm, 'model_name', None) or getattr(llm, 'model', None) or getattr(llm, 'model_id', None)
+	return f'{type(llm).__name__}:{name}' if name else type(llm).__name__
+
+
+def extraction_key(content: str, goal: str, model: str) -> str:
+	"""Key of one extraction; whitespace differences in the page content do not change it."""
+	normalized = re.sub(r'\s+', ' ', content).strip()
+	digest = hashlib.sha256()
+	for part in (normalized, goal.strip(), model):
+		digest.update(part.encode('utf-8'))
+		digest.update(b'\0')
+	return digest.hexdigest()
+
+
+class ExtractionCache:
+	"""Extraction results by (page content, goal, model), kept for ``ttl`` seconds.
+
+	The ``memory_entries`` most recently used results are served from memory, all others from
+	disk; once the file holds more than ``max_disk_bytes`` of results, the least recently used
+	ones are dropped. Hits and misses are counted per instance (see :py:attr:`stats`).
+	"""
+
+	def __init__(
+		self,
+		path: str | Path = DEFAULT_EXTRACTION_CACHE_PATH,
+		*,
+		ttl: float = DEFAULT_TTL,
+		memory_entries: int = DEFAULT_MEMORY_ENTRIES,
+		max_disk_bytes: int = DEFAULT_MAX_DISK_BYTES,
+	) -> None:
+		self.path = Path(path)
+		self.ttl = ttl
+		self.memory_entries = memory_entries
+		self.max_disk_bytes = max_disk_bytes
+		self.path.parent.mkdir(parents=True, exist_ok=True)
+
+		self.hits = 0
+		self.disk_hits = 0
+		self.misses = 0
+		# key -> (result, expires at)
+		self._memory: 'OrderedDict[str, Tuple[str, float]]' = OrderedDict()
+
+		self._lock = threading.Lock()
+		self._conn = sqlite3.connect(self.path, check_same_thread=False, isolation_level=None)
+		self._conn.execute('PRAGMA journal_mode=WAL')
+		self._conn.execute('PRAGMA synchronous=NORMAL')
+		self._conn.executescript(_SCHEMA)
+
+	def close(self) -> None:
+		with self._lock:
+			self._conn.close()
+
+	@property
+	def stats(self) -> Dict[str, int]:
+		return {'hits': self.hits, 'disk_hits': self.disk_hits, 'misses': self.misses}
+
+	# --- Memory tier ---
+	def _remember(self, key: str, result: str, expires_at: float) -> None:
+		self._memory[key] = (result, expires_at)
+		self._memory.move_to_end(key)
+		while len(self._memory) > self.memory_entries:
+			self._memory.popitem(last=False)
+
+	def _from_memory(self, key: str) -> Optional[str]:
+		entry = self._memory.get(key)
+		if entry is None:
+			return None
+		if entry[1] <= time.time():
+			del self._memory[key]
+			return None
+		self._memory.move_to_end(key)
+		return entry[0]
+
+	# --- Sync API (cheap, local-disk only) ---
+	def get(self, key: str) -> Optional[str]:
+		with self._lock:
+			result = self._from_memory(key)
+			if result is not None:
+				self.hits += 1
+				return result
+
+			now = time.time()
+			row = self._conn.execute(
+				'SELECT result, created_at FROM extraction_cache WHERE key = ? AND created_at > ?', (key, now - self.ttl)
+			).fetchone()
+			if row is None:
+				self.misses += 1
+				return None
+			self._conn.execute('UPDATE extraction_cache SET accessed_at = ? WHERE key = ?', (now, key))
+			self._remember(key, row[0], row[1] + self.ttl)
+			self.hits += 1
+			self.disk_hits += 1
+			return row[0]
+
+	def put(self, key: str, model: str, result: str) -> None:
+		now = time.time()
+		size = len(result.encode('utf-8'))
+		with self._lock:
+			self._remember(key, result, now + self.ttl)
+			self._conn.execute(
+				'INSERT OR REPLACE INTO extraction_cache (key, model, result, size, created_at, accessed_at) '
+				'VALUES (?, ?, ?, ?, ?, ?)',
+				(key, model, result, size, now, now),
+			)
+			self._evict(now)
+
+	def _evict(self, now: float) -> None:
+		"""Drop expired results, then the least recently used ones while the file holds too much."""
+		self._conn.execute('DELETE FROM extraction_cache WHERE created_at <= ?', (now - self.ttl,))
+		total = self._conn.execute('SELECT COALESCE(SUM(size), 0) FROM extraction_cache').fetchone()[0]
+		if total <= self.max_disk_bytes:
+			return
+		# Oldest accesses first, until what is left fits
+		dropped = 0
+		for key, size in self._conn.execute('SELECT key, size FROM extraction_cache ORDER BY accessed_at').fetchall():
+			if total <= self.max_disk_bytes:
+				break
+			self._conn.execute('DELETE FROM extraction_cache WHERE key = ?', (key,))
+			self._memory.pop(key, None)
+			total -= size
+			dropped += 1
+		logger.debug(f'Extraction cache over {self.max_disk_bytes} bytes, dropped {dropped} results')
+
+	def clear(self) -> None:
+		with self._lock:
+			self._memory.clear()
+			self._conn.execute('DELETE FROM extraction_cache')
+
+	# --- Async wrappers used from actions ---
+	async def lookup(self, key: str) -> Optional[str]:
+		# Memory hits are served right away, without a thread hop
+		with self._lock:
+			result = self._from_memory(key)
+			if result is not None:
+				self.hits += 1
+				return result
+		try:
+			return await asyncio.to_thread(self.get, key)
+		except sqlite3.Error as e:
+			# The cache is an optimization only, never fail an extraction because of it
+			logger.warning(f'Could not read extraction cache: {e}')
+			return None
+
+	async def store(self, key: str, model: str, result: str) -> None:
+		try:
+			await asyncio.to_thread(self.put, key, model, result)
+		except sqlite3.Error as e:
+			logger.warning(f'Could not update extraction cache: {e}')
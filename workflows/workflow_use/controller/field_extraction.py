@@ -0,0 +1,70 @@
+"""
+Deterministic extraction: values read from the page by selector, in a single evaluate call.
+"""
+
+from typing import Any, Dict
+
+from playwright.async_api import Page
+
+from workflow_use.schema.views import ExtractionField
+
+# Reads every field of `fields` below `document`; returns the values and the paths of required fields that matched nothing
+EXTRACT_FIELDS_SCRIPT = """
+({ fields }) => {
+	const XPATH = /^(\\/|\\.\\/|\\(|xpath=)/;
+	const clean = (text) => (text || '').replace(/\\s+/g, ' ').trim();
+	const missing = new Set();
+
+	const query = (root, selector) => {
+		if (XPATH.test(selector)) {
+			const expression = selector.startsWith('xpath=') ? selector.slice(6) : selector;
+			const snapshot = document.evaluate(expression, root, null, XPathResult.ORDERED_NODE_SNAPSHOT_TYPE, null);
+			return Array.from({ length: snapshot.snapshotLength }, (_, i) => snapshot.snapshotItem(i));
+		}
+		return Array.from(root.querySelectorAll(selector));
+	};
+
+	const read = (node, field, path) => {
+		if (field.fields) return extract(node, field.fields, path + '.');
+		// XPath may select text or attribute nodes
+		if (node.nodeType !== Node.ELEMENT_NODE) return clean(node.nodeValue);
+		if (!field.attribute) return clean(node.innerText ?? node.textContent);
+		// Properties give resolved values (absolute href, current input value); fall back to the plain attribute
+		const property = node[field.attribute];
+		const value = ['string', 'number', 'boolean'].includes(typeof property) ? property : node.getAttribute(field.attribute);
+		return typeof value === 'string' ? value.trim() : value;
+	};
+
+	const extract = (root, spec, prefix) => {
+		const result = {};
+		for (const [name, field] of Object.entries(spec)) {
+			const path = prefix + name;
+			const matches = query(root, field.selector);
+			if (field.required && !matches.length) missing.add(path);
+			if (field.multiple) {
+				result[name] = matches.map((node) => read(node, field, path + '[]'));
+			} else {
+				result[name] = matches.length ? read(matches[0], field, path) : null;
+			}
+		}
+		return result;
+	};
+
+	return { data: extract(document, fields, ''), missing: Array.from(missing) };
+}
+"""
+
+
+async def extract_page_fields(page: Page, fields: Dict[str, ExtractionField]) -> Dict[str, Any]:
+	"""Return the values of *fields* on *page* as a JSON-compatible object with the same keys.
+
+	Raises ValueError when a required field matched nothing, or when a selector is invalid.
+	"""
+	spec = {name: field.model_dump(exclude_none=True) for name, field in fields.items()}
+	try:
+		extracted = await page.evaluate(EXTRACT_FIELDS_SCRIPT, {'fields': spec})
+	except Exception as e:
+		raise ValueError(f'Could not extract fields: {e}') from e
+	if extracted['missing']:
+		raise ValueError(f'Required fields not found on the page: {", ".join(extracted["missing"])}')
+	return extracted['data']
@@ -1,4 +1,4 @@
-import asyncio
+import json
 import logging
 
 from browser_use import Browser
@@ -7,9 +7,20 @@ from browser_use.controller.service import Controller
 from langchain_core.language_models.chat_models import BaseChatModel
 from langchain_core.prompts import PromptTemplate
 
+from workflow_use.controller.chunked_extraction import (
+	DEFAULT_CHUNK_CONCURRENCY,
+	DEFAULT_CHUNK_TOKENS,
+	MAX_CHUNKS,
+	extract_chunked,
+)
+from workflow_use.controller.extraction import DEFAULT_EXTRACTION_TOKEN_BUDGET, estimate_tokens, reduce_page_content
+from workflow_use.controller.extraction_cache import ExtractionCache, extraction_key, model_id
+from workflow_use.controller.field_extraction import extract_page_fields
 from workflow_use.controller.utils import get_best_element_handle, truncate_selector
 from workflow_use.controller.views import (
+	ActionContext,
 	ClickElementDeterministicAction,
+	FieldExtractionAction,
 	InputTextDeterministicAction,
 	KeyPressDeterministicAction,
 	NavigationAction,
@@ -53,19 +64,59 @@ DISABLED_DEFAULT_ACTIONS = [
 ]
 
 
+async def _locate_element(page, params, context: ActionContext | None, timeout_ms: int):
+	"""Return (locator, selector) for *params*, reusing an element the workflow already located on this page."""
+	if context and context.locator is not None and context.selector_used and context.locator.page == page:
+		logger.info(f'Using element located ahead of time: {truncate_selector(context.selector_used)}')
+		return context.locator, context.selector_used
+
+	locator, selector_used = await get_best_element_handle(
+		page,
+		params.cssSelector,
+		params,
+		timeout_ms=timeout_ms,
+		**(context.element_hints() if context else {}),
+	)
+	if context:
+		context.locator, context.selector_used = locator, selector_used
+	return locator, selector_used
+
+
 class WorkflowController(Controller):
-	def __init__(self, *args, **kwargs):
+	def __init__(
+		self,
+		*args,
+		extraction_token_budget: int = DEFAULT_EXTRACTION_TOKEN_BUDGET,
+		extraction_cache: ExtractionCache | None = None,
+		chunked_extraction: bool = False,
+		extraction_chunk_tokens: int = DEFAULT_CHUNK_TOKENS,
+		extraction_concurrency: int = DEFAULT_CHUNK_CONCURRENCY,
+		**kwargs,
+	):
 		# Pass the list of actions to exclude to the base class constructor
 		super().__init__(*args, exclude_actions=DISABLED_DEFAULT_ACTIONS, **kwargs)
+		# Default size limit of the page content extract_page_content sends to the LLM, in tokens
+		self.extraction_token_budget = extraction_token_budget
+		# Extractions of unchanged content with the same goal and model are answered from here; the cache
+		# belongs to the caller, who shares it between controllers and closes it
+		self.extraction_cache = extraction_cache
+		# Chunked extraction reads up to MAX_CHUNKS chunks of the page in parallel calls instead of one capped prompt
+		self.chunked_extraction = chunked_extraction
+		self.extraction_chunk_tokens = extraction_chunk_tokens
+		self.extraction_concurrency = extraction_concurrency
 		self.__register_actions()
 
 	def __register_actions(self):
 		# Navigate to URL ------------------------------------------------------------
 		@self.registry.action('Manually navigate to URL', param_model=NavigationAction)
-		async def navigation(params: NavigationAction, browser_session: Browser) -> ActionResult:
+		async def navigation(
+			params: NavigationAction, browser_session: Browser, context: ActionContext | None = None
+		) -> ActionResult:
 			"""Navigate to the given URL."""
 			page = await browser_session.get_current_page()
-			await page.goto(params.url)
+			await page.goto(params.url, wait_until='commit')
+			if context:
+				context.dispatched()
 			await page.wait_for_load_state()
 
 			msg = f'🔗  Navigated to URL: {params.url}'
@@ -78,19 +129,18 @@ class WorkflowController(Controller):
 			'Click element by all available selectors',
 			param_model=ClickElementDeterministicAction,
 		)
-		async def click(params: ClickElementDeterministicAction, browser_session: Browser) -> ActionResult:
+		async def click(
+			params: ClickElementDeterministicAction, browser_session: Browser, context: ActionContext | None = None
+		) -> ActionResult:
 			"""Click the first element matching *params.cssSelector* with fallback mechanisms."""
 			page = await browser_session.get_current_page()
 			original_selector = params.cssSelector
 
 			try:
-				locator, selector_used = await get_best_element_handle(
-					page,
-					params.cssSelector,
-					params,
-					timeout_ms=DEFAULT_ACTION_TIMEOUT_MS,
-				)
+				locator, selector_used = await _locate_element(page, params, context, timeout_ms=DEFAULT_ACTION_TIMEOUT_MS)
 				await locator.click(force=True)
+				if context:
+					context.dispatched()
 
 				msg = f'🖱️  Clicked element with CSS selector: {truncate_selector(selector_used)} (original: {truncate_selector(original_selector)})'
 				logger.info(msg)
@@ -109,18 +159,14 @@ class WorkflowController(Controller):
 			params: InputTextDeterministicAction,
 			browser_session: Browser,
 			has_sensitive_data: bool = False,
+			context: ActionContext | None = None,
 		) -> ActionResult:
 			"""Fill text into the element located with *params.cssSelector*."""
 			page = await browser_session.get_current_page()
 			original_selector = params.cssSelector
 
 			try:
-				locator, selector_used = await get_best_element_handle(
-					page,
-					params.cssSelector,
-					params,
-					timeout_ms=DEFAULT_ACTION_TIMEOUT_MS,
-				)
+				locator, selector_used = await _locate_element(page, params, context, timeout_ms=DEFAULT_ACTION_TIMEOUT_MS)
 
 				# Check if it's a SELECT element
 				is_select = await locator.evaluate('(el) => el.tagName === "SELECT"')
@@ -130,11 +176,12 @@ class WorkflowController(Controller):
 						include_in_memory=True,
 					)
 
-				# Add a small delay and click to ensure the element is focused
+				# Click after filling so the element ends up focused; the next step's readiness
+				# policy (not a fixed sleep) decides how long to wait for the page to react
 				await locator.fill(params.value)
-				await asyncio.sleep(0.5)
 				await locator.click(force=True)
-				await asyncio.sleep(0.5)
+				if context:
+					context.dispatched()
 
 				msg = f'⌨️  Input "{params.value}" into element with CSS selector: {truncate_selector(selector_used)} (original: {truncate_selector(original_selector)})'
 				logger.info(msg)
@@ -149,20 +196,19 @@ class WorkflowController(Controller):
 			'Select dropdown option by all available selectors and visible text',
 			param_model=SelectDropdownOptionDeterministicAction,
 		)
-		async def select_change(params: SelectDropdownOptionDeterministicAction, browser_session: Browser) -> ActionResult:
+		async def select_change(
+			params: SelectDropdownOptionDeterministicAction, browser_session: Browser, context: ActionContext | None = None
+		) -> ActionResult:
 			"""Select dropdown option whose visible text equals *params.value*."""
 			page = await browser_session.get_current_page()
 			original_selector = params.cssSelector
 
 			try:
-				locator, selector_used = await get_best_element_handle(
-					page,
-					params.cssSelector,
-					params,
-					timeout_ms=DEFAULT_ACTION_TIMEOUT_MS,
-				)
+				locator, selector_used = await _locate_element(page, params, context, timeout_ms=DEFAULT_ACTION_TIMEOUT_MS)
 
 				await locator.select_option(label=params.selectedText)
+				if context:
+					context.dispatched()
 
 				msg = f'Selected option "{params.selectedText}" in dropdown {truncate_selector(selector_used)} (original: {truncate_selector(original_selector)})'
 				logger.info(msg)
@@ -177,15 +223,19 @@ class WorkflowController(Controller):
 			'Press key on element by all available selectors',
 			param_model=KeyPressDeterministicAction,
 		)
-		async def key_press(params: KeyPressDeterministicAction, browser_session: Browser) -> ActionResult:
+		async def key_press(
+			params: KeyPressDeterministicAction, browser_session: Browser, context: ActionContext | None = None
+		) -> ActionResult:
 			"""Press *params.key* on the element identified by *params.cssSelector*."""
 			page = await browser_session.get_current_page()
 			original_selector = params.cssSelector
 
 			try:
-				locator, selector_used = await get_best_element_handle(page, params.cssSelector, params, timeout_ms=5000)
+				locator, selector_used = await _locate_element(page, params, context, timeout_ms=5000)
 
 				await locator.press(params.key)
+				if context:
+					context.dispatched()
 
 				msg = f"🔑  Pressed key '{params.key}' on element with CSS selector: {truncate_selector(selector_used)} (original: {truncate_selector(original_selector)})"
 				logger.info(msg)
@@ -215,23 +265,50 @@ class WorkflowController(Controller):
 			params: PageExtractionAction, browser_session: Browser, page_extraction_llm: BaseChatModel
 		):
 			page = await browser_session.get_current_page()
-			import markdownify
-
-			strip = ['a', 'img']
-
-			content = markdownify.markdownify(await page.content(), strip=strip)
 
-			# manually append iframe text into the content so it's readable by the LLM (includes cross-origin iframes)
-			for iframe in page.frames:
-				if iframe.url != page.url and not iframe.url.startswith('data:'):
-					content += f'\n\nIFRAME {iframe.url}:\n'
-					content += markdownify.markdownify(await iframe.content())
+			chunked = params.chunked if params.chunked is not None else self.chunked_extraction
+			token_budget = params.max_tokens or (
+				self.extraction_chunk_tokens * MAX_CHUNKS if chunked else self.extraction_token_budget
+			)
+			# Pruned in the page, iframes included (also cross-origin ones), and cut to the token budget around the goal
+			content = await reduce_page_content(page, params.goal, token_budget)
+			logger.info(f'Extracting from {estimate_tokens(content)} tokens of page content')
+
+			model = model_id(page_extraction_llm)
+			cache_key = None
+			if self.extraction_cache:
+				cache_key = extraction_key(content, params.goal, model)
+				cached = await self.extraction_cache.lookup(cache_key)
+				stats = self.extraction_cache.stats
+				logger.info(
+					f'Extraction cache {"hit" if cached is not None else "miss"} '
+					f'({stats["hits"]} hits, {stats["misses"]} misses so far)'
+				)
+				if cached is not None:
+					msg = f'📄  Extracted from page\n: {cached}\n'
+					logger.info(msg)
+					return ActionResult(extracted_content=msg, include_in_memory=True)
 
 			prompt = 'Your task is to extract the content of the page. You will be given a page and a goal and you should extract all relevant information around this goal from the page. If the goal is vague, summarize the page. Respond in json format. Extraction goal: {goal}, Page: {page}'
 			template = PromptTemplate(input_variables=['goal', 'page'], template=prompt)
 			try:
-				output = await page_extraction_llm.ainvoke(template.format(goal=params.goal, page=content))
-				msg = f'📄  Extracted from page\n: {output.content}\n'
+				# An answer missing failed parts is not cached, so the next run retries them
+				complete = True
+				if chunked and estimate_tokens(content) > self.extraction_chunk_tokens:
+					extracted, complete = await extract_chunked(
+						page_extraction_llm,
+						content,
+						params.goal,
+						model=model,
+						chunk_tokens=self.extraction_chunk_tokens,
+						concurrency=self.extraction_concurrency,
+						cache=self.extraction_cache,
+					)
+				else:
+					extracted = (await page_extraction_llm.ainvoke(template.format(goal=params.goal, page=content))).content
+				if self.extraction_cache and cache_key and complete and isinstance(extracted, str):
+					await self.extraction_cache.store(cache_key, model, extracted)
+				msg = f'📄  Extracted from page\n: {extracted}\n'
 				logger.info(msg)
 				return ActionResult(extracted_content=msg, include_in_memory=True)
 			except Exception as e:
@@ -239,3 +316,15 @@ class WorkflowController(Controller):
 				msg = f'📄  Extracted from page\n: {content}\n'
 				logger.info(msg)
 				return ActionResult(extracted_content=msg)
+
+		@self.registry.action(
+			'Extract values from the page by CSS or XPath selector, e.g. the rows of a results table or known fields, without reading the whole page',
+			param_model=FieldExtractionAction,
+		)
+		async def extract_fields(params: FieldExtractionAction, browser_session: Browser) -> ActionResult:
+			page = await browser_session.get_current_page()
+			data = await extract_page_fields(page, params.fields)
+			# Plain JSON, so the workflow stores it in its context as an object
+			content = json.dumps(data, ensure_ascii=False)
+			logger.info(f'🗂️  Extracted fields {", ".join(data)}: {content[:500]}')
+			return ActionResult(extracted_content=content, include_in_memory=True)
@@ -0,0 +1,133 @@
+import asyncio
+import json
+
+import pytest
+from langchain_core.language_models.fake_chat_models import FakeListChatModel
+from langchain_core.messages import AIMessage
+
+from workflow_use.controller.chunked_extraction import (
+	extract_chunked,
+	merge_results,
+	merge_values,
+	parse_json_output,
+	split_chunks,
+)
+
+# Two paragraphs of 30 characters; with 10-token (40-character) chunks each one is a part of its own
+TWO_PARTS = 'First paragraph about a lamp..\n\nSecond paragraph, about a desk.'
+
+
+def test_short_content_is_one_chunk():
+	assert split_chunks('One paragraph.\n\nAnother one.', 100) == ['One paragraph.\n\nAnother one.']
+
+
+def test_chunks_split_at_paragraphs_and_overlap():
+	paragraphs = [f'p{i:02} ' + 'x' * 16 for i in range(12)]
+
+	chunks = split_chunks('\n\n'.join(paragraphs), 25)
+
+	assert len(chunks) > 1
+	assert all(len(chunk) <= 100 for chunk in chunks)
+	assert all(any(paragraph in chunk.split('\n\n') for chunk in chunks) for paragraph in paragraphs)
+	# The next chunk starts with the last paragraph of the previous one
+	for previous, chunk in zip(chunks, chunks[1:]):
+		assert chunk.split('\n\n')[0] == previous.split('\n\n')[-1]
+
+
+def test_long_paragraph_is_cut_at_words():
+	words = [f'word{i}' for i in range(60)]
+
+	chunks = split_chunks(' '.join(words), 10)
+
+	assert all(len(chunk) <= 40 for chunk in chunks)
+	assert ' '.join(chunks).split() == words
+
+
+@pytest.mark.parametrize(
+	'text, expected',
+	[
+		('{"a": 1}', {'a': 1}),
+		('```json\n{"a": [1, 2]}\n```', {'a': [1, 2]}),
+		('Here is the result: [1, 2] as asked.', [1, 2]),
+		('"just a string"', 'just a string'),
+		('No JSON here', None),
+		('Broken {"a": ', None),
+	],
+)
+def test_parse_json_output(text, expected):
+	assert parse_json_output(text) == expected
+
+
+def test_merge_values():
+	first = {'title': 'Lamp', 'items': [{'id': 1}, {'id': 2}], 'price': None, 'meta': {'page': 1}}
+	second = {'title': 'Desk', 'items': [{'id': 2}, {'id': 3}], 'price': 9.5, 'meta': {'lang': 'en'}}
+
+	assert merge_values(first, second) == {
+		'title': 'Lamp',
+		'items': [{'id': 1}, {'id': 2}, {'id': 3}],
+		'price': 9.5,
+		'meta': {'page': 1, 'lang': 'en'},
+	}
+
+
+@pytest.mark.parametrize(
+	'first, second, expected',
+	[
+		({}, {'a': 1}, {'a': 1}),
+		('', 'text', 'text'),
+		([1], 2, [1, 2]),
+		('a', ['a', 'b'], ['a', 'b']),
+		('first', 'second', 'first'),
+	],
+)
+def test_merge_values_edge_cases(first, second, expected):
+	assert merge_values(first, second) == expected
+
+
+def test_merge_results():
+	assert merge_results([]) == {}
+	assert merge_results([None, {'a': [1]}, {}, {'a': [1, 2]}]) == {'a': [1, 2]}
+
+
+def test_json_parts_are_merged_without_the_llm():
+	llm = FakeListChatModel(responses=['```json\n{"items": [1, 2]}\n```', '{"items": [2, 3], "title": "Lamp"}'])
+
+	result, complete = asyncio.run(extract_chunked(llm, TWO_PARTS, 'all items', model='fake', chunk_tokens=10, concurrency=1))
+
+	assert json.loads(result) == {'items': [1, 2, 3], 'title': 'Lamp'}
+	assert complete
+
+
+def test_prose_parts_are_combined_by_the_llm():
+	llm = FakeListChatModel(responses=['{"items": [1]}', 'There is a desk.', '{"items": [1], "desk": true}'])
+
+	result, complete = asyncio.run(extract_chunked(llm, TWO_PARTS, 'all items', model='fake', chunk_tokens=10, concurrency=1))
+
+	assert result == '{"items": [1], "desk": true}'
+	assert complete
+
+
+class FailingPartLLM:
+	"""Answers every part except the one mentioning *failing*, whose call raises."""
+
+	def __init__(self, failing):
+		self.failing = failing
+
+	async def ainvoke(self, prompt):
+		if self.failing in prompt:
+			raise RuntimeError('rate limited')
+		return AIMessage(content='{"items": [1]}')
+
+
+def test_failed_parts_make_the_answer_incomplete():
+	result, complete = asyncio.run(
+		extract_chunked(FailingPartLLM('Second'), TWO_PARTS, 'all items', model='fake', chunk_tokens=10, concurrency=1)
+	)
+
+	assert json.loads(result) == {'items': [1]}
+	assert not complete
+
+
+def test_all_parts_failing_raises():
+	with pytest.raises(RuntimeError):
+		asyncio.run(extract_chunked(FailingPartLLM('paragraph'), TWO_PARTS, 'all items', model='fake', chunk_tokens=10))
@@ -1,3 +1,4 @@
+import asyncio
 import logging
 import re
 
@@ -9,42 +10,175 @@ def truncate_selector(selector: str, max_length: int = 35) -> str:
 	return selector if len(selector) <= max_length else f'{selector[:max_length]}...'
 
 
-async def get_best_element_handle(page, selector, params=None, timeout_ms=500):
-	"""Find element using stability-ranked selector strategies."""
+# Checks every candidate in a single round trip and returns the index of the best-ranked
+# (lowest index) candidate with a visible match. If nothing matches yet, re-checks on DOM
+# mutations (plus a slow poll for style-only changes) until `timeoutMs`. When only a
+# lower-ranked candidate matches, waits up to `graceMs` for a better one to appear.
+RESOLVE_CANDIDATES_SCRIPT = """
+({ candidates, timeoutMs, graceMs }) => new Promise((resolve) => {
+	const unsupported = new Set();
+	const isVisible = (el) => {
+		const rect = el.getBoundingClientRect();
+		if (rect.width === 0 || rect.height === 0) return false;
+		return window.getComputedStyle(el).visibility !== 'hidden';
+	};
+	const shadowRoots = () => {
+		const roots = [];
+		const walker = document.createTreeWalker(document, NodeFilter.SHOW_ELEMENT);
+		for (let node = walker.nextNode(); node; node = walker.nextNode()) {
+			if (node.shadowRoot) roots.push(node.shadowRoot);
+		}
+		return roots;
+	};
+	const matches = (candidate, root) => {
+		if (candidate.kind === 'xpath') {
+			if (root !== document) return [];
+			const snapshot = document.evaluate(candidate.value, document, null, XPathResult.ORDERED_NODE_SNAPSHOT_TYPE, null);
+			const nodes = [];
+			for (let i = 0; i < snapshot.snapshotLength; i++) nodes.push(snapshot.snapshotItem(i));
+			return nodes.filter((node) => node.nodeType === Node.ELEMENT_NODE);
+		}
+		if (candidate.kind === 'text') {
+			const needle = candidate.text.replace(/\\s+/g, ' ').trim().toLowerCase();
+			return [...root.querySelectorAll(candidate.tag)].filter((el) =>
+				(el.textContent || '').replace(/\\s+/g, ' ').toLowerCase().includes(needle)
+			);
+		}
+		return [...root.querySelectorAll(candidate.value)];
+	};
+	const best = (roots) => {
+		for (let i = 0; i < candidates.length; i++) {
+			if (unsupported.has(i)) continue;
+			try {
+				for (const root of roots) {
+					if (matches(candidates[i], root).some(isVisible)) return i;
+				}
+			} catch (e) {
+				unsupported.add(i);  // not valid for querySelector/evaluate, e.g. Playwright-only syntax
+			}
+		}
+		return -1;
+	};
+	const check = () => {
+		let index = best([document]);
+		if (index === -1) index = best(shadowRoots());
+		return index;
+	};
+
+	let found = -1;
+	let graceTimer = null;
+	let scheduled = false;
+	const finish = () => {
+		observer.disconnect();
+		clearInterval(poll);
+		clearTimeout(hardTimer);
+		clearTimeout(graceTimer);
+		resolve({ index: found, unsupported: [...unsupported] });
+	};
+	const recheck = () => {
+		scheduled = false;
+		const index = check();
+		if (index !== -1 && (found === -1 || index < found)) found = index;
+		if (found === 0) return finish();
+		if (found !== -1 && graceTimer === null) graceTimer = setTimeout(finish, graceMs);
+	};
+	const schedule = () => {
+		if (scheduled) return;
+		scheduled = true;
+		requestAnimationFrame(recheck);
+		setTimeout(() => scheduled && recheck(), 50);  // rAF does not fire in background tabs
+	};
+	const observer = new MutationObserver(schedule);
+	observer.observe(document, { subtree: true, childList: true, attributes: true, characterData: true });
+	const poll = setInterval(schedule, 100);
+	const hardTimer = setTimeout(finish, timeoutMs);
+	recheck();
+})
+"""
+
+_HAS_TEXT_PATTERN = re.compile(r"^([a-zA-Z][a-zA-Z0-9-]*):has-text\('(.*)'\)$", re.DOTALL)
+
+
+def build_selector_candidates(selector, params=None, preferred_selectors=None, candidates=None):
+	"""Return all selectors to try, best-ranked first: preferred, original, CSS fallbacks, then XPaths.
+
+	*candidates* may be a list computed ahead of time by an earlier call without preferred selectors.
+	"""
+	if candidates is None:
+		candidates = [selector] + generate_stable_selectors(selector, params)
+		if params and getattr(params, 'xpath', None):
+			xpath_alternatives = [params.xpath] + generate_stable_xpaths(params.xpath, params)
+			candidates.extend(f'xpath={try_xpath}' for try_xpath in xpath_alternatives)
+
+	return list(dict.fromkeys(list(preferred_selectors or []) + list(candidates)))
+
+
+def _describe_candidate(candidate):
+	"""Translate a Playwright selector string into what the in-page resolver understands."""
+	if candidate.startswith('xpath='):
+		return {'kind': 'xpath', 'value': candidate[len('xpath=') :]}
+	text_match = _HAS_TEXT_PATTERN.match(candidate)
+	if text_match:
+		return {'kind': 'text', 'tag': text_match.group(1), 'text': text_match.group(2)}
+	return {'kind': 'css', 'value': candidate}
+
+
+async def get_best_element_handle(
+	page, selector, params=None, timeout_ms=500, grace_ms=100, preferred_selectors=None, candidates=None
+):
+	"""Find element using stability-ranked selector strategies.
+
+	All candidates are checked by one injected script that waits for DOM mutations, so a broken
+	primary selector costs about as much as a direct hit instead of one timeout per fallback.
+	*preferred_selectors* (e.g. the selector that won on a previous run) are ranked first;
+	precomputed *candidates* skip generating the fallbacks again.
+	"""
 	original_selector = selector
-
-	# Generate stability-ranked fallback selectors
-	fallbacks = generate_stable_selectors(selector, params)
-
-	# Try all selectors with exponential backoff for timeouts
-	selectors_to_try = [original_selector] + fallbacks
-
-	for try_selector in selectors_to_try:
+	candidates = build_selector_candidates(selector, params, preferred_selectors, candidates)
+	logger.info(f'Resolving element from {len(candidates)} candidates, original: {truncate_selector(original_selector)}')
+
+	loop = asyncio.get_running_loop()
+	deadline = loop.time() + timeout_ms / 1000
+	resolution = None
+	while resolution is None:
+		remaining_ms = max(0, int((deadline - loop.time()) * 1000))
+		try:
+			resolution = await page.evaluate(
+				RESOLVE_CANDIDATES_SCRIPT,
+				{
+					'candidates': [_describe_candidate(candidate) for candidate in candidates],
+					'timeoutMs': remaining_ms,
+					'graceMs': grace_ms,
+				},
+			)
+		except Exception as e:
+			# A navigation destroys the execution context mid-wait; retry on the new document
+			if remaining_ms <= 0 or 'context was destroyed' not in str(e).lower():
+				logger.error(f'Element resolution failed: {e}')
+				resolution = {'index': -1, 'unsupported': []}
+			else:
+				try:
+					await page.wait_for_load_state('domcontentloaded', timeout=remaining_ms)
+				except Exception:
+					pass
+
+	index = resolution['index']
+	if index >= 0:
+		selector_used = candidates[index]
+		logger.info(f'Found element with selector: {truncate_selector(selector_used)}')
+		return page.locator(f'{selector_used} >> visible=true').first, selector_used
+
+	# Selectors only Playwright understands get a last, short check each
+	for unsupported_index in resolution['unsupported']:
+		try_selector = candidates[unsupported_index]
 		try:
-			logger.info(f'Trying selector: {truncate_selector(try_selector)}')
 			locator = page.locator(try_selector)
-			await locator.wait_for(state='visible', timeout=timeout_ms)
+			await locator.first.wait_for(state='visible', timeout=100)
 			logger.info(f'Found element with selector: {truncate_selector(try_selector)}')
-			return locator, try_selector
+			return locator.first, try_selector
 		except Exception as e:
 			logger.error(f'Selector failed: {truncate_selector(try_selector)} with error: {e}')
 
-	# Try XPath as last resort
-	if params and getattr(params, 'xpath', None):
-		xpath = params.xpath
-		try:
-			# Generate stable XPath alternatives
-			xpath_alternatives = [xpath] + generate_stable_xpaths(xpath, params)
-
-			for try_xpath in xpath_alternatives:
-				xpath_selector = f'xpath={try_xpath}'
-				logger.info(f'Trying XPath: {truncate_selector(xpath_selector)}')
-				locator = page.locator(xpath_selector)
-				await locator.wait_for(state='visible', timeout=timeout_ms)
-				return locator, xpath_selector
-		except Exception as e:
-			logger.error(f'All XPaths failed with error: {e}')
-
 	raise Exception(f'Failed to find element. Original: {original_selector}')
 
 
@@ -1,6 +1,8 @@
-from typing import Literal, Optional
+from typing import Any, Callable, Dict, List, Literal, Optional
 
-from pydantic import BaseModel
+from pydantic import BaseModel, ConfigDict
+
+from workflow_use.schema.views import ExtractionField
 
 
 # Shared config allowing extra fields so recorder payloads pass through
@@ -79,3 +81,41 @@ class PageExtractionAction(_BaseExtra):
 
 	type: Literal['extract_page_content']
 	goal: str
+	max_tokens: Optional[int] = None
+	chunked: Optional[bool] = None
+
+
+class FieldExtractionAction(_BaseExtra):
+	"""Parameters for extracting values from the page by selector."""
+
+	type: Literal['extract_fields']
+	fields: Dict[str, ExtractionField]
+
+
+class ActionContext(BaseModel):
+	"""Per-step hints and feedback exchanged with deterministic actions.
+
+	Passed through the registry's ``context`` argument: the workflow fills in what it
+	already knows before the action runs and reads back what the action found.
+	"""
+
+	model_config = ConfigDict(arbitrary_types_allowed=True)
+
+	preferred_selectors: List[str] = []
+	# Element resolver candidates compiled ahead of time for this step, if any
+	selector_candidates: Optional[List[str]] = None
+	# Element already located for this step (e.g. by the previous step's lookahead), with its selector
+	locator: Optional[Any] = None
+	selector_used: Optional[str] = None
+	# Called once the action has triggered its effect and only waits for the page to settle
+	on_dispatched: Optional[Callable[[], None]] = None
+
+	def element_hints(self) -> dict:
+		"""Keyword arguments for ``get_best_element_handle``."""
+		return {'preferred_selectors': self.preferred_selectors, 'candidates': self.selector_candidates}
+
+	def dispatched(self) -> None:
+		"""Signal that the action's effect was triggered, so work for the next step may start."""
+		callback, self.on_dispatched = self.on_dispatched, None
+		if callback:
+			callback()
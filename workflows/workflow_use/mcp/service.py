@@ -1,12 +1,16 @@
 import json as _json
+from contextlib import asynccontextmanager
 from inspect import Parameter, Signature
-from pathlib import Path
 from typing import Any
 
+from browser_use.agent.views import AgentHistoryList
 from fastmcp import FastMCP
 from langchain_core.language_models.chat_models import BaseChatModel
 
+from workflow_use.browser.service import BrowserPool
 from workflow_use.schema.views import WorkflowDefinitionSchema
+from workflow_use.workflow.catalog import WorkflowCatalog
+from workflow_use.workflow.rate_limit import OriginRateLimiter
 from workflow_use.workflow.service import Workflow
 
 
@@ -16,32 +20,66 @@ def get_mcp_server(
 	workflow_dir: str = './tmp',
 	name: str = 'WorkflowService',
 	description: str = 'Exposes workflows as MCP tools.',
+	browser_pool: BrowserPool | None = None,
+	rate_limiter: OriginRateLimiter | None = None,
 ):
-	mcp_app = FastMCP(name=name, description=description)
+	# All tools lease from one shared pool so a tool call never pays the browser launch cost; a pool
+	# created here lives as long as the server, one passed in belongs to the caller
+	owned_pool = browser_pool is None
+	browser_pool = browser_pool or BrowserPool(size=1, contexts_per_process=4)
+
+	@asynccontextmanager
+	async def lifespan(_server: FastMCP):
+		# The catalog's watcher keeps the workflows current while the server runs, so tool calls never rescan
+		catalog.start()
+		try:
+			yield
+		finally:
+			await catalog.stop()
+			if owned_pool:
+				await browser_pool.close()
+
+	mcp_app = FastMCP(name=name, description=description, lifespan=lifespan)
 
-	_setup_workflow_tools(mcp_app, llm_instance, page_extraction_llm, workflow_dir)
+	catalog = _setup_workflow_tools(mcp_app, llm_instance, page_extraction_llm, workflow_dir, browser_pool, rate_limiter)
 	return mcp_app
 
 
 def _setup_workflow_tools(
-	mcp_app: FastMCP, llm_instance: BaseChatModel, page_extraction_llm: BaseChatModel | None, workflow_dir: str
-):
+	mcp_app: FastMCP,
+	llm_instance: BaseChatModel,
+	page_extraction_llm: BaseChatModel | None,
+	workflow_dir: str,
+	browser_pool: BrowserPool,
+	rate_limiter: OriginRateLimiter | None = None,
+) -> WorkflowCatalog:
 	"""
-	Scans a directory for workflow.json files, loads them, and registers them as tools
+	Indexes a directory of workflow.json files and registers them as tools
 	with the FastMCP instance by dynamically setting function signatures.
+	Returns the catalog the tools look their workflows up in.
 	"""
-	workflow_files = list(Path(workflow_dir).glob('*.workflow.json'))
-	print(f"[FastMCP Service] Found workflow files in '{workflow_dir}': {len(workflow_files)}")
 
-	for wf_file_path in workflow_files:
+	def build_workflow(schema: WorkflowDefinitionSchema) -> Workflow:
+		return Workflow(
+			workflow_schema=schema,
+			llm=llm_instance,
+			page_extraction_llm=page_extraction_llm,
+			browser_pool=browser_pool,
+			controller=None,
+			rate_limiter=rate_limiter,
+		)
+
+	catalog = WorkflowCatalog(workflow_dir, pattern='*.workflow.json', workflow_factory=build_workflow)
+	catalog.refresh()
+	entries = catalog.list()
+	print(f"[FastMCP Service] Found workflow files in '{workflow_dir}': {len(entries)}")
+
+	for entry in entries:
+		wf_file_path = catalog.directory / entry.file
 		try:
 			print(f'[FastMCP Service] Loading workflow from: {wf_file_path}')
-			schema = WorkflowDefinitionSchema.load_from_json(str(wf_file_path))
-
-			# Instantiate the workflow
-			workflow = Workflow(
-				workflow_schema=schema, llm=llm_instance, page_extraction_llm=page_extraction_llm, browser=None, controller=None
-			)
+			schema = catalog.get_schema(entry.file)
+			workflow = catalog.get_workflow(entry.file)
 
 			params_for_signature = []
 			annotations_for_runner = {}
@@ -71,19 +109,36 @@ def _setup_workflow_tools(
 			dynamic_func_name = f'tool_runner_{safe_workflow_name_for_func}_{schema.version.replace(".", "_")}'
 
 			# Define the actual function that will be called by FastMCP
-			# It uses a closure to capture the specific 'workflow' instance
-			def create_runner(wf_instance: Workflow):
+			# It uses a closure to capture the workflow file; edits to its steps are picked up once the
+			# catalog's watcher saw them (the tool's parameters stay those it was registered with)
+			def create_runner(wf_file: str):
 				async def actual_workflow_runner(**kwargs):
-					# kwargs will be populated by FastMCP based on the dynamic_signature
-					raw_result = await wf_instance.run(inputs=kwargs)
+					wf_instance = catalog.get_workflow(wf_file)
+					# kwargs will be populated by FastMCP based on the dynamic_signature.
+					# Only a summary of every step is kept, not the full results and agent histories.
+					summary: dict[str, Any] = {'steps': []}
+					async for event in wf_instance.run_iter(inputs=kwargs):
+						if event.type == 'step_completed':
+							result = event.result
+							content = result.final_result() if isinstance(result, AgentHistoryList) else result.extracted_content
+							summary['steps'].append(
+								{
+									'step': event.step_index,
+									'type': event.step_type,
+									'extracted_content': content,
+									'fallback_used': event.fallback_used,
+								}
+							)
+						elif event.type == 'run_finished':
+							summary.update(status=event.status, message=event.message)
 					try:
-						return _json.dumps(raw_result, default=str)
+						return _json.dumps(summary, default=str)
 					except Exception:
-						return str(raw_result)
+						return str(summary)
 
 				return actual_workflow_runner
 
-			runner_func_impl = create_runner(workflow)
+			runner_func_impl = create_runner(entry.file)
 
 			# Set the dunder attributes that FastMCP will inspect
 			runner_func_impl.__name__ = dynamic_func_name
@@ -108,3 +163,5 @@ def _setup_workflow_tools(
 			import traceback
 
 			traceback.print_exc()
+
+	return catalog
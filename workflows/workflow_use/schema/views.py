@@ -1,6 +1,35 @@
-from typing import List, Literal, Optional, Union
+from typing import Dict, List, Literal, Optional, Union
 
-from pydantic import BaseModel, Field
+from pydantic import BaseModel, Field, field_validator
+
+
+# --- Readiness Policy ---
+# Declares what has to happen on the page before a step may run
+class ReadinessPolicy(BaseModel):
+	type: Literal['auto', 'none', 'selector', 'url_change', 'dom_quiet', 'request', 'network_idle'] = Field(
+		'auto',
+		description=(
+			"What to wait for before running the step. 'auto' picks one from the step type: the target element "
+			'for selector-based steps, DOM quiescence for extraction/conditional steps and nothing otherwise.'
+		),
+	)
+	selector: Optional[str] = Field(None, description="CSS selector for 'selector' (defaults to the step's cssSelector).")
+	url_pattern: Optional[str] = Field(
+		None,
+		description="Glob the URL must match for 'url_change' (default: any change), or the request URL glob for 'request'.",
+	)
+	quiet_ms: int = Field(300, description="Length of the mutation-free window for 'dom_quiet', in ms.")
+	timeout_ms: Optional[int] = Field(None, description='Maximum time to wait, in ms (default handled in code).')
+
+
+# --- Rate Limit ---
+# Caps how fast runs act on one origin, shared by all runs of the workflow
+class RateLimit(BaseModel):
+	requests_per_second: float = Field(..., gt=0, description='Average number of actions per second allowed on an origin.')
+	burst: int = Field(1, ge=1, description='Number of actions that may run back to back before the rate applies.')
+	max_concurrent: Optional[int] = Field(
+		None, ge=1, description='Number of actions that may run on an origin at once, across all runs (default: unlimited).'
+	)
 
 
 # --- Base Step Model ---
@@ -8,9 +37,19 @@ from pydantic import BaseModel, Field
 class BaseWorkflowStep(BaseModel):
 	description: Optional[str] = Field(None, description="Optional description/comment about the step's purpose.")
 	output: Optional[str] = Field(None, description='Context key to store step output under.')
+	wait_for: Optional[ReadinessPolicy] = Field(None, description='What to wait for before running this step (default: auto).')
 	# Allow other fields captured from raw events but not explicitly modeled
 	model_config = {'extra': 'allow'}
 
+	@field_validator('wait_for', mode='before')
+	@classmethod
+	def _legacy_wait_for(cls, value):
+		# Older workflows store a bare selector to wait for *after* the step. The next step's
+		# auto policy already waits for its own target element, so treat those as auto.
+		if isinstance(value, str):
+			return None
+		return value
+
 
 # --- Timestamped Step Mixin (for deterministic actions) ---
 class TimestampedWorkflowStep(BaseWorkflowStep):
@@ -93,6 +132,41 @@ class PageExtractionStep(TimestampedWorkflowStep):
 
 	type: Literal['extract_page_content']  # Assumed type for workflow controller's page_extraction
 	goal: str = Field(..., description='The goal of the page extraction.')
+	max_tokens: Optional[int] = Field(
+		None, gt=0, description='Maximum size of the page content given to the LLM, in tokens (default: the controller budget).'
+	)
+	chunked: Optional[bool] = Field(
+		None,
+		description='Extract long pages in overlapping chunks with parallel LLM calls and merge the results (default: the controller setting).',
+	)
+
+
+# A value to read from the page, found by selector; with nested fields, an object per matched element
+class ExtractionField(BaseModel):
+	selector: str = Field(
+		...,
+		description=(
+			'CSS selector, or XPath when starting with "/", "./", "(" or "xpath=". '
+			"Nested fields are searched within their parent's element (use './/' for relative XPath)."
+		),
+	)
+	attribute: Optional[str] = Field(
+		None, description="Attribute or property to read, e.g. 'href' or 'value' (default: the element's visible text)."
+	)
+	multiple: bool = Field(False, description='Return a list with a value per matching element instead of the first match.')
+	required: bool = Field(False, description='Fail the step when nothing matches.')
+	fields: Optional[Dict[str, 'ExtractionField']] = Field(
+		None, description='Fields to read within each matched element; the value is then an object of these.'
+	)
+
+
+class FieldExtractionStep(TimestampedWorkflowStep):
+	"""Extracts values by selector using 'extract_fields', in the page and without an LLM."""
+
+	type: Literal['extract_fields']
+	fields: Dict[str, ExtractionField] = Field(
+		..., min_length=1, description='Values to extract by name; the result is an object with the same keys.'
+	)
 
 
 class ConditionalStep(BaseWorkflowStep):
@@ -116,6 +190,7 @@ DeterministicWorkflowStep = Union[
 	KeyPressStep,
 	ScrollStep,
 	PageExtractionStep,
+	FieldExtractionStep,
 	ConditionalStep,
 ]
 
@@ -170,6 +245,13 @@ class WorkflowDefinitionSchema(BaseModel):
 		# default=WorkflowInputSchemaDefinition(),
 		description='List of input schema definitions.',
 	)
+	rate_limits: Dict[str, RateLimit] = Field(
+		default_factory=dict,
+		description=(
+			'Limits of navigations and page interactions per origin, keyed by origin glob '
+			"(e.g. 'https://*.example.com', or '*' for every origin)."
+		),
+	)
 
 	# Add loader from json file
 	@classmethod
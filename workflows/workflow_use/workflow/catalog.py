@@ -0,0 +1,195 @@
+"""
+In-memory index of a directory of workflow files, kept current by polling modification times.
+"""
+
+import asyncio
+import fnmatch
+import hashlib
+import logging
+import os
+import threading
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Callable, Dict, List, Optional, Sequence
+
+from workflow_use.schema.views import WorkflowDefinitionSchema
+from workflow_use.workflow.service import Workflow
+from workflow_use.workflow.views import CatalogEntry
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_POLL_INTERVAL = 2.0
+
+
+@dataclass
+class _CatalogItem:
+	entry: CatalogEntry
+	text: str
+	mtime_ns: int
+	schema: Optional[WorkflowDefinitionSchema]
+	# Built on first use and dropped together with the item when the file changes
+	workflow: Optional[Workflow] = None
+
+
+class WorkflowCatalog:
+	"""Parsed workflow definitions of a directory, served from memory.
+
+	Files are only read again when their modification time or size changes; a background
+	watcher (:py:meth:`start`) rescans the directory every ``poll_interval`` seconds, and a
+	lookup of a file that is not indexed yet checks that single file. With a
+	``workflow_factory``, ready-to-run Workflow instances are cached per file contents too.
+	"""
+
+	def __init__(
+		self,
+		directory: str | Path = './tmp',
+		*,
+		pattern: str = '*',
+		exclude: Sequence[str] = (),
+		workflow_factory: Callable[[WorkflowDefinitionSchema], Workflow] | None = None,
+		poll_interval: float = DEFAULT_POLL_INTERVAL,
+	) -> None:
+		"""Initialize a new WorkflowCatalog.
+
+		Args:
+			directory: Directory containing the workflow files (not searched recursively)
+			pattern: Glob pattern file names must match
+			exclude: Glob patterns of file names to leave out
+			workflow_factory: Builds the Workflow for a parsed definition, used by get_workflow()
+			poll_interval: Seconds between two rescans of the directory by the watcher
+		"""
+		self.directory = Path(directory)
+		self.pattern = pattern
+		self.exclude = tuple(exclude)
+		self.workflow_factory = workflow_factory
+		self.poll_interval = poll_interval
+
+		self._items: Dict[str, _CatalogItem] = {}
+		self._lock = threading.Lock()
+		self._watcher: Optional[asyncio.Task] = None
+
+	# --- Indexing ---
+	def _matches(self, file: str) -> bool:
+		return fnmatch.fnmatch(file, self.pattern) and not any(fnmatch.fnmatch(file, pattern) for pattern in self.exclude)
+
+	def _load(self, file: str, stat: os.stat_result) -> _CatalogItem:
+		data = (self.directory / file).read_bytes()
+		content_hash = hashlib.sha256(data).hexdigest()
+
+		previous = self._items.get(file)
+		if previous and previous.entry.content_hash == content_hash:
+			# Touched but not changed: keep the parsed schema and the built workflow
+			previous.mtime_ns = stat.st_mtime_ns
+			previous.entry.modified_at = stat.st_mtime
+			return previous
+
+		text = data.decode('utf-8', errors='replace')
+		entry = CatalogEntry(file=file, content_hash=content_hash, size=stat.st_size, modified_at=stat.st_mtime)
+		schema = None
+		try:
+			schema = WorkflowDefinitionSchema.model_validate_json(data)
+			entry.name = schema.name
+			entry.description = schema.description
+			entry.version = schema.version
+			entry.step_count = len(schema.steps)
+			entry.inputs = list(schema.input_schema)
+		except ValueError as e:
+			entry.error = str(e)
+		return _CatalogItem(entry=entry, text=text, mtime_ns=stat.st_mtime_ns, schema=schema)
+
+	def refresh(self) -> bool:
+		"""Rescan the directory, re-reading only changed files; returns whether anything changed."""
+		with self._lock:
+			items: Dict[str, _CatalogItem] = {}
+			if self.directory.is_dir():
+				for dir_entry in os.scandir(self.directory):
+					if not dir_entry.is_file() or not self._matches(dir_entry.name):
+						continue
+					stat = dir_entry.stat()
+					item = self._items.get(dir_entry.name)
+					if item is None or item.mtime_ns != stat.st_mtime_ns or item.entry.size != stat.st_size:
+						try:
+							item = self._load(dir_entry.name, stat)
+						except OSError as e:
+							# Removed or unreadable since the scan: it shows up again on the next one
+							logger.debug(f'Could not read workflow file {dir_entry.name}: {e}')
+							continue
+					items[dir_entry.name] = item
+
+			changed = items.keys() != self._items.keys() or any(item is not self._items[file] for file, item in items.items())
+			self._items = items
+			return changed
+
+	def _item(self, file: str) -> Optional[_CatalogItem]:
+		item = self._items.get(file)
+		if item is not None or Path(file).name != file or not self._matches(file):
+			return item
+		# Not indexed (yet), e.g. saved after the last rescan
+		with self._lock:
+			try:
+				item = self._load(file, (self.directory / file).stat())
+			except OSError:
+				return None
+			self._items = {**self._items, file: item}
+			return item
+
+	def invalidate(self, file: str | None = None) -> None:
+		"""Forget one file (or everything), so it is read again on the next access."""
+		with self._lock:
+			self._items = {} if file is None else {name: item for name, item in self._items.items() if name != file}
+
+	# --- Lookups (served from memory) ---
+	def list(self) -> List[CatalogEntry]:
+		return [item.entry for _, item in sorted(self._items.items())]
+
+	def get_entry(self, file: str) -> Optional[CatalogEntry]:
+		item = self._item(file)
+		return item.entry if item else None
+
+	def get_text(self, file: str) -> Optional[str]:
+		item = self._item(file)
+		return item.text if item else None
+
+	def _valid_item(self, file: str) -> _CatalogItem:
+		item = self._item(file)
+		if item is None:
+			raise KeyError(f'Workflow {file} not found')
+		if item.schema is None:
+			raise ValueError(f'Workflow {file} is invalid: {item.entry.error}')
+		return item
+
+	def get_schema(self, file: str) -> WorkflowDefinitionSchema:
+		schema = self._valid_item(file).schema
+		assert schema is not None
+		return schema
+
+	def get_workflow(self, file: str) -> Workflow:
+		"""Return the Workflow for the current contents of *file*, built once per version."""
+		item = self._valid_item(file)
+		if item.workflow is None:
+			assert item.schema is not None
+			factory = self.workflow_factory or (lambda schema: Workflow(schema))
+			item.workflow = factory(item.schema)
+		return item.workflow
+
+	# --- Watching ---
+	def start(self) -> None:
+		"""Index the directory now and keep the index current in the background."""
+		self.refresh()
+		if self._watcher is None:
+			self._watcher = asyncio.create_task(self._watch())
+
+	async def stop(self) -> None:
+		if self._watcher:
+			self._watcher.cancel()
+			await asyncio.gather(self._watcher, return_exceptions=True)
+			self._watcher = None
+
+	async def _watch(self) -> None:
+		while True:
+			await asyncio.sleep(self.poll_interval)
+			try:
+				if await asyncio.to_thread(self.refresh):
+					logger.debug(f'Workflow catalog of {self.directory} changed, {len(self._items)} files indexed')
+			except Exception as e:
+				logger.warning(f'Could not rescan workflow directory {self.directory}: {e}')
@@ -0,0 +1,129 @@
+"""
+Checkpoints that let a failed or interrupted workflow run continue where it stopped.
+"""
+
+import asyncio
+import json
+import logging
+import os
+import re
+from pathlib import Path
+from typing import Any, Dict, List, Optional
+
+from browser_use import Browser
+
+from workflow_use.workflow.views import Checkpoint
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_CHECKPOINT_DIR = Path('./tmp') / 'checkpoints'
+
+# Puts the checkpointed localStorage back once per tab and origin; the marker lives in
+# sessionStorage so later page loads in the same tab keep what the site wrote since
+RESTORE_LOCAL_STORAGE_SCRIPT = """
+(() => {
+	const origins = %s;
+	const marker = '__workflow_use_restored__';
+	const entry = origins.find((item) => item.origin === window.location.origin);
+	try {
+		if (!entry || window.sessionStorage.getItem(marker)) return;
+		for (const { name, value } of entry.localStorage) window.localStorage.setItem(name, value);
+		window.sessionStorage.setItem(marker, '1');
+	} catch (e) {}
+})();
+"""
+
+_RUN_ID_PATTERN = re.compile(r'^[A-Za-z0-9_.-]+$')
+
+
+class CheckpointStore:
+	"""Keeps the latest checkpoint of every run as one JSON file per run id.
+
+	Checkpoints are plain JSON holding the run's inputs and step outputs, readable only by the
+	current user. The browser's cookies and localStorage are only included with
+	``capture_storage_state=True``: they usually hold session tokens, so enable it only where the
+	checkpoint directory is as trusted as the browser profile itself. Without them a resumed run
+	starts from the checkpointed URL in a fresh context, e.g. logged out.
+	"""
+
+	def __init__(self, directory: str | Path = DEFAULT_CHECKPOINT_DIR, *, capture_storage_state: bool = False) -> None:
+		self.directory = Path(directory)
+		self.directory.mkdir(parents=True, exist_ok=True)
+		self.capture_storage_state = capture_storage_state
+
+	def _path(self, run_id: str) -> Path:
+		if not _RUN_ID_PATTERN.match(run_id):
+			raise ValueError(f'Invalid run id for a checkpoint: {run_id!r}')
+		return self.directory / f'{run_id}.json'
+
+	def save(self, checkpoint: Checkpoint) -> None:
+		path = self._path(checkpoint.run_id)
+		tmp_path = path.with_suffix('.json.tmp')
+		fd = os.open(tmp_path, os.O_WRONLY | os.O_CREAT | os.O_TRUNC, 0o600)
+		with os.fdopen(fd, 'w', encoding='utf-8') as f:
+			f.write(checkpoint.model_dump_json())
+		# Atomic on POSIX and Windows: a crash leaves either the old or the new checkpoint
+		os.replace(tmp_path, path)
+
+	def load(self, run_id: str) -> Optional[Checkpoint]:
+		path = self._path(run_id)
+		if not path.exists():
+			return None
+		return Checkpoint.model_validate_json(path.read_text(encoding='utf-8'))
+
+	def delete(self, run_id: str) -> None:
+		self._path(run_id).unlink(missing_ok=True)
+
+	def list_run_ids(self) -> List[str]:
+		return sorted(path.stem for path in self.directory.glob('*.json'))
+
+	def prune(self, older_than: float) -> int:
+		"""Delete checkpoints last written before *older_than* (a Unix timestamp); returns the number deleted."""
+		deleted = 0
+		for path in self.directory.glob('*.json'):
+			try:
+				if path.stat().st_mtime < older_than:
+					path.unlink()
+					deleted += 1
+			except FileNotFoundError:
+				# Deleted by the run that finished meanwhile
+				pass
+		return deleted
+
+	# --- Async wrappers used from the run loop ---
+	async def asave(self, checkpoint: Checkpoint) -> None:
+		await asyncio.to_thread(self.save, checkpoint)
+
+	async def aload(self, run_id: str) -> Optional[Checkpoint]:
+		return await asyncio.to_thread(self.load, run_id)
+
+	async def adelete(self, run_id: str) -> None:
+		await asyncio.to_thread(self.delete, run_id)
+
+
+async def capture_browser_state(browser: Browser, include_storage: bool = True) -> tuple[Optional[str], Dict[str, Any]]:
+	"""Return the current URL and (with *include_storage*) the cookies/localStorage of the browser's context."""
+	page = await browser.get_current_page()
+	storage_state: Dict[str, Any] = {}
+	if include_storage and browser.browser_context:
+		storage_state = await browser.browser_context.storage_state()
+	return page.url, storage_state
+
+
+async def restore_browser_state(browser: Browser, url: Optional[str], storage_state: Dict[str, Any]) -> None:
+	"""Load a captured storage state into the browser's context and reopen the captured URL."""
+	context = browser.browser_context
+	if context is None:
+		raise RuntimeError('Cannot restore a checkpoint into a browser that has not been started')
+
+	if storage_state.get('cookies'):
+		await context.add_cookies(storage_state['cookies'])
+	origins = [origin for origin in storage_state.get('origins', []) if origin.get('localStorage')]
+	if origins:
+		await context.add_init_script(script=RESTORE_LOCAL_STORAGE_SCRIPT % json.dumps(origins))
+
+	if url and not url.startswith('about:'):
+		page = await browser.get_current_page()
+		await page.goto(url)
+		await page.wait_for_load_state()
+		logger.info(f'Restored browser state at {url}')
@@ -0,0 +1,238 @@
+"""
+Ahead-of-time compilation of a WorkflowDefinitionSchema into an immutable execution plan.
+
+Everything about a step that does not depend on run inputs (placeholder parsing, action
+models, selector fallbacks) is worked out once when the workflow is loaded, so executing a
+step only has to fill in the placeholders that are actually present.
+"""
+
+import re
+from dataclasses import dataclass, field
+from string import Formatter
+from typing import Any, Callable, Dict, FrozenSet, List, Optional, Tuple, Type
+
+from browser_use.controller.registry.views import ActionModel
+from pydantic import BaseModel
+
+from workflow_use.controller.service import WorkflowController
+from workflow_use.controller.utils import build_selector_candidates
+from workflow_use.schema.views import (
+	AgenticWorkflowStep,
+	ConditionalStep,
+	DeterministicWorkflowStep,
+	WorkflowDefinitionSchema,
+	WorkflowStep,
+)
+from workflow_use.workflow.selector_cache import workflow_fingerprint
+
+_CONVERSIONS: Dict[str, Callable[[Any], str]] = {'r': repr, 's': str, 'a': ascii}
+_FIELD_ROOT = re.compile(r'^[^.\[]*')
+
+# Fields the element resolver derives its fallback selectors from
+_SELECTOR_FIELDS = ('cssSelector', 'xpath', 'elementTag', 'elementText')
+
+
+class PlaceholderTemplate:
+	"""A string with ``{name}`` placeholders, parsed once.
+
+	Rendering follows ``str.format(**context)`` but, like the runtime resolver always did,
+	returns the source string unchanged when a referenced variable is missing.
+	"""
+
+	__slots__ = ('source', 'variables', '_parts', '_simple')
+
+	def __init__(self, source: str, parts: List[Tuple[str, Optional[str], Optional[str], Optional[str]]]) -> None:
+		self.source = source
+		self._parts = parts
+		self.variables: FrozenSet[str] = frozenset(
+			_FIELD_ROOT.match(name).group(0) for _, name, _, _ in parts if name is not None
+		)
+		# Plain `{name}` / `{name!r:>10}` fields are filled directly; attribute/index access
+		# and nested format specs are left to str.format
+		self._simple = all(name is None or (name.isidentifier() and '{' not in (spec or '')) for _, name, spec, _ in parts)
+
+	@classmethod
+	def parse(cls, source: str) -> 'PlaceholderTemplate | str':
+		"""Return a template for *source*, or the final string when it has nothing to fill in."""
+		# Same gate as the runtime resolver: only strings with both braces are formatted
+		if '{' not in source or '}' not in source:
+			return source
+		try:
+			parts = list(Formatter().parse(source))
+		except ValueError:
+			# Unbalanced braces, e.g. inside a CSS selector: not a template
+			return source
+		names = [name for _, name, _, _ in parts if name is not None]
+		if not names:
+			# Only escaped braces
+			return ''.join(literal for literal, _, _, _ in parts)
+		if any(not _FIELD_ROOT.match(name).group(0).isidentifier() for name in names):
+			# Positional fields ("{}", "{0}") can never be filled from keyword context
+			return source
+		return cls(source, parts)
+
+	def render(self, context: Dict[str, Any]) -> str:
+		if not self.variables.issubset(context.keys()):
+			return self.source
+		if not self._simple:
+			try:
+				return self.source.format(**context)
+			except KeyError:
+				return self.source
+
+		chunks = []
+		for literal, name, spec, conversion in self._parts:
+			chunks.append(literal)
+			if name is None:
+				continue
+			value = context[name]
+			if conversion:
+				value = _CONVERSIONS[conversion](value)
+			chunks.append(format(value, spec or ''))
+		return ''.join(chunks)
+
+	def __repr__(self) -> str:
+		return f'PlaceholderTemplate({self.source!r})'
+
+
+# A compiled value renders itself against the run context
+_Renderer = Callable[[Dict[str, Any]], Any]
+
+
+def _compile_value(value: Any) -> Tuple[Optional[_Renderer], FrozenSet[str]]:
+	"""Compile *value* into a renderer, or ``None`` when it contains no placeholders."""
+	if isinstance(value, str):
+		template = PlaceholderTemplate.parse(value)
+		if isinstance(template, str):
+			if template == value:
+				return None, frozenset()
+			return (lambda context, text=template: text), frozenset()
+		return template.render, template.variables
+
+	if isinstance(value, list):
+		compiled = [_compile_value(item) for item in value]
+		if not any(renderer for renderer, _ in compiled):
+			return None, frozenset()
+		renderers = [renderer or (lambda context, item=item: item) for item, (renderer, _) in zip(value, compiled)]
+		return (lambda context: [render(context) for render in renderers]), frozenset().union(*(v for _, v in compiled))
+
+	if isinstance(value, dict):
+		compiled_items = {key: _compile_value(item) for key, item in value.items()}
+		dynamic = {key: renderer for key, (renderer, _) in compiled_items.items() if renderer}
+		if not dynamic:
+			return None, frozenset()
+		variables = frozenset().union(*(v for _, v in compiled_items.values()))
+		return (lambda context: {**value, **{key: render(context) for key, render in dynamic.items()}}), variables
+
+	if isinstance(value, BaseModel):
+		renderer, variables = _compile_model(value)
+		return renderer, variables
+
+	return None, frozenset()
+
+
+def _compile_model(model: BaseModel) -> Tuple[Optional[Callable[[Dict[str, Any]], BaseModel]], FrozenSet[str]]:
+	dynamic: Dict[str, _Renderer] = {}
+	variables: FrozenSet[str] = frozenset()
+	for field_name in type(model).model_fields:
+		renderer, field_variables = _compile_value(getattr(model, field_name))
+		if renderer:
+			dynamic[field_name] = renderer
+			variables |= field_variables
+	if not dynamic:
+		return None, frozenset()
+	return (lambda context: model.model_copy(update={name: render(context) for name, render in dynamic.items()})), variables
+
+
+@dataclass(frozen=True)
+class CompiledStep:
+	"""Everything about one workflow step that can be known before the run starts."""
+
+	index: int
+	step: WorkflowStep
+	# Names of the context variables the step's placeholders refer to
+	dependencies: FrozenSet[str]
+	kind: str  # 'deterministic' | 'agent' | 'conditional'
+	# Deterministic steps only
+	action_model_type: Optional[Type[ActionModel]] = None
+	# Prebuilt action when the step has no placeholders
+	static_action: Optional[ActionModel] = None
+	# Element resolver candidates, when none of the fields they derive from has placeholders
+	selector_candidates: Optional[Tuple[str, ...]] = None
+	_renderer: Optional[Callable[[Dict[str, Any]], WorkflowStep]] = field(default=None, repr=False, compare=False)
+
+	@property
+	def is_static(self) -> bool:
+		return self._renderer is None
+
+	def resolve(self, context: Dict[str, Any]) -> WorkflowStep:
+		"""Return the step with its placeholders filled in from *context*."""
+		return self._renderer(context) if self._renderer else self.step
+
+	def build_action(self, step_resolved: WorkflowStep) -> ActionModel:
+		"""Return the controller action for the resolved step."""
+		if self.static_action is not None:
+			return self.static_action
+		assert self.action_model_type is not None, f'Step {self.index + 1} is not a deterministic step'
+		return self.action_model_type(**{step_resolved.type: step_resolved.model_dump()})
+
+
+@dataclass(frozen=True)
+class WorkflowPlan:
+	"""Immutable, precompiled form of a workflow definition."""
+
+	schema: WorkflowDefinitionSchema
+	# Identifies the exact definition for the selector cache, checkpoints and repairs
+	fingerprint: str
+	steps: Tuple[CompiledStep, ...]
+
+	def __len__(self) -> int:
+		return len(self.steps)
+
+	def __getitem__(self, index: int) -> CompiledStep:
+		return self.steps[index]
+
+
+def compile_step(index: int, step: WorkflowStep, action_models: Dict[str, Type[ActionModel]]) -> CompiledStep:
+	"""Compile one step; *action_models* is filled and reused per action type."""
+	renderer, dependencies = _compile_model(step)
+
+	if isinstance(step, ConditionalStep):
+		return CompiledStep(index=index, step=step, dependencies=dependencies, kind='conditional', _renderer=renderer)
+	if isinstance(step, AgenticWorkflowStep) or not isinstance(step, DeterministicWorkflowStep):
+		return CompiledStep(index=index, step=step, dependencies=dependencies, kind='agent', _renderer=renderer)
+
+	action_model_type = action_models[step.type]
+	static_action = action_model_type(**{step.type: step.model_dump()}) if renderer is None else None
+
+	selector_candidates = None
+	css_selector = getattr(step, 'cssSelector', None)
+	if css_selector and not any(
+		_compile_value(getattr(step, name, None))[0] for name in _SELECTOR_FIELDS if getattr(step, name, None)
+	):
+		selector_candidates = tuple(build_selector_candidates(css_selector, step))
+
+	return CompiledStep(
+		index=index,
+		step=step,
+		dependencies=dependencies,
+		kind='deterministic',
+		action_model_type=action_model_type,
+		static_action=static_action,
+		selector_candidates=selector_candidates,
+		_renderer=renderer,
+	)
+
+
+def compile_workflow(schema: WorkflowDefinitionSchema, controller: WorkflowController) -> WorkflowPlan:
+	"""Compile every step of *schema* against the actions registered on *controller*."""
+	action_models: Dict[str, Type[ActionModel]] = {}
+	for step in schema.steps:
+		if isinstance(step, DeterministicWorkflowStep) and step.type not in action_models:
+			action_models[step.type] = controller.registry.create_action_model(include_actions=[step.type])
+
+	return WorkflowPlan(
+		schema=schema,
+		fingerprint=workflow_fingerprint(schema),
+		steps=tuple(compile_step(index, step, action_models) for index, step in enumerate(schema.steps)),
+	)
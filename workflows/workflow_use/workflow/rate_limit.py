@@ -0,0 +1,137 @@
+"""
+Token-bucket rate limiting and concurrency caps of the actions runs perform against a site, keyed by origin.
+"""
+
+import asyncio
+import fnmatch
+import logging
+import time
+from collections import OrderedDict
+from contextlib import asynccontextmanager
+from dataclasses import dataclass
+from typing import AsyncIterator, Mapping, Optional
+
+from workflow_use.schema.views import RateLimit
+
+logger = logging.getLogger(__name__)
+
+# Step types that make the site do work; extraction and scrolling only read the loaded page
+RATE_LIMITED_ACTIONS = frozenset({'navigation', 'click', 'input', 'select_change', 'key_press'})
+# Origins whose buckets and slots are kept; the least recently used idle ones are dropped beyond that
+DEFAULT_MAX_ORIGINS = 1024
+
+
+class TokenBucket:
+	"""Allows ``rate`` acquisitions per second on average, and bursts of up to ``burst`` at once.
+
+	Callers reserve a token up front and sleep until it becomes available, so waiters are
+	served in arrival order without a lock. Must be used from the event loop's thread.
+	"""
+
+	def __init__(self, rate: float, burst: int) -> None:
+		self.rate = rate
+		self.burst = burst
+		self._tokens = float(burst)
+		self._updated = time.monotonic()
+
+	def reserve(self) -> float:
+		"""Take a token and return the seconds until it may be used."""
+		now = time.monotonic()
+		self._tokens = min(float(self.burst), self._tokens + (now - self._updated) * self.rate)
+		self._updated = now
+		self._tokens -= 1
+		return max(0.0, -self._tokens / self.rate)
+
+
+@dataclass
+class _OriginState:
+	bucket: Optional[TokenBucket]
+	slots: Optional[asyncio.Semaphore]
+	# Holders of (or waiters for) the origin's slots; an origin in use is never evicted
+	active: int = 0
+
+
+class OriginRateLimiter:
+	"""One token bucket (and concurrency cap) per origin, shared by every run that acquires through this limiter.
+
+	``limits`` maps origin globs (e.g. ``https://*.example.com``) to the limit of each matching
+	origin; an exact origin wins over globs, and origins nothing matches get ``default``, or
+	are not limited at all without one. Every origin gets a bucket of its own, also when it
+	was matched by a glob. The state of the ``max_origins`` most recently used origins is kept;
+	an origin evicted after being idle that long starts over with a full burst.
+	"""
+
+	def __init__(
+		self,
+		limits: Mapping[str, RateLimit] | None = None,
+		*,
+		default: RateLimit | None = None,
+		max_origins: int = DEFAULT_MAX_ORIGINS,
+	) -> None:
+		self.limits = dict(limits or {})
+		self.default = default
+		self.max_origins = max_origins
+		self._origins: 'OrderedDict[str, _OriginState]' = OrderedDict()
+
+	@property
+	def enabled(self) -> bool:
+		return bool(self.limits) or self.default is not None
+
+	def limit_for(self, origin: str) -> Optional[RateLimit]:
+		if origin in self.limits:
+			return self.limits[origin]
+		for pattern, limit in self.limits.items():
+			if fnmatch.fnmatch(origin, pattern):
+				return limit
+		return self.default
+
+	def _state(self, origin: str) -> _OriginState:
+		state = self._origins.get(origin)
+		if state is None:
+			limit = self.limit_for(origin)
+			state = _OriginState(
+				bucket=TokenBucket(limit.requests_per_second, limit.burst) if limit else None,
+				slots=asyncio.Semaphore(limit.max_concurrent) if limit and limit.max_concurrent else None,
+			)
+			self._evict(len(self._origins) + 1 - self.max_origins)
+			self._origins[origin] = state
+		self._origins.move_to_end(origin)
+		return state
+
+	def _evict(self, count: int) -> None:
+		"""Drop the *count* least recently used origins that are not in use."""
+		if count > 0:
+			for origin in [origin for origin, state in self._origins.items() if state.active == 0][:count]:
+				del self._origins[origin]
+
+	async def acquire(self, origin: str) -> float:
+		"""Wait until an action against *origin* is allowed by the rate; returns the time waited, in ms."""
+		bucket = self._state(origin).bucket
+		if bucket is None:
+			return 0.0
+		delay = bucket.reserve()
+		if delay > 0:
+			logger.debug(f'Rate limit of {origin} reached, waiting {delay * 1000:.0f}ms')
+			await asyncio.sleep(delay)
+		return delay * 1000
+
+	@asynccontextmanager
+	async def hold(self, origin: str) -> AsyncIterator[float]:
+		"""Wait for a free slot of *origin* and for the rate, and keep the slot while the block runs.
+
+		Yields the time waited for both, in ms.
+		"""
+		state = self._state(origin)
+		if state.slots is None:
+			yield await self.acquire(origin)
+			return
+		state.active += 1
+		try:
+			started = time.monotonic()
+			async with state.slots:
+				waited = (time.monotonic() - started) * 1000
+				if waited > 0:
+					logger.debug(f'Concurrency cap of {origin} reached, waited {waited:.0f}ms for a slot')
+				yield waited + await self.acquire(origin)
+		finally:
+			state.active -= 1
@@ -0,0 +1,205 @@
+"""
+Readiness engine: waits only for what the next workflow step actually needs.
+"""
+
+import asyncio
+import fnmatch
+import logging
+import time
+from typing import Any, Dict, Optional, Tuple
+
+from browser_use import Browser
+from playwright.async_api import Locator, Page, Request
+
+from workflow_use.controller.utils import get_best_element_handle, truncate_selector
+from workflow_use.schema.views import (
+	AgentTaskWorkflowStep,
+	ConditionalStep,
+	FieldExtractionStep,
+	NavigationStep,
+	PageExtractionStep,
+	ReadinessPolicy,
+	ScrollStep,
+	WorkflowStep,
+)
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_SELECTOR_TIMEOUT_MS = 2500
+DEFAULT_EVENT_TIMEOUT_MS = 5000
+
+# Resolves once no DOM mutation happened for `quietMs`, or after `timeoutMs` at the latest
+DOM_QUIET_SCRIPT = """
+({ quietMs, timeoutMs }) => new Promise((resolve) => {
+	let quietTimer = null;
+	const done = (quiet) => {
+		observer.disconnect();
+		clearTimeout(quietTimer);
+		clearTimeout(hardTimer);
+		resolve(quiet);
+	};
+	const observer = new MutationObserver(() => {
+		clearTimeout(quietTimer);
+		quietTimer = setTimeout(() => done(true), quietMs);
+	});
+	observer.observe(document, { subtree: true, childList: true, attributes: true, characterData: true });
+	quietTimer = setTimeout(() => done(true), quietMs);
+	const hardTimer = setTimeout(() => done(false), timeoutMs);
+})
+"""
+
+
+class ReadinessTimeoutError(Exception):
+	"""Raised when the target element of a step does not become actionable in time."""
+
+
+class ReadinessWaiter:
+	"""A readiness wait armed *before* the action that is expected to satisfy it.
+
+	Arming first matters for event-style policies: a URL change or a finished request
+	triggered by the previous action must not be missed because we started listening late.
+	"""
+
+	def __init__(self, page: Page, browser: Browser, policy: ReadinessPolicy) -> None:
+		self.page = page
+		self.browser = browser
+		self.policy = policy
+		self.start_url = page.url
+		# (locator, selector) of the step's element when a selector wait found it
+		self.located: Optional[Tuple[Locator, str]] = None
+		self._request_done: Optional[asyncio.Future] = None
+
+		if policy.type == 'request':
+			self._request_done = asyncio.get_running_loop().create_future()
+			page.on('requestfinished', self._on_request_finished)
+
+	def _on_request_finished(self, request: Request) -> None:
+		if self._request_done and not self._request_done.done() and _url_matches(request.url, self.policy.url_pattern):
+			self._request_done.set_result(request.url)
+
+	def cancel(self) -> None:
+		"""Drop the wait without waiting, e.g. because the triggering action failed."""
+		self._detach()
+
+	def _detach(self) -> None:
+		if self._request_done is not None:
+			try:
+				self.page.remove_listener('requestfinished', self._on_request_finished)
+			except Exception:
+				pass
+
+	async def wait(self, step: WorkflowStep, element_hints: Optional[Dict[str, Any]] = None) -> float:
+		"""Wait until *step* may run and return the time spent waiting, in ms.
+
+		Only a missing target element is an error (``ReadinessTimeoutError``); all other
+		policies are best effort and let the step run once their timeout expires.
+		*element_hints* are passed to the element resolver when waiting for the step's own target.
+		"""
+		policy = self.policy
+		started = time.perf_counter()
+		try:
+			if policy.type in ('selector', 'dom_quiet'):
+				# The previous action may have switched tabs since the wait was armed
+				self.page = await self.browser.get_current_page()
+
+			if policy.type == 'selector':
+				await self._wait_for_selector(step, element_hints)
+			elif policy.type == 'url_change':
+				await self._wait_for_url_change()
+			elif policy.type == 'dom_quiet':
+				await self._wait_for_dom_quiet()
+			elif policy.type == 'request':
+				await self._wait_for_request()
+			elif policy.type == 'network_idle':
+				await self.browser._wait_for_stable_network()
+		finally:
+			self._detach()
+		return (time.perf_counter() - started) * 1000
+
+	def _timeout_ms(self, default: int) -> int:
+		return self.policy.timeout_ms if self.policy.timeout_ms is not None else default
+
+	async def _wait_for_selector(self, step: WorkflowStep, element_hints: Optional[Dict[str, Any]]) -> None:
+		own_target = self.policy.selector is None
+		selector = self.policy.selector or getattr(step, 'cssSelector', None)
+		if not selector:
+			return
+		try:
+			locator, selector_used = await get_best_element_handle(
+				self.page,
+				selector,
+				step,
+				timeout_ms=self._timeout_ms(DEFAULT_SELECTOR_TIMEOUT_MS),
+				**(element_hints if own_target and element_hints else {}),
+			)
+			logger.info(f'Element with selector found: {truncate_selector(selector_used)}')
+		except Exception as e:
+			raise ReadinessTimeoutError(f'Element not actionable: {truncate_selector(selector)}') from e
+		if own_target:
+			self.located = (locator, selector_used)
+
+	async def _wait_for_url_change(self) -> None:
+		pattern = self.policy.url_pattern
+		try:
+			await self.page.wait_for_url(
+				lambda url: _url_matches(url, pattern) if pattern else url != self.start_url,
+				wait_until='commit',
+				timeout=self._timeout_ms(DEFAULT_EVENT_TIMEOUT_MS),
+			)
+		except Exception:
+			logger.warning(f'URL did not change{f" to {pattern}" if pattern else ""} in time, continuing')
+
+	async def _wait_for_dom_quiet(self) -> None:
+		try:
+			quiet = await self.page.evaluate(
+				DOM_QUIET_SCRIPT,
+				{'quietMs': self.policy.quiet_ms, 'timeoutMs': self._timeout_ms(DEFAULT_EVENT_TIMEOUT_MS)},
+			)
+			if not quiet:
+				logger.warning('DOM kept changing until timeout, continuing')
+		except Exception as e:
+			# Navigations destroy the execution context; the new document is what we wanted anyway
+			logger.debug(f'DOM quiescence wait interrupted: {e}')
+
+	async def _wait_for_request(self) -> None:
+		assert self._request_done is not None
+		try:
+			await asyncio.wait_for(self._request_done, timeout=self._timeout_ms(DEFAULT_EVENT_TIMEOUT_MS) / 1000)
+		except asyncio.TimeoutError:
+			logger.warning(f'No request matching {self.policy.url_pattern} finished in time, continuing')
+
+
+class ReadinessEngine:
+	"""Resolves per-step readiness policies and arms the matching waits."""
+
+	def policy_for(self, step: WorkflowStep) -> ReadinessPolicy:
+		"""Return the effective policy for *step*, resolving ``auto`` from the step type."""
+		policy = step.wait_for or ReadinessPolicy()
+		if policy.type != 'auto':
+			return policy
+
+		if isinstance(step, (NavigationStep, ScrollStep, AgentTaskWorkflowStep)):
+			resolved = 'none'
+		elif getattr(step, 'cssSelector', None):
+			resolved = 'selector'
+		elif isinstance(step, (PageExtractionStep, FieldExtractionStep, ConditionalStep)):
+			resolved = 'dom_quiet'
+		else:
+			resolved = 'none'
+		return policy.model_copy(update={'type': resolved})
+
+	async def prepare(self, browser: Browser, step: WorkflowStep) -> ReadinessWaiter:
+		"""Arm the wait for *step*; call before the action that should make it ready."""
+		page = await browser.get_current_page()
+		return ReadinessWaiter(page, browser, self.policy_for(step))
+
+	async def wait_for_step(self, browser: Browser, step: WorkflowStep) -> float:
+		"""Arm and immediately wait for *step*, returning the time spent waiting in ms."""
+		waiter = await self.prepare(browser, step)
+		return await waiter.wait(step)
+
+
+def _url_matches(url: str, pattern: Any) -> bool:
+	if not pattern:
+		return True
+	return fnmatch.fnmatch(url, pattern) or pattern in url
@@ -0,0 +1,263 @@
+"""
+Self-healing: turns successful agent fallbacks into deterministic steps that replace the failed one.
+
+A repair is stored as a versioned patch on top of the workflow definition it was learned on,
+so the file on disk stays untouched and editing it simply invalidates all of its repairs.
+"""
+
+import asyncio
+import json
+import logging
+import os
+import re
+import sys
+import tempfile
+import threading
+import time
+from contextlib import contextmanager
+from pathlib import Path
+from typing import Any, Dict, Iterator, List, Optional
+
+from browser_use.agent.views import AgentHistoryList
+from browser_use.dom.history_tree_processor.view import DOMHistoryElement
+
+from workflow_use.schema.views import (
+	ClickStep,
+	FieldExtractionStep,
+	InputStep,
+	KeyPressStep,
+	NavigationStep,
+	PageExtractionStep,
+	SelectChangeStep,
+	WorkflowDefinitionSchema,
+	WorkflowStep,
+)
+from workflow_use.workflow.selector_cache import workflow_fingerprint
+from workflow_use.workflow.views import WorkflowRepair
+
+if sys.platform == 'win32':
+	import msvcrt
+else:
+	import fcntl
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_REPAIR_DIR = Path('./tmp') / 'repairs'
+
+# Agent actions that only helped the agent look around; the readiness waits cover them
+_IGNORED_ACTIONS = {'done', 'wait', 'scroll_down', 'scroll_up', 'scroll_to_text', 'get_dropdown_options', 'get_ax_tree'}
+
+_VERSION_SUFFIX = re.compile(r'\+repair\.\d+$')
+_UNSAFE_FILENAME_CHARS = re.compile(r'[^A-Za-z0-9_.-]+')
+
+
+def _element_selectors(element: Optional[DOMHistoryElement]) -> Optional[Dict[str, Any]]:
+	"""Selector fields of a step targeting *element*, or None when it cannot be addressed from the page."""
+	if element is None or element.shadow_root or 'iframe' in element.entire_parent_branch_path:
+		return None
+	xpath = '/' + element.xpath.lstrip('/')
+	return {
+		'cssSelector': element.css_selector or f'xpath={xpath}',
+		'xpath': xpath,
+		'elementTag': element.tag_name,
+	}
+
+
+def _templated(value: str, raw: Optional[str], resolved: Optional[str], context: Dict[str, Any]) -> str:
+	"""Put the placeholder back into a value the agent took from the run inputs."""
+	if raw is not None and value == resolved:
+		return raw
+	matches = [name for name, item in context.items() if isinstance(item, str) and item and item == value]
+	return f'{{{matches[0]}}}' if len(matches) == 1 else value
+
+
+def repair_steps_from_history(
+	raw_step: WorkflowStep,
+	resolved_step: WorkflowStep,
+	history: AgentHistoryList,
+	context: Optional[Dict[str, Any]] = None,
+) -> Optional[List[WorkflowStep]]:
+	"""Translate what a successful fallback agent did into deterministic workflow steps.
+
+	*raw_step* is the failed step as defined (with placeholders), *resolved_step* the one that
+	ran. Values the agent took from the run inputs are turned back into placeholders, so the
+	steps work for other inputs too. Returns None when an action has no deterministic
+	equivalent, since replaying only part of what the agent did would not repair the step.
+	"""
+	context = context or {}
+	steps: List[WorkflowStep] = []
+	last_target: Optional[Dict[str, Any]] = None
+
+	for item in history.history:
+		if item.model_output is None:
+			continue
+		for position, action in enumerate(item.model_output.action):
+			# Actions after a page change are not executed, and failed ones did not contribute
+			if position >= len(item.result) or item.result[position].error:
+				continue
+			dump = action.model_dump(exclude_none=True)
+			if not dump:
+				continue
+			name, params = next(iter(dump.items()))
+			if name in _IGNORED_ACTIONS:
+				continue
+
+			elements = item.state.interacted_element
+			target = _element_selectors(elements[position] if position < len(elements) else None)
+			if name == 'go_to_url':
+				url = _templated(params['url'], getattr(raw_step, 'url', None), getattr(resolved_step, 'url', None), {})
+				steps.append(NavigationStep(type='navigation', url=url))
+			elif name == 'click_element_by_index' and target:
+				steps.append(ClickStep(type='click', **target))
+			elif name == 'input_text' and target:
+				value = _templated(
+					params['text'], getattr(raw_step, 'value', None), getattr(resolved_step, 'value', None), context
+				)
+				steps.append(InputStep(type='input', value=value, **target))
+			elif name == 'select_dropdown_option' and target:
+				selected = _templated(
+					params['text'], getattr(raw_step, 'selectedText', None), getattr(resolved_step, 'selectedText', None), context
+				)
+				steps.append(SelectChangeStep(type='select_change', selectedText=selected, **target))
+			elif name == 'send_keys' and last_target:
+				steps.append(KeyPressStep(type='key_press', key=params['keys'], **last_target))
+			elif name == 'extract_content':
+				steps.append(PageExtractionStep(type='extract_page_content', goal=params['goal']))
+			elif name == 'extract_fields':
+				steps.append(FieldExtractionStep(type='extract_fields', fields=params['fields']))
+			else:
+				logger.info(f'Agent action {name!r} has no deterministic equivalent, not repairing the step')
+				return None
+			last_target = target or last_target
+
+	if not steps:
+		return None
+
+	# The replacement keeps the failed step's purpose, readiness policy and output; element actions
+	# require the recorder's timestamp and tab metadata
+	metadata = {
+		'description': raw_step.description,
+		'timestamp': int(time.time() * 1000),
+		'tabId': getattr(raw_step, 'tabId', None) or 0,
+	}
+	steps = [step.model_copy(update=metadata) for step in steps]
+	steps[0] = steps[0].model_copy(update={'wait_for': raw_step.wait_for})
+	steps[-1] = steps[-1].model_copy(update={'output': raw_step.output})
+	return steps
+
+
+def apply_repair(schema: WorkflowDefinitionSchema, repair: WorkflowRepair) -> WorkflowDefinitionSchema:
+	"""Return *schema* with the step at ``repair.step_index`` replaced by the repair's steps."""
+	steps = list(schema.steps)
+	steps[repair.step_index : repair.step_index + 1] = repair.steps
+	version = f'{_VERSION_SUFFIX.sub("", schema.version)}+repair.{repair.version}'
+	return schema.model_copy(update={'steps': steps, 'version': version})
+
+
+def repair_chain(schema: WorkflowDefinitionSchema, repairs: List[WorkflowRepair]) -> List[WorkflowDefinitionSchema]:
+	"""Return *schema* followed by each definition obtained by applying *repairs* in order.
+
+	A repair only applies on top of the exact definition it was learned on; repairs of an
+	older version of the workflow file are skipped.
+	"""
+	chain = [schema]
+	fingerprint = workflow_fingerprint(schema)
+	for repair in sorted(repairs, key=lambda repair: repair.version):
+		if repair.parent_hash != fingerprint:
+			continue
+		schema = apply_repair(schema, repair)
+		fingerprint = workflow_fingerprint(schema)
+		chain.append(schema)
+	return chain
+
+
+@contextmanager
+def _file_lock(path: Path) -> Iterator[None]:
+	"""Hold an exclusive lock on *path* (created if missing), also against other processes."""
+	with open(path, 'a+b') as f:
+		if sys.platform == 'win32':
+			f.seek(0)
+			msvcrt.locking(f.fileno(), msvcrt.LK_LOCK, 1)
+		else:
+			fcntl.flock(f.fileno(), fcntl.LOCK_EX)
+		try:
+			yield
+		finally:
+			if sys.platform == 'win32':
+				f.seek(0)
+				msvcrt.locking(f.fileno(), msvcrt.LK_UNLCK, 1)
+			else:
+				fcntl.flock(f.fileno(), fcntl.LOCK_UN)
+
+
+class RepairStore:
+	"""Keeps the repairs of every workflow as one JSON file per workflow name.
+
+	Writes hold a lock file next to it, so processes sharing the directory (e.g. sharded
+	csv_runner workers) never lose each other's repairs.
+	"""
+
+	def __init__(self, directory: str | Path = DEFAULT_REPAIR_DIR) -> None:
+		self.directory = Path(directory)
+		self.directory.mkdir(parents=True, exist_ok=True)
+		self._lock = threading.Lock()
+
+	def _path(self, workflow: str) -> Path:
+		return self.directory / f'{_UNSAFE_FILENAME_CHARS.sub("_", workflow)}.json'
+
+	def _lock_path(self, workflow: str) -> Path:
+		return self._path(workflow).with_suffix('.lock')
+
+	def load(self, workflow: str) -> List[WorkflowRepair]:
+		path = self._path(workflow)
+		if not path.exists():
+			return []
+		repairs = [WorkflowRepair.model_validate(item) for item in json.loads(path.read_text(encoding='utf-8'))]
+		return [repair for repair in repairs if repair.workflow == workflow]
+
+	def add(
+		self, workflow: str, parent_hash: str, step_index: int, steps: List[WorkflowStep], error: Optional[str] = None
+	) -> Optional[WorkflowRepair]:
+		"""Store a new repair; returns None if that step of that definition was already repaired."""
+		with self._lock, _file_lock(self._lock_path(workflow)):
+			path = self._path(workflow)
+			stored = json.loads(path.read_text(encoding='utf-8')) if path.exists() else []
+			repairs = [WorkflowRepair.model_validate(item) for item in stored]
+			if any(repair.parent_hash == parent_hash and repair.step_index == step_index for repair in repairs):
+				return None
+
+			repair = WorkflowRepair(
+				workflow=workflow,
+				version=max((repair.version for repair in repairs), default=0) + 1,
+				parent_hash=parent_hash,
+				step_index=step_index,
+				steps=steps,
+				error=error,
+				created_at=time.time(),
+			)
+			# A temp file of its own per write, replaced atomically: readers see the old or the new list
+			tmp = tempfile.NamedTemporaryFile(
+				'w', dir=self.directory, prefix=f'{path.stem}.', suffix='.tmp', delete=False, encoding='utf-8'
+			)
+			try:
+				with tmp:
+					tmp.write(json.dumps([item.model_dump(mode='json') for item in [*repairs, repair]], indent=2))
+				os.replace(tmp.name, path)
+			except BaseException:
+				Path(tmp.name).unlink(missing_ok=True)
+				raise
+			return repair
+
+	def clear(self, workflow: str) -> None:
+		"""Drop all repairs of *workflow*, going back to the definition as written."""
+		with self._lock, _file_lock(self._lock_path(workflow)):
+			self._path(workflow).unlink(missing_ok=True)
+
+	# --- Async wrappers used from the run loop ---
+	async def aload(self, workflow: str) -> List[WorkflowRepair]:
+		return await asyncio.to_thread(self.load, workflow)
+
+	async def aadd(
+		self, workflow: str, parent_hash: str, step_index: int, steps: List[WorkflowStep], error: Optional[str] = None
+	) -> Optional[WorkflowRepair]:
+		return await asyncio.to_thread(self.add, workflow, parent_hash, step_index, steps, error)
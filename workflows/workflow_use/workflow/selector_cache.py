@@ -0,0 +1,149 @@
+"""
+Persistent cache of the selector that actually matched for a workflow step on a given origin.
+"""
+
+import asyncio
+import hashlib
+import logging
+import sqlite3
+import threading
+import time
+from pathlib import Path
+from typing import Optional
+from urllib.parse import urlsplit
+
+from workflow_use.schema.views import WorkflowDefinitionSchema
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_SELECTOR_CACHE_PATH = Path('./tmp') / 'cache' / 'selector_cache.db'
+# Entries not used for this long are dropped, e.g. those of definitions that have since changed
+DEFAULT_MAX_AGE = 30 * 24 * 3600.0
+
+# Bumped whenever the table changes incompatibly; cached selectors are cheap to relearn, so older tables are dropped
+_SCHEMA_VERSION = 2
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS selector_cache (
+	workflow TEXT NOT NULL,
+	workflow_hash TEXT NOT NULL,
+	step_index INTEGER NOT NULL,
+	origin TEXT NOT NULL,
+	selector TEXT NOT NULL,
+	hits INTEGER NOT NULL DEFAULT 0,
+	misses INTEGER NOT NULL DEFAULT 0,
+	updated_at REAL NOT NULL,
+	PRIMARY KEY (workflow, workflow_hash, step_index, origin)
+);
+CREATE INDEX IF NOT EXISTS selector_cache_by_update ON selector_cache (updated_at);
+"""
+_KEY = 'workflow = ? AND workflow_hash = ? AND step_index = ? AND origin = ?'
+
+
+def workflow_fingerprint(schema: WorkflowDefinitionSchema) -> str:
+	"""Hash of the workflow definition; cached selectors are only valid for the exact definition they were learned on."""
+	return hashlib.sha256(schema.model_dump_json().encode('utf-8')).hexdigest()
+
+
+def origin_of(url: str) -> str:
+	"""Return ``scheme://host[:port]`` of *url*, the granularity selectors are cached at."""
+	parts = urlsplit(url)
+	return f'{parts.scheme}://{parts.netloc}'
+
+
+class SelectorCache:
+	"""SQLite-backed map of (workflow, definition fingerprint, step index, origin) -> winning fallback selector.
+
+	Only selectors that differ from the step's recorded ``cssSelector`` are stored: when the
+	recorded one still works there is nothing to remember. An entry is dropped after
+	``max_misses`` consecutive runs in which it did not match, or when it was not used for
+	``max_age`` seconds. Entries are only served to the exact definition they were learned on,
+	so definitions sharing a name never see each other's selectors.
+
+	The cache is not created implicitly: whoever creates one shares it between their workflows
+	and closes it when done.
+	"""
+
+	def __init__(
+		self, path: str | Path = DEFAULT_SELECTOR_CACHE_PATH, *, max_misses: int = 3, max_age: float = DEFAULT_MAX_AGE
+	) -> None:
+		self.path = Path(path)
+		self.max_misses = max_misses
+		self.max_age = max_age
+		self.path.parent.mkdir(parents=True, exist_ok=True)
+
+		self._lock = threading.Lock()
+		self._conn = sqlite3.connect(self.path, check_same_thread=False, isolation_level=None)
+		self._conn.execute('PRAGMA journal_mode=WAL')
+		self._conn.execute('PRAGMA synchronous=NORMAL')
+		if self._conn.execute('PRAGMA user_version').fetchone()[0] != _SCHEMA_VERSION:
+			self._conn.execute('DROP TABLE IF EXISTS selector_cache')
+			self._conn.execute(f'PRAGMA user_version = {_SCHEMA_VERSION}')
+		self._conn.executescript(_SCHEMA)
+
+	def close(self) -> None:
+		with self._lock:
+			self._conn.close()
+
+	# --- Sync API (cheap, local-disk only) ---
+	def get(self, workflow: str, workflow_hash: str, step_index: int, origin: str) -> Optional[str]:
+		with self._lock:
+			row = self._conn.execute(
+				f'SELECT selector FROM selector_cache WHERE {_KEY}', (workflow, workflow_hash, step_index, origin)
+			).fetchone()
+		return row[0] if row else None
+
+	def put(
+		self,
+		workflow: str,
+		workflow_hash: str,
+		step_index: int,
+		origin: str,
+		original_selector: str,
+		selector_used: Optional[str],
+	) -> None:
+		"""Record the outcome of one lookup for a step.
+
+		*selector_used* is the selector that matched, or None when the step failed to find its element.
+		"""
+		key = (workflow, workflow_hash, step_index, origin)
+		now = time.time()
+		with self._lock:
+			row = self._conn.execute(f'SELECT selector, misses FROM selector_cache WHERE {_KEY}', key).fetchone()
+
+			if row and selector_used == row[0]:
+				self._conn.execute(
+					f'UPDATE selector_cache SET hits = hits + 1, misses = 0, updated_at = ? WHERE {_KEY}', (now, *key)
+				)
+			elif selector_used and selector_used != original_selector:
+				# A (new) fallback won: remember it, and forget what nobody used for a long time
+				self._conn.execute(
+					'INSERT OR REPLACE INTO selector_cache '
+					'(workflow, workflow_hash, step_index, origin, selector, hits, misses, updated_at) '
+					'VALUES (?, ?, ?, ?, ?, 1, 0, ?)',
+					(*key, selector_used, now),
+				)
+				self._conn.execute('DELETE FROM selector_cache WHERE updated_at < ?', (now - self.max_age,))
+			elif row and (selector_used == original_selector or row[1] + 1 >= self.max_misses):
+				# The recorded selector works again, or the cached one keeps missing
+				self._conn.execute(f'DELETE FROM selector_cache WHERE {_KEY}', key)
+			elif row:
+				self._conn.execute(f'UPDATE selector_cache SET misses = misses + 1, updated_at = ? WHERE {_KEY}', (now, *key))
+
+	# --- Async wrappers used from the run loop ---
+	async def lookup(self, workflow: str, workflow_hash: str, step_index: int, origin: str) -> Optional[str]:
+		return await asyncio.to_thread(self.get, workflow, workflow_hash, step_index, origin)
+
+	async def record(
+		self,
+		workflow: str,
+		workflow_hash: str,
+		step_index: int,
+		origin: str,
+		original_selector: str,
+		selector_used: Optional[str],
+	) -> None:
+		try:
+			await asyncio.to_thread(self.put, workflow, workflow_hash, step_index, origin, original_selector, selector_used)
+		except sqlite3.Error as e:
+			# The cache is an optimization only, never fail a run because of it
+			logger.warning(f'Could not update selector cache: {e}')
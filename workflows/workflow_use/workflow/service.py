@@ -4,8 +4,11 @@ import asyncio
 import json
 import json as _json
 import logging
+import time
+import uuid
+from contextlib import AsyncExitStack
 from pathlib import Path
-from typing import Any, Dict, List, TypeVar
+from typing import Any, AsyncIterator, Dict, List, Literal, TypeVar
 
 from browser_use import Agent, Browser
 from browser_use.agent.views import ActionResult, AgentHistoryList
@@ -14,10 +17,11 @@ from langchain_core.language_models.chat_models import BaseChatModel
 from langchain_core.messages import AIMessage, BaseMessage, HumanMessage
 from langchain_core.prompts import ChatPromptTemplate
 from langchain_core.tools import StructuredTool
-from pydantic import BaseModel, create_model
+from pydantic import BaseModel, ValidationError, create_model
 
+from workflow_use.browser.service import BrowserPool
 from workflow_use.controller.service import WorkflowController
-from workflow_use.controller.utils import get_best_element_handle
+from workflow_use.controller.views import ActionContext
 from workflow_use.schema.views import (
 	AgenticWorkflowStep,
 	ClickStep,
@@ -32,14 +36,19 @@ from workflow_use.schema.views import (
 	WorkflowInputSchemaDefinition,
 	WorkflowStep,
 )
+from workflow_use.workflow.checkpoint import CheckpointStore, capture_browser_state, restore_browser_state
+from workflow_use.workflow.compiler import WorkflowPlan, compile_workflow
 from workflow_use.workflow.condition_evaluator import ConditionEvaluator, WorkflowConditionError
 from workflow_use.workflow.prompts import STRUCTURED_OUTPUT_PROMPT, WORKFLOW_FALLBACK_PROMPT_TEMPLATE
-from workflow_use.workflow.views import WorkflowRunOutput
+from workflow_use.workflow.rate_limit import RATE_LIMITED_ACTIONS, OriginRateLimiter
+from workflow_use.workflow.readiness import ReadinessEngine, ReadinessTimeoutError, ReadinessWaiter
+from workflow_use.workflow.repair import RepairStore, repair_chain, repair_steps_from_history
+from workflow_use.workflow.selector_cache import SelectorCache, origin_of, workflow_fingerprint
+from workflow_use.workflow.structuring import collect_candidates, partial_model, relevant_snippets, structure_locally
+from workflow_use.workflow.views import Checkpoint, RunState, StepEvent, StepHandoff, WorkflowRunOutput
 
 logger = logging.getLogger(__name__)
 
-WAIT_FOR_ELEMENT_TIMEOUT = 2500
-
 T = TypeVar('T', bound=BaseModel)
 
 
@@ -50,8 +59,19 @@ class WorkflowStopException(Exception):
 		super().__init__(self.message)
 
 
+class NextStepNotReadyError(Exception):
+	"""Raised when a step's action ran but the next step's target did not become ready in time.
+
+	The step itself may have worked, so a fallback for it is not learned as a repair.
+	"""
+
+
 class Workflow:
-	"""Simple orchestrator that executes a list of workflow *steps* defined in a WorkflowDefinitionSchema."""
+	"""Simple orchestrator that executes a list of workflow *steps* defined in a WorkflowDefinitionSchema.
+
+	The instance only holds the loaded definition and shared collaborators; all per-execution
+	state lives in a :class:`RunState`, so one Workflow can serve many concurrent runs.
+	"""
 
 	def __init__(
 		self,
@@ -59,9 +79,14 @@ class Workflow:
 		*,
 		controller: WorkflowController | None = None,
 		browser: Browser | None = None,
+		browser_pool: BrowserPool | None = None,
 		llm: BaseChatModel | None = None,
 		page_extraction_llm: BaseChatModel | None = None,
 		fallback_to_agent: bool = True,
+		selector_cache: SelectorCache | None = None,
+		checkpoint_store: CheckpointStore | None = None,
+		repair_store: RepairStore | None = None,
+		rate_limiter: OriginRateLimiter | None = None,
 	) -> None:
 		"""Initialize a new Workflow instance from a schema object.
 
@@ -69,38 +94,63 @@ class Workflow:
 			workflow_schema: The parsed workflow definition schema.
 			controller: Optional WorkflowController instance to handle action execution
 			browser: Optional Browser instance to use for browser automation
+			browser_pool: Optional BrowserPool to lease an isolated browser from on every run (takes precedence over browser)
 			llm: Optional language model for fallback agent functionality
 			fallback_to_agent: Whether to fall back to agent-based execution on step failure
+			selector_cache: Optional SelectorCache remembering which fallback selectors worked on earlier runs; it is
+				owned (and closed) by the caller, so one cache can be shared by many workflows
+			checkpoint_store: Optional CheckpointStore; when set, a checkpoint is written after every step so runs can be resumed
+			repair_store: Optional RepairStore; when set, steps that only succeeded through the agent fallback are replaced
+				by the deterministic steps the agent performed, for all later runs
+			rate_limiter: Optional OriginRateLimiter shared with other workflows; navigations and page interactions
+				wait for it, in addition to the limits of the definition's own ``rate_limits``
 
 		Raises:
 			ValueError: If the workflow schema is invalid (though Pydantic handles most).
 		"""
-		self.schema = workflow_schema  # Store the schema object
+		# The definition as loaded; self.schema is this with the stored repairs applied
+		self.base_schema = workflow_schema
 
-		self.name = self.schema.name
-		self.description = self.schema.description
-		self.version = self.schema.version
-		self.steps = self.schema.steps
+		self.name = workflow_schema.name
+		self.description = workflow_schema.description
 
 		self.controller = controller or WorkflowController()
 
-		self.browser = browser or Browser()
+		self.browser_pool = browser_pool
+
+		# With a pool every run leases its own browser, otherwise all runs share this one
+		self.browser: Browser | None = browser if browser_pool else (browser or Browser())
 
 		# Hack to not close it after agent kicks in
-		self.browser.browser_profile.keep_alive = True
+		if self.browser:
+			self.browser.browser_profile.keep_alive = True
 
 		self.llm = llm
 		self.page_extraction_llm = page_extraction_llm
 
 		self.fallback_to_agent = fallback_to_agent
 
-		self.context: dict[str, Any] = {}
+		self.readiness = ReadinessEngine()
+
+		self.selector_cache = selector_cache
+		self.checkpoint_store = checkpoint_store
+		self.repair_store = repair_store
+
+		# The definition's own limits apply to all runs of this instance, the shared limiter to every workflow using it
+		self.rate_limiter = rate_limiter
+		self._rate_limiters = [
+			limiter for limiter in (OriginRateLimiter(workflow_schema.rate_limits), rate_limiter) if limiter and limiter.enabled
+		]
+
+		# Everything that does not depend on run inputs is prepared once, here
+		repairs = repair_store.load(self.name) if repair_store else []
+		self._set_plan(compile_workflow(repair_chain(workflow_schema, repairs)[-1], self.controller))
+
+		# State of the incremental run_step() API; run() never touches it
+		self._step_state: RunState | None = None
 
 		self.inputs_def: List[WorkflowInputSchemaDefinition] = self.schema.input_schema
 		self._input_model: type[BaseModel] = self._build_input_model()
-		
-		# Initialize condition evaluator
-		self.condition_evaluator = ConditionEvaluator(self.browser)
 
 	# --- Loaders ---
 	@classmethod
@@ -110,8 +160,13 @@ class Workflow:
 		*,
 		controller: WorkflowController | None = None,
 		browser: Browser | None = None,
+		browser_pool: BrowserPool | None = None,
 		llm: BaseChatModel | None = None,
 		page_extraction_llm: BaseChatModel | None = None,
+		selector_cache: SelectorCache | None = None,
+		checkpoint_store: CheckpointStore | None = None,
+		repair_store: RepairStore | None = None,
+		rate_limiter: OriginRateLimiter | None = None,
 	) -> Workflow:
 		"""Load a workflow from a file."""
 		with open(file_path, 'r', encoding='utf-8') as f:
@@ -121,53 +176,188 @@ class Workflow:
 			workflow_schema=workflow_schema,
 			controller=controller,
 			browser=browser,
+			browser_pool=browser_pool,
 			llm=llm,
 			page_extraction_llm=page_extraction_llm,
+			selector_cache=selector_cache,
+			checkpoint_store=checkpoint_store,
+			repair_store=repair_store,
+			rate_limiter=rate_limiter,
 		)
 
+	# --- Plans and repairs ---
+	def _set_plan(self, plan: WorkflowPlan) -> None:
+		"""Make *plan* the one new runs execute; runs already going keep the plan they started with."""
+		self.plan = plan
+		self.schema = plan.schema
+		self.version = plan.schema.version
+		self.steps = plan.schema.steps
+
+	async def _refresh_plan(self) -> WorkflowPlan:
+		"""Pick up repairs stored since the plan was compiled, e.g. by another run or process."""
+		if self.repair_store is None:
+			return self.plan
+		try:
+			repairs = await self.repair_store.aload(self.name)
+		except (OSError, ValueError) as e:
+			logger.warning(f'Could not load repairs of workflow "{self.name}": {e}')
+			return self.plan
+		schema = repair_chain(self.base_schema, repairs)[-1]
+		if workflow_fingerprint(schema) != self.plan.fingerprint:
+			logger.info(f'Workflow "{self.name}" was repaired, now at version {schema.version}')
+			self._set_plan(compile_workflow(schema, self.controller))
+		return self.plan
+
+	async def _plan_for_checkpoint(self, checkpoint: Checkpoint) -> WorkflowPlan:
+		"""Return the plan a checkpointed run was executing, which may predate later repairs."""
+		plan = await self._refresh_plan()
+		if checkpoint.workflow_hash == plan.fingerprint:
+			return plan
+		repairs = await self.repair_store.aload(self.name) if self.repair_store else []
+		for schema in repair_chain(self.base_schema, repairs):
+			if workflow_fingerprint(schema) == checkpoint.workflow_hash:
+				return compile_workflow(schema, self.controller)
+		raise ValueError(f'Workflow "{self.name}" changed since run {checkpoint.run_id} was checkpointed, it cannot be resumed')
+
+	async def _record_repair(
+		self, step_index: int, step_resolved: WorkflowStep, history: AgentHistoryList, state: RunState, error: Exception
+	) -> None:
+		"""Store what the fallback agent did as the deterministic replacement of the failed step."""
+		assert self.repair_store is not None
+		steps = repair_steps_from_history(state.plan[step_index].step, step_resolved, history, state.context)
+		if not steps:
+			logger.info(f'Fallback of step {step_index + 1} cannot be replayed deterministically, not repairing it')
+			return
+		try:
+			repair = await self.repair_store.aadd(self.name, state.plan.fingerprint, step_index, steps, error=str(error))
+		except (OSError, ValueError) as e:
+			# Repairs only save future fallbacks, never fail a run because of them
+			logger.warning(f'Could not store repair of step {step_index + 1}: {e}')
+			return
+		if repair:
+			logger.info(f'Repaired step {step_index + 1} with {len(steps)} deterministic steps (repair #{repair.version})')
+
 	# --- Runners ---
-	async def _run_deterministic_step(self, step: DeterministicWorkflowStep, step_index: int) -> ActionResult:
+	async def _prepare_action_context(self, step_index: int, step: WorkflowStep, state: RunState) -> StepHandoff:
+		"""Collect what is known about a step's element before running it."""
+		compiled = state.plan[step_index]
+		action_context = ActionContext(
+			selector_candidates=list(compiled.selector_candidates) if compiled.selector_candidates else None
+		)
+		origin = None
+		# Try the selector that won on earlier runs on this site first
+		if self.selector_cache and getattr(step, 'cssSelector', None):
+			origin = origin_of((await state.browser.get_current_page()).url)
+			cached_selector = await self.selector_cache.lookup(self.name, state.plan.fingerprint, step_index, origin)
+			if cached_selector:
+				action_context.preferred_selectors = [cached_selector]
+		return StepHandoff(step_index=step_index, action_context=action_context, origin=origin)
+
+	async def _look_ahead(
+		self, waiter: ReadinessWaiter, next_step: WorkflowStep, next_index: int, state: RunState
+	) -> StepHandoff:
+		"""Wait for the next step's readiness and keep the element it located for that step."""
+		handoff = await self._prepare_action_context(next_index, next_step, state)
+		state.wait_times[next_index] = await waiter.wait(next_step, handoff.action_context.element_hints())
+		if waiter.located:
+			handoff.action_context.locator, handoff.action_context.selector_used = waiter.located
+		return handoff
+
+	async def _throttle(self, step: DeterministicWorkflowStep, state: RunState, limits: AsyncExitStack) -> float | None:
+		"""Wait for the rate limits of the origin *step* acts on, holding its concurrency slots until *limits* closes.
+
+		Returns the time waited in ms, or None if not limited.
+		"""
+		if not self._rate_limiters or step.type not in RATE_LIMITED_ACTIONS:
+			return None
+		url = step.url if isinstance(step, NavigationStep) else (await state.browser.get_current_page()).url
+		if not url.startswith(('http://', 'https://')):
+			return None
+		origin = origin_of(url)
+		waited = 0.0
+		# Always in the same order (the definition's limiter first), so runs cannot wait on each other's slots in a cycle
+		for limiter in self._rate_limiters:
+			waited += await limits.enter_async_context(limiter.hold(origin))
+		return waited
+
+	async def _run_deterministic_step(self, step: DeterministicWorkflowStep, step_index: int, state: RunState) -> ActionResult:
 		"""Execute a deterministic (controller) action based on step dictionary."""
-		# Assumes WorkflowStep for deterministic type has 'action' and 'params' keys
-		action_name: str = step.type  # Expect 'action' key for deterministic steps
-		params: Dict[str, Any] = step.model_dump()  # Use params if present
+		action_name: str = step.type
+		action_model = state.plan[step_index].build_action(step)
+
+		# Reuse what the previous step's lookahead found for this one
+		handoff = state.handoff if state.handoff and state.handoff.step_index == step_index else None
+		state.handoff = None
+		if handoff is None:
+			handoff = await self._prepare_action_context(step_index, step, state)
+		action_context = handoff.action_context
+		original_selector = getattr(step, 'cssSelector', None)
+
+		# Acting on a throttled site waits for its turn first, and keeps the origin's concurrency slot while acting
+		async with AsyncExitStack() as limits:
+			rate_limit_wait = await self._throttle(step, state, limits)
+			if rate_limit_wait is not None:
+				state.rate_limit_wait_times[step_index] = rate_limit_wait
+				if rate_limit_wait > 0:
+					logger.info(f'Step {step_index + 1} waited {rate_limit_wait:.0f}ms for the rate limit')
+
+			# Arm the next step's readiness wait before acting, so events triggered by this action are not missed.
+			# Its placeholders are resolved now, so skip this when it depends on the output of this very step.
+			next_compiled = state.plan[step_index + 1] if step_index < len(state.plan) - 1 else None
+			if next_compiled and step.output and step.output in next_compiled.dependencies:
+				next_compiled = None
+			next_step = next_compiled.resolve(state.context) if next_compiled else None
+			waiter = await self.readiness.prepare(state.browser, next_step) if next_step else None
+
+			# The lookahead starts as soon as the action has triggered its effect and runs while the page settles
+			lookahead: asyncio.Task[StepHandoff] | None = None
+
+			def start_lookahead() -> None:
+				nonlocal lookahead
+				assert waiter is not None and next_step is not None
+				lookahead = asyncio.create_task(self._look_ahead(waiter, next_step, step_index + 1, state))
+
+			if waiter:
+				action_context.on_dispatched = start_lookahead
 
-		ActionModel = self.controller.registry.create_action_model(include_actions=[action_name])
-		# Pass the params dictionary directly
-		action_model = ActionModel(**{action_name: params})
+			try:
+				result = await self.controller.act(
+					action_model, state.browser, page_extraction_llm=self.page_extraction_llm, context=action_context
+				)
+			except Exception as e:
+				if lookahead:
+					lookahead.cancel()
+					await asyncio.gather(lookahead, return_exceptions=True)
+				if waiter:
+					waiter.cancel()
+				if self.selector_cache and handoff.origin:
+					await self.selector_cache.record(
+						self.name, state.plan.fingerprint, step_index, handoff.origin, original_selector, None
+					)
+				raise RuntimeError(f"Deterministic action '{action_name}' failed: {str(e)}")
+			finally:
+				action_context.on_dispatched = None
 
-		try:
-			result = await self.controller.act(action_model, self.browser, page_extraction_llm=self.page_extraction_llm)
-		except Exception as e:
-			raise RuntimeError(f"Deterministic action '{action_name}' failed: {str(e)}")
-
-		# Helper function to truncate long selectors in logs
-		def truncate_selector(selector: str) -> str:
-			return selector if len(selector) <= 45 else f'{selector[:45]}...'
-
-		# Determine if this is not the last step, and extract next step's cssSelector if available
-		current_index = step_index
-		if current_index < len(self.steps) - 1:
-			next_step = self.steps[current_index + 1]
-			next_step_resolved = self._resolve_placeholders(next_step)
-			css_selector = getattr(next_step_resolved, 'cssSelector', None)
-			if css_selector:
-				try:
-					await self.browser._wait_for_stable_network()
-					page = await self.browser.get_current_page()
+		if self.selector_cache and handoff.origin:
+			await self.selector_cache.record(
+				self.name, state.plan.fingerprint, step_index, handoff.origin, original_selector, action_context.selector_used
+			)
 
-					logger.info(f'Waiting for element with selector: {truncate_selector(css_selector)}')
-					locator, selector_used = await get_best_element_handle(
-						page, css_selector, next_step_resolved, timeout_ms=WAIT_FOR_ELEMENT_TIMEOUT
-					)
-					logger.info(f'Element with selector found: {truncate_selector(selector_used)}')
-				except Exception as e:
-					logger.error(f'Failed to wait for element with selector: {truncate_selector(css_selector)}. Error: {e}')
-					raise Exception(f'Failed to wait for element. Selector: {css_selector}') from e
+		# Wait until the next step can run; a missing target element means this step did not do its job
+		if waiter:
+			if lookahead is None:
+				start_lookahead()
+			assert lookahead is not None
+			try:
+				state.handoff = await lookahead
+				state.ready_step = step_index + 1
+			except ReadinessTimeoutError as e:
+				logger.error(f'Next step {step_index + 2} did not become ready: {e}')
+				raise NextStepNotReadyError(f'Failed to wait for element of step {step_index + 2}: {e}') from e
 
 		return result
 
-	async def _run_agent_step(self, step: AgenticWorkflowStep) -> AgentHistoryList:
+	async def _run_agent_step(self, step: AgenticWorkflowStep, browser: Browser) -> AgentHistoryList:
 		"""Spin-up an Agent based on step dictionary."""
 		if self.llm is None:
 			raise ValueError("An 'llm' instance must be supplied for agent-based steps")
@@ -178,20 +368,20 @@ class Workflow:
 		agent = Agent(
 			task=task,
 			llm=self.llm,
-			browser_session=self.browser,
+			browser_session=browser,
 			use_vision=True,  # Consider making this configurable via WorkflowStep schema
 		)
 		return await agent.run(max_steps=max_steps)
 
-	async def _run_conditional_step(self, step: ConditionalStep) -> ActionResult:
+	async def _run_conditional_step(self, step: ConditionalStep, state: RunState) -> ActionResult:
 		"""Execute a conditional step to check conditions and control workflow flow."""
 		from browser_use.agent.views import ActionResult  # Local import
 		
 		try:
 			# Evaluate the condition
-			condition_result = await self.condition_evaluator.evaluate_condition(
+			condition_result = await ConditionEvaluator(state.browser).evaluate_condition(
 				condition=step.condition,
-				context=self.context,
+				context=state.context,
 				negate=step.negate_condition or False
 			)
 			
@@ -206,8 +396,7 @@ class Workflow:
 				elif step.action == 'skip_next':
 					# This will be handled in the main execution loop
 					logger.info("Conditional step indicates to skip next step")
-					# Store skip flag in context for main loop to check
-					self.context['_skip_next_step'] = True
+					state.skip_next_step = True
 				# 'continue' action does nothing, just proceeds
 				
 			# Return successful ActionResult
@@ -234,6 +423,7 @@ class Workflow:
 		self,
 		step_resolved: WorkflowStep,
 		step_index: int,
+		state: RunState,
 		error: Exception | str | None = None,
 	) -> AgentHistoryList:
 		"""Handle step failure by delegating to an agent."""
@@ -245,7 +435,8 @@ class Workflow:
 		failed_params = step_resolved.model_dump()
 		step_description = step_resolved.description or 'No description provided'
 		error_msg = str(error) if error else 'Unknown error'
-		total_steps = len(self.steps)
+		steps = state.plan.schema.steps
+		total_steps = len(steps)
 		fail_details = (
 			f"step={step_index + 1}/{total_steps}, action='{failed_action_name}', "
 			f"description='{step_description}', params={str(failed_params)}, error='{error_msg}'"
@@ -274,7 +465,7 @@ class Workflow:
 
 		# Build workflow overview using the stored dictionaries
 		workflow_overview_lines: list[str] = []
-		for idx, step in enumerate(self.steps):
+		for idx, step in enumerate(steps):
 			desc = step.description or ''
 			step_type_info = step.type
 			details = step.model_dump()
@@ -285,7 +476,7 @@ class Workflow:
 		# Build the fallback task with the failed_value
 		fallback_task = WORKFLOW_FALLBACK_PROMPT_TEMPLATE.format(
 			step_index=step_index + 1,
-			total_steps=len(self.steps),
+			total_steps=total_steps,
 			workflow_details=workflow_overview,
 			action_type=failed_action_name,
 			fail_details=fail_details,
@@ -303,7 +494,7 @@ class Workflow:
 			description='Fallback agent to handle step failure',
 		)
 
-		return await self._run_agent_step(agent_step_config)
+		return await self._run_agent_step(agent_step_config, state.browser)
 
 	def _validate_inputs(self, inputs: dict[str, Any]) -> None:
 		"""Validate provided inputs against the workflow's input schema definition."""
@@ -318,61 +509,7 @@ class Workflow:
 		except Exception as e:
 			raise ValueError(f'Invalid workflow inputs: {e}') from e
 
-	def _resolve_placeholders(self, data: Any) -> Any:
-		"""Recursively replace placeholders in *data* using current context variables.
-
-		String placeholders are written using Python format syntax, e.g. "{index}".
-		"""
-		if isinstance(data, str):
-			try:
-				# Only attempt to format if placeholder syntax is likely present
-				if '{' in data and '}' in data:
-					formatted_data = data.format(**self.context)
-					return formatted_data
-				return data  # No placeholders, return as is
-			except KeyError:
-				# A key in the placeholder was not found in the context.
-				# Return the original string as per previous behavior.
-				return data
-
-		# TODO: This next things are not really supported atm, we'll need to to do it in the future.
-		elif isinstance(data, list):
-			new_list = []
-			changed = False
-			for item in data:
-				resolved_item = self._resolve_placeholders(item)
-				if resolved_item is not item:
-					changed = True
-				new_list.append(resolved_item)
-			return new_list if changed else data
-		elif isinstance(data, dict):
-			new_dict = {}
-			changed = False
-			for key, value in data.items():
-				resolved_value = self._resolve_placeholders(value)
-				if resolved_value is not value:
-					changed = True
-				new_dict[key] = resolved_value
-			return new_dict if changed else data
-		elif isinstance(data, BaseModel):  # Handle Pydantic models
-			update_dict = {}
-			model_changed = False
-			for field_name in data.model_fields:  # Iterate using model_fields keys
-				original_value = getattr(data, field_name)
-				resolved_value = self._resolve_placeholders(original_value)
-				if resolved_value is not original_value:
-					model_changed = True
-				update_dict[field_name] = resolved_value
-
-			if model_changed:
-				return data.model_copy(update=update_dict)
-			else:
-				return data  # Return original instance if no field's value changed
-		else:
-			# For any other types (int, float, bool, None, etc.), return as is
-			return data
-
-	def _store_output(self, step_cfg: WorkflowStep, result: Any) -> None:
+	def _store_output(self, step_cfg: WorkflowStep, result: Any, context: dict[str, Any]) -> None:
 		"""Store output into context based on 'output' key in step dictionary."""
 		# Assumes WorkflowStep schema includes an optional 'output' field (string)
 		output_key = step_cfg.output
@@ -414,9 +551,9 @@ class Workflow:
 		else:
 			value = str(result)
 
-		self.context[output_key] = value
+		context[output_key] = value
 
-	async def _execute_step(self, step_index: int, step_resolved: WorkflowStep) -> ActionResult | AgentHistoryList:
+	async def _execute_step(self, step_index: int, step_resolved: WorkflowStep, state: RunState) -> ActionResult | AgentHistoryList:
 		"""Execute the resolved step dictionary, handling type branching and fallback."""
 		# Use 'type' field from the WorkflowStep dictionary
 		result: ActionResult | AgentHistoryList
@@ -425,7 +562,7 @@ class Workflow:
 			# Handle conditional steps
 			logger.info(f'Executing conditional step: {step_resolved.description or "No description"}')
 			try:
-				result = await self._run_conditional_step(step_resolved)
+				result = await self._run_conditional_step(step_resolved, state)
 			except WorkflowStopException:
 				# Re-raise to be handled by main execution loop
 				raise
@@ -439,7 +576,7 @@ class Workflow:
 				# Use action key from step dictionary
 				action_name = step_resolved.type or '[No action specified]'
 				logger.info(f'Attempting deterministic action: {action_name}')
-				result = await self._run_deterministic_step(step_resolved, step_index)
+				result = await self._run_deterministic_step(step_resolved, step_index, state)
 				if isinstance(result, ActionResult) and result.error:
 					logger.warning(f'Deterministic action reported error: {result.error}')
 					raise ValueError(f'Deterministic action {action_name} failed: {result.error}')
@@ -451,9 +588,13 @@ class Workflow:
 				if self.llm is None:
 					raise ValueError('Cannot fall back to agent: LLM instance required.')
 				if self.fallback_to_agent:
-					result = await self._fallback_to_agent(step_resolved, step_index, e)
+					result = await self._fallback_to_agent(step_resolved, step_index, state, e)
+					state.fallback_steps.append(step_index)
 					if not result.is_successful():
 						raise ValueError(f'Deterministic step {step_index + 1} ({action_name}) failed even after fallback')
+					# Only a failure of the step's own action shows that the step needs replacing
+					if self.repair_store and not isinstance(e, NextStepNotReadyError):
+						await self._record_repair(step_index, step_resolved, result, state, e)
 				else:
 					raise ValueError(f'Deterministic step {step_index + 1} ({action_name}) failed: {e}')
 		elif isinstance(step_resolved, AgenticWorkflowStep):
@@ -461,7 +602,7 @@ class Workflow:
 			task_description = step_resolved.task
 			logger.info(f'Running agent task: {task_description}')
 			try:
-				result = await self._run_agent_step(step_resolved)
+				result = await self._run_agent_step(step_resolved, state.browser)
 				if not result.is_successful():
 					logger.warning(f'Agent step {step_index + 1} failed evaluation.')
 					raise ValueError(f'Agent step {step_index + 1} failed evaluation.')
@@ -470,7 +611,8 @@ class Workflow:
 					logger.warning(f'Agent step {step_index + 1} failed: {e}. Attempting fallback with agent.')
 					if self.llm is None:
 						raise ValueError('Cannot fall back to agent: LLM instance required.')
-					result = await self._fallback_to_agent(step_resolved, step_index, e)
+					result = await self._fallback_to_agent(step_resolved, step_index, state, e)
+					state.fallback_steps.append(step_index)
 					if not result.is_successful():
 						raise ValueError(f'Agent step {step_index + 1} failed even after fallback')
 				else:
@@ -483,25 +625,26 @@ class Workflow:
 		self,
 		results: List[ActionResult | AgentHistoryList],
 		output_model: type[T],
+		outputs: Dict[str, Any] | None = None,
 	) -> T:
 		"""Convert workflow results to a specified output model.
 
-		Filters ActionResults with extracted_content, then uses LangChain to parse
-		all extracted texts into the structured output model.
+		Filters ActionResults with extracted_content, then fills the output model from
+		the step outputs and the extracted JSON directly where they match its fields.
+		Only fields that cannot be filled that way are parsed by the LLM, from the
+		extracted texts that mention them.
 
 		Args:
 			results: List of workflow step results
 			output_model: Target Pydantic model class to convert to
+			outputs: Values the steps stored in the context, by output name
 
 		Returns:
 			An instance of the specified output model
 		"""
-		if not results:
+		if not results and not outputs:
 			raise ValueError('No results to convert')
 
-		if self.llm is None:
-			raise ValueError('LLM is required for structured output conversion')
-
 		# Extract all content from ActionResults
 		extracted_contents = []
 
@@ -516,22 +659,44 @@ class Workflow:
 						if action_result.extracted_content:
 							extracted_contents.append(action_result.extracted_content)
 
-		if not extracted_contents:
+		if not extracted_contents and not outputs:
 			raise ValueError('No extracted content found in workflow results')
 
-		# Combine all extracted contents
-		combined_text = '\n\n'.join(extracted_contents)
+		candidates = collect_candidates(outputs or {}, extracted_contents)
+		instance, values, unfilled = structure_locally(output_model, candidates)
+		# Optional fields not found locally may still be in the extracted text; without any, their defaults stand
+		if instance is not None and (not unfilled or not extracted_contents or self.llm is None):
+			logger.info(f'Structured output {output_model.__name__} filled from step outputs without the LLM')
+			return instance
 
-		messages: list[BaseMessage] = [
-			AIMessage(content=STRUCTURED_OUTPUT_PROMPT),
-			HumanMessage(content=combined_text),
-		]
+		if self.llm is None:
+			raise ValueError(f'LLM is required for structured output conversion (could not fill: {", ".join(unfilled)})')
+		if not extracted_contents:
+			raise ValueError('No extracted content found in workflow results')
 
-		chain = self.llm.with_structured_output(output_model)
-		chain_result: T = await chain.ainvoke(messages)  # type: ignore
+		if values:
+			logger.info(f'Structured output: {len(values)} fields filled locally, asking the LLM for {", ".join(unfilled)}')
+			snippets = relevant_snippets(extracted_contents, unfilled, output_model)
+			chain = self.llm.with_structured_output(partial_model(output_model, unfilled))
+			partial = await chain.ainvoke(self._structured_output_messages(snippets))
+			try:
+				return output_model.model_validate({**values, **partial.model_dump()})  # type: ignore
+			except ValidationError as e:
+				logger.warning(f'Locally filled fields do not combine with the LLM answer, parsing everything: {e}')
+
+		full_chain = self.llm.with_structured_output(output_model)
+		chain_result: T = await full_chain.ainvoke(self._structured_output_messages(extracted_contents))  # type: ignore
 
 		return chain_result
 
+	@staticmethod
+	def _structured_output_messages(texts: List[str]) -> list[BaseMessage]:
+		# Combine all extracted contents
+		return [
+			AIMessage(content=STRUCTURED_OUTPUT_PROMPT),
+			HumanMessage(content='\n\n'.join(texts)),
+		]
+
 	async def run_step(self, step_index: int, inputs: dict[str, Any] | None = None):
 		"""Run a *single* workflow step asynchronously and return its result.
 
@@ -541,22 +706,25 @@ class Workflow:
 				Zero-based index of the step to execute.
 		inputs:
 				Optional workflow-level inputs.  If provided on the first call they
-				are validated and injected into :pyattr:`context`.  Subsequent
-				calls can omit *inputs* as :pyattr:`context` is already populated.
+				are validated and injected into the step-by-step run context.  Subsequent
+				calls can omit *inputs* as the context is already populated.
 		"""
 		if not (0 <= step_index < len(self.steps)):
 			raise IndexError(f'step_index {step_index} is out of range for workflow with {len(self.steps)} steps')
+		if self.browser is None:
+			raise ValueError('run_step requires a dedicated browser, it cannot be used with only a browser_pool')
 
 		# Initialise/augment context once with the provided inputs
-		if inputs is not None or not self.context:
+		if inputs is not None or self._step_state is None:
 			runtime_inputs = inputs or {}
 			self._validate_inputs(runtime_inputs)
-			# If context is empty we assume this is the first invocation – start fresh;
+			# If there is no state yet we assume this is the first invocation – start fresh;
 			# otherwise merge new inputs on top (explicitly overriding duplicates)
-			if not self.context:
-				self.context = runtime_inputs.copy()
+			if self._step_state is None:
+				self._step_state = RunState(plan=self.plan, browser=self.browser, context=runtime_inputs.copy())
 			else:
-				self.context.update(runtime_inputs)
+				self._step_state.context.update(runtime_inputs)
+		state = self._step_state
 
 		# 各ステップで新しいブラウザコンテキストを作成
 		try:
@@ -567,11 +735,10 @@ class Workflow:
 			# 権限を設定
 			await self.browser.grant_permissions(['clipboard-read', 'clipboard-write', 'notifications'])
 
-			raw_step_cfg = self.steps[step_index]
-			step_resolved = self._resolve_placeholders(raw_step_cfg)
-			result = await self._execute_step(step_index, step_resolved)
+			step_resolved = state.plan[step_index].resolve(state.context)
+			result = await self._execute_step(step_index, step_resolved, state)
 			# Persist outputs (if declared) for future steps
-			self._store_output(step_resolved, result)
+			self._store_output(step_resolved, result, state.context)
 			await asyncio.sleep(5)  # Keep browser open for 5 seconds
 		finally:
 			# ステップ終了時にブラウザを閉じる
@@ -581,81 +748,238 @@ class Workflow:
 				logger.error(f"Error closing browser: {e}")
 		return result
 
-	async def run(
+	async def _load_checkpoint(self, resume_from: str | Checkpoint) -> Checkpoint:
+		if isinstance(resume_from, Checkpoint):
+			checkpoint = resume_from
+		else:
+			if self.checkpoint_store is None:
+				raise ValueError('Resuming a run by id requires a checkpoint_store')
+			checkpoint = await self.checkpoint_store.aload(resume_from)
+			if checkpoint is None:
+				raise ValueError(f'No checkpoint found for run {resume_from!r}')
+		return checkpoint
+
+	async def _save_checkpoint(self, next_step: int, state: RunState) -> None:
+		"""Record that every step before *next_step* has completed."""
+		if self.checkpoint_store is None or state.run_id is None:
+			return
+		try:
+			url, storage_state = await capture_browser_state(state.browser, self.checkpoint_store.capture_storage_state)
+			await self.checkpoint_store.asave(
+				Checkpoint(
+					run_id=state.run_id,
+					workflow=self.name,
+					workflow_hash=state.plan.fingerprint,
+					next_step=next_step,
+					context=state.context,
+					skip_next_step=state.skip_next_step,
+					url=url,
+					storage_state=storage_state,
+					created_at=time.time(),
+				)
+			)
+		except Exception as e:
+			# A missing checkpoint only costs a longer resume, never the run itself
+			logger.warning(f'Could not write checkpoint for run {state.run_id}: {type(e).__name__}: {e}')
+
+	async def run_iter(
 		self,
 		inputs: dict[str, Any] | None = None,
 		close_browser_at_end: bool = True,
 		cancel_event: asyncio.Event | None = None,
-		output_model: type[T] | None = None,
-	) -> WorkflowRunOutput[T]:
-		"""Execute the workflow asynchronously using step dictionaries.
-
-		@dev This is the main entry point for the workflow.
+		run_id: str | None = None,
+		resume_from: str | Checkpoint | None = None,
+	) -> AsyncIterator[StepEvent]:
+		"""Execute the workflow, yielding a :class:`StepEvent` as each step starts and finishes.
 
-		Args:
-			inputs: Optional dictionary of workflow inputs
-			close_browser_at_end: Whether to close the browser when done
-			cancel_event: Optional event to signal cancellation
-			output_model: Optional Pydantic model class to convert results to
+		Results are handed out as they are produced and not kept afterwards, so consumers can
+		stream them to disk or to clients with constant memory. A failing step yields a
+		``step_failed`` event and then raises; every other run ends with ``run_finished``.
 
-		Returns:
-			Either WorkflowRunOutput containing all step results or an instance of output_model if provided
+		The browser is released when the iterator is exhausted or closed; when breaking out
+		early, wrap it in ``contextlib.aclosing()``. Arguments are the same as for :py:meth:`run`.
 		"""
-		runtime_inputs = inputs or {}
-		# 1. Validate inputs against definition
+		# 1. Validate inputs against definition, restoring the context of a checkpointed run
+		checkpoint = await self._load_checkpoint(resume_from) if resume_from is not None else None
+		if checkpoint:
+			plan = await self._plan_for_checkpoint(checkpoint)
+			runtime_inputs = {**checkpoint.context, **(inputs or {})}
+			run_id = checkpoint.run_id
+		else:
+			plan = await self._refresh_plan()
+			runtime_inputs = inputs or {}
 		self._validate_inputs(runtime_inputs)
-		# 2. Initialize context with validated inputs
-		self.context = runtime_inputs.copy()  # Start with a fresh context
+		if self.checkpoint_store and run_id is None:
+			run_id = uuid.uuid4().hex
 
-		results: List[ActionResult | AgentHistoryList] = []
+		# 2. Lease an isolated browser from the pool, or fall back to the workflow's own browser
+		lease = await self.browser_pool.acquire() if self.browser_pool else None
+		browser = lease.browser if lease else self.browser
+		assert browser is not None
+
+		# 3. Initialize a fresh per-run state with validated inputs
+		state = RunState(
+			run_id=run_id, plan=plan, browser=browser, lease=lease, cancel_event=cancel_event, context=runtime_inputs.copy()
+		)
 
-		await self.browser.start()
 		try:
-			for step_index, step_dict in enumerate(self.steps):  # self.steps now holds dictionaries
-				await asyncio.sleep(0.1)
-				await self.browser._wait_for_stable_network()
+			if not lease:
+				await browser.start()
+
+			start_step = 0
+			if checkpoint:
+				logger.info(f'Resuming run {checkpoint.run_id} at step {checkpoint.next_step + 1}/{len(plan)}')
+				await restore_browser_state(browser, checkpoint.url, checkpoint.storage_state)
+				state.skip_next_step = checkpoint.skip_next_step
+				start_step = checkpoint.next_step
+
+			status: Literal['completed', 'stopped', 'cancelled'] = 'completed'
+			stop_message: str | None = None
+			for step_index in range(start_step, len(plan)):
+				step_dict = plan[step_index].step
+				step_info = {
+					'run_id': run_id,
+					'step_index': step_index,
+					'step_type': step_dict.type,
+					'description': step_dict.description,
+				}
 
 				# Check if cancellation was requested
-				if cancel_event and cancel_event.is_set():
+				if state.cancelled:
 					logger.info('Cancellation requested - stopping workflow execution')
+					status = 'cancelled'
 					break
 
 				# Check if previous conditional step indicated to skip this step
-				if self.context.get('_skip_next_step', False):
+				if state.skip_next_step:
 					logger.info(f'Skipping step {step_index + 1} as requested by previous conditional step')
-					self.context.pop('_skip_next_step', None)  # Remove the flag
+					state.skip_next_step = False
+					yield StepEvent(type='step_skipped', **step_info)
 					continue
 
 				# Use description from the step dictionary
 				step_description = step_dict.description or 'No description provided'
-				logger.info(f'--- Running Step {step_index + 1}/{len(self.steps)} -- {step_description} ---')
-				# Resolve placeholders using the current context (works on the dictionary)
-				step_resolved = self._resolve_placeholders(step_dict)
+				logger.info(f'--- Running Step {step_index + 1}/{len(plan)} -- {step_description} ---')
+				yield StepEvent(type='step_started', **step_info)
+				# Fill in placeholders from the current context
+				step_resolved = plan[step_index].resolve(state.context)
 
+				# Wait for what this step needs, unless the previous step already did so after its action
+				if state.ready_step != step_index:
+					try:
+						state.wait_times[step_index] = await self.readiness.wait_for_step(browser, step_resolved)
+					except ReadinessTimeoutError as e:
+						# Let the step itself fail (and fall back) on the missing element
+						logger.warning(f'Step {step_index + 1} not ready: {e}')
+				if step_index in state.wait_times:
+					logger.info(f'Step {step_index + 1} ready after {state.wait_times[step_index]:.0f}ms')
+
+				started = time.perf_counter()
 				try:
 					# Execute step using the unified _execute_step method
-					result = await self._execute_step(step_index, step_resolved)
-
-					results.append(result)
-					# Persist outputs using the resolved step dictionary
-					self._store_output(step_resolved, result)
-					logger.info(f'--- Finished Step {step_index + 1} ---\n')
+					result = await self._execute_step(step_index, step_resolved, state)
 				except WorkflowStopException as e:
 					logger.info(f'Workflow execution stopped at step {step_index + 1}: {e.message}')
+					status, stop_message = 'stopped', e.message
 					break
+				except Exception as e:
+					yield StepEvent(
+						type='step_failed',
+						duration_ms=(time.perf_counter() - started) * 1000 - state.rate_limit_wait_times.get(step_index, 0.0),
+						readiness_wait_ms=state.wait_times.get(step_index),
+						rate_limit_wait_ms=state.rate_limit_wait_times.get(step_index),
+						error=str(e),
+						**step_info,
+					)
+					raise
+				duration_ms = (time.perf_counter() - started) * 1000 - state.rate_limit_wait_times.get(step_index, 0.0)
+
+				# Persist outputs using the resolved step dictionary
+				self._store_output(step_resolved, result, state.context)
+				if step_resolved.output and step_resolved.output in state.context:
+					state.outputs[step_resolved.output] = state.context[step_resolved.output]
+				await self._save_checkpoint(step_index + 1, state)
+				logger.info(f'--- Finished Step {step_index + 1} ---\n')
+				yield StepEvent(
+					type='step_completed',
+					result=result,
+					duration_ms=duration_ms,
+					readiness_wait_ms=state.wait_times.get(step_index),
+					rate_limit_wait_ms=state.rate_limit_wait_times.get(step_index),
+					fallback_used=step_index in state.fallback_steps,
+					**step_info,
+				)
+
+			# A finished run has nothing left to resume
+			if self.checkpoint_store and run_id and status != 'cancelled':
+				await self.checkpoint_store.adelete(run_id)
 
-			# Convert results to output model if requested
-			output_model_result: T | None = None
-			if output_model:
-				output_model_result = await self._convert_results_to_output_model(results, output_model)
+			yield StepEvent(type='run_finished', run_id=run_id, status=status, message=stop_message, outputs=state.outputs)
 
 		finally:
-			# Clean-up browser after finishing workflow
-			if close_browser_at_end:
-				self.browser.browser_profile.keep_alive = False
-				await self.browser.close()
+			# Clean-up browser after finishing workflow; leased browsers always go back to the pool
+			if lease:
+				await lease.release()
+			elif close_browser_at_end:
+				browser.browser_profile.keep_alive = False
+				await browser.close()
+
+	async def run(
+		self,
+		inputs: dict[str, Any] | None = None,
+		close_browser_at_end: bool = True,
+		cancel_event: asyncio.Event | None = None,
+		output_model: type[T] | None = None,
+		run_id: str | None = None,
+		resume_from: str | Checkpoint | None = None,
+	) -> WorkflowRunOutput[T]:
+		"""Execute the workflow asynchronously using step dictionaries.
+
+		@dev This is the main entry point for the workflow. It is safe to call concurrently
+		on the same instance when a browser_pool is configured, as every call gets its own RunState.
+		Use :py:meth:`run_iter` to process step results while the run is still going.
+
+		Args:
+			inputs: Optional dictionary of workflow inputs (on resume, overrides values from the checkpoint)
+			close_browser_at_end: Whether to close the browser when done (ignored for pooled browsers)
+			cancel_event: Optional event to signal cancellation
+			output_model: Optional Pydantic model class to convert results to
+			run_id: Optional id for the run's checkpoints (generated when a checkpoint_store is set)
+			resume_from: Run id or Checkpoint to continue from; completed steps are not run again
 
-		return WorkflowRunOutput(step_results=results, output_model=output_model_result)
+		Returns:
+			Either WorkflowRunOutput containing all step results or an instance of output_model if provided.
+			A resumed run only reports the results of the steps it executed itself.
+		"""
+		step_results: List[ActionResult | AgentHistoryList] = []
+		wait_times: Dict[int, float] = {}
+		rate_limit_wait_times: Dict[int, float] = {}
+		outputs: Dict[str, Any] = {}
+		async for event in self.run_iter(
+			inputs, close_browser_at_end=close_browser_at_end, cancel_event=cancel_event, run_id=run_id, resume_from=resume_from
+		):
+			if event.type == 'step_completed' and event.result is not None:
+				step_results.append(event.result)
+			if event.step_index is not None and event.readiness_wait_ms is not None:
+				wait_times[event.step_index] = event.readiness_wait_ms
+			if event.step_index is not None and event.rate_limit_wait_ms is not None:
+				rate_limit_wait_times[event.step_index] = event.rate_limit_wait_ms
+			if event.outputs is not None:
+				outputs = event.outputs
+			run_id = event.run_id
+
+		# Convert results to output model if requested
+		output_model_result: T | None = None
+		if output_model:
+			output_model_result = await self._convert_results_to_output_model(step_results, output_model, outputs)
+
+		return WorkflowRunOutput(
+			step_results=step_results,
+			output_model=output_model_result,
+			readiness_wait_ms=wait_times,
+			rate_limit_wait_ms=rate_limit_wait_times,
+			run_id=run_id,
+		)
 
 	# ------------------------------------------------------------------
 	# LangChain tool wrapper
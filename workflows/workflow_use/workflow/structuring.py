@@ -0,0 +1,126 @@
+"""
+Local-first structuring of workflow results into an output model.
+
+Step outputs that already are JSON are validated against the model directly, field by field
+with pydantic coercion; only the fields that cannot be filled that way, required or optional,
+are left for the LLM.
+"""
+
+import re
+from typing import Any, Dict, List, Optional, Sequence, Tuple, TypeVar
+
+from pydantic import BaseModel, TypeAdapter, ValidationError, create_model
+
+from workflow_use.controller.chunked_extraction import parse_json_output
+
+T = TypeVar('T', bound=BaseModel)
+
+
+def _normalize(name: str) -> str:
+	return re.sub(r'[^a-z0-9]', '', name.lower())
+
+
+def _field_names(name: str, model: type[BaseModel]) -> List[str]:
+	"""Normalized names a field may appear under: its own name and its aliases."""
+	field = model.model_fields[name]
+	names = [name, field.alias, field.validation_alias if isinstance(field.validation_alias, str) else None]
+	return [_normalize(candidate) for candidate in names if candidate]
+
+
+def collect_candidates(outputs: Dict[str, Any], texts: Sequence[str]) -> List[Any]:
+	"""JSON values the results hold, in step order: the stored step outputs, then what the extracted texts parse to.
+
+	Step outputs are also offered under their output name, so ``{"price": ...}`` can fill a field ``price``.
+	"""
+	candidates: List[Any] = []
+	for name, value in outputs.items():
+		candidates.append({name: value})
+		if isinstance(value, dict):
+			candidates.append(value)
+	for text in texts:
+		value = parse_json_output(text)
+		if value is not None:
+			candidates.append(value)
+	return candidates
+
+
+def _lookup(candidates: List[Any]) -> Dict[str, Any]:
+	"""Normalized key -> value over all candidate objects; later candidates win, nested keys only fill gaps."""
+	values: Dict[str, Any] = {}
+	nested: Dict[str, Any] = {}
+	for candidate in candidates:
+		if not isinstance(candidate, dict):
+			continue
+		for key, value in candidate.items():
+			if value is None:
+				continue
+			values[_normalize(key)] = value
+			if isinstance(value, dict):
+				nested.update({_normalize(inner): inner_value for inner, inner_value in value.items() if inner_value is not None})
+	return {**nested, **values}
+
+
+def structure_locally(output_model: type[T], candidates: List[Any]) -> Tuple[Optional[T], Dict[str, Any], List[str]]:
+	"""Fill *output_model* from *candidates* without an LLM.
+
+	Returns the model instance (or None), the values found and the names of the fields not found.
+	The instance is the candidate holding every field found in any candidate if it validates as a
+	whole, or else the model built from the fields filled one by one once all required ones are;
+	optional fields that were not found keep their defaults and are still listed as unfilled.
+	"""
+	lookup = _lookup(candidates)
+	names = {name: _field_names(name, output_model) for name in output_model.model_fields}
+	found = [name for name, keys in names.items() if any(key in lookup for key in keys)]
+
+	# A single object only stands for the whole output if it holds every field found anywhere; otherwise
+	# (and always for models whose fields are all optional) it would drop what other candidates hold
+	for candidate in reversed(candidates) if found else []:
+		if not isinstance(candidate, dict):
+			continue
+		keys = {_normalize(key) for key, value in candidate.items() if value is not None}
+		if all(keys.intersection(names[name]) for name in found):
+			try:
+				instance = output_model.model_validate(candidate)
+			except ValidationError:
+				continue
+			values = {name: getattr(instance, name) for name in output_model.model_fields if name in instance.model_fields_set}
+			return instance, values, [name for name in output_model.model_fields if name not in values]
+
+	values: Dict[str, Any] = {}
+	for name, field in output_model.model_fields.items():
+		for key in names[name]:
+			if key not in lookup:
+				continue
+			try:
+				values[name] = TypeAdapter(field.annotation).validate_python(lookup[key])
+				break
+			except ValidationError:
+				continue
+
+	unfilled = [name for name in output_model.model_fields if name not in values]
+	if values and not any(output_model.model_fields[name].is_required() for name in unfilled):
+		try:
+			return output_model.model_validate(values), values, unfilled
+		except ValidationError:
+			# Model-level validators reject the combination: let the LLM do all of it
+			return None, {}, list(output_model.model_fields)
+	return None, values, unfilled
+
+
+def partial_model(output_model: type[BaseModel], fields: List[str]) -> type[BaseModel]:
+	"""A model with just *fields* of *output_model*, to ask the LLM for those only."""
+	definitions: Dict[str, Any] = {
+		name: (output_model.model_fields[name].annotation, output_model.model_fields[name]) for name in fields
+	}
+	return create_model(output_model.__name__, __doc__=output_model.__doc__, **definitions)
+
+
+def relevant_snippets(texts: Sequence[str], fields: List[str], output_model: type[BaseModel]) -> List[str]:
+	"""The texts that mention any of *fields* (by the words of their names or descriptions); all texts if none does."""
+	terms = set()
+	for name in fields:
+		field = output_model.model_fields[name]
+		words = re.findall(r'[A-Za-z][a-z]*|\d+', f'{name} {field.description or ""}')
+		terms.update(word.lower() for word in words if len(word) > 2)
+	relevant = [text for text in texts if any(term in text.lower() for term in terms)]
+	return relevant or list(texts)
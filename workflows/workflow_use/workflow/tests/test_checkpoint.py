@@ -0,0 +1,42 @@
+import os
+import stat
+import time
+
+import pytest
+
+from workflow_use.workflow.checkpoint import CheckpointStore
+from workflow_use.workflow.views import Checkpoint
+
+
+def _checkpoint(run_id):
+	return Checkpoint(run_id=run_id, workflow='Test', workflow_hash='abc', next_step=2, context={'q': 'x'}, created_at=0)
+
+
+def test_save_load_and_delete(tmp_path):
+	store = CheckpointStore(tmp_path)
+	store.save(_checkpoint('run-1'))
+
+	assert store.load('run-1') == _checkpoint('run-1')
+	assert stat.S_IMODE(os.stat(tmp_path / 'run-1.json').st_mode) == 0o600
+	assert store.list_run_ids() == ['run-1']
+
+	store.delete('run-1')
+	assert store.load('run-1') is None
+	with pytest.raises(ValueError):
+		store.load('../run-1')
+
+
+def test_storage_state_is_opt_in(tmp_path):
+	assert not CheckpointStore(tmp_path).capture_storage_state
+	assert CheckpointStore(tmp_path, capture_storage_state=True).capture_storage_state
+
+
+def test_prune_deletes_old_checkpoints(tmp_path):
+	store = CheckpointStore(tmp_path)
+	store.save(_checkpoint('old'))
+	store.save(_checkpoint('new'))
+	week_ago = time.time() - 7 * 86400
+	os.utime(tmp_path / 'old.json', (week_ago, week_ago))
+
+	assert store.prune(time.time() - 86400) == 1
+	assert store.list_run_ids() == ['new']
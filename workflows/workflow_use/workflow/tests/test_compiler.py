@@ -0,0 +1,106 @@
+import pytest
+
+from workflow_use.controller.service import WorkflowController
+from workflow_use.schema.views import WorkflowDefinitionSchema
+from workflow_use.workflow.compiler import PlaceholderTemplate, compile_workflow
+from workflow_use.workflow.selector_cache import workflow_fingerprint
+
+# Recorded steps carry the tab and time they were captured in; the controller actions require them
+RECORDED = {'timestamp': 1700000000000, 'tabId': 1}
+
+
+def _schema(*steps):
+	return WorkflowDefinitionSchema(name='Test', description='Test workflow', version='1.0', input_schema=[], steps=list(steps))
+
+
+@pytest.fixture(scope='module')
+def controller():
+	return WorkflowController()
+
+
+@pytest.mark.parametrize(
+	'source, context',
+	[
+		('Hello {name}', {'name': 'Ada'}),
+		('{count:>5}|{name!r}', {'count': 3, 'name': 'x'}),
+		('{user.name}', {'user': type('User', (), {'name': 'Ada'})()}),
+		('{items[0]} and {{literal}}', {'items': ['first']}),
+	],
+)
+def test_template_renders_like_str_format(source, context):
+	template = PlaceholderTemplate.parse(source)
+
+	assert isinstance(template, PlaceholderTemplate)
+	assert template.render(context) == source.format(**context)
+
+
+def test_template_with_missing_variable_returns_the_source():
+	template = PlaceholderTemplate.parse('{first} {last}')
+
+	assert template.variables == {'first', 'last'}
+	assert template.render({'first': 'Ada'}) == '{first} {last}'
+
+
+@pytest.mark.parametrize(
+	'source, expected',
+	[
+		('no placeholders', 'no placeholders'),
+		('div:has(> a}', 'div:has(> a}'),
+		('a[data-x="{"]', 'a[data-x="{"]'),
+		('{0} and {}', '{0} and {}'),
+		('{{escaped}}', '{escaped}'),
+	],
+)
+def test_strings_that_are_not_templates(source, expected):
+	assert PlaceholderTemplate.parse(source) == expected
+
+
+def test_static_steps_are_built_once(controller):
+	plan = compile_workflow(_schema({**RECORDED, 'type': 'click', 'cssSelector': '#submit', 'elementTag': 'button'}), controller)
+	step = plan[0]
+
+	assert step.kind == 'deterministic'
+	assert step.is_static
+	assert step.dependencies == frozenset()
+	assert step.resolve({'anything': 1}) is step.step
+	assert step.build_action(step.step) is step.static_action
+	assert step.selector_candidates and step.selector_candidates[0] == '#submit'
+
+
+def test_placeholders_are_filled_per_run(controller):
+	plan = compile_workflow(
+		_schema(
+			{**RECORDED, 'type': 'navigation', 'url': 'https://example.com/{path}'},
+			{**RECORDED, 'type': 'input', 'cssSelector': '#q', 'value': '{query}'},
+		),
+		controller,
+	)
+
+	assert [step.dependencies for step in plan.steps] == [{'path'}, {'query'}]
+	resolved = plan[1].resolve({'query': 'lamps', 'path': 'search'})
+	assert resolved.value == 'lamps'
+	assert plan[1].step.value == '{query}'
+	assert plan[1].build_action(resolved).model_dump(exclude_unset=True)['input']['value'] == 'lamps'
+	assert plan[0].resolve({}).url == 'https://example.com/{path}'
+
+
+def test_selector_candidates_wait_for_placeholders(controller):
+	plan = compile_workflow(_schema({**RECORDED, 'type': 'click', 'cssSelector': '#item-{id}'}), controller)
+
+	assert plan[0].selector_candidates is None
+
+
+def test_step_kinds_and_fingerprint(controller):
+	schema = _schema(
+		{**RECORDED, 'type': 'navigation', 'url': 'https://example.com'},
+		{'type': 'agent', 'task': 'Find the price of {product}'},
+		{'type': 'conditional', 'condition': 'document.title === ""'},
+	)
+
+	plan = compile_workflow(schema, controller)
+
+	assert [step.kind for step in plan.steps] == ['deterministic', 'agent', 'conditional']
+	assert plan[1].resolve({'product': 'a lamp'}).task == 'Find the price of a lamp'
+	assert plan.fingerprint == workflow_fingerprint(schema)
+	assert compile_workflow(schema, controller).fingerprint == plan.fingerprint
+	assert len(plan) == 3
@@ -0,0 +1,129 @@
+import asyncio
+
+import pytest
+
+from workflow_use.schema.views import RateLimit
+from workflow_use.workflow import rate_limit
+from workflow_use.workflow.rate_limit import OriginRateLimiter, TokenBucket
+
+
+@pytest.fixture
+def clock(monkeypatch):
+	"""A monotonic clock that only moves when the test advances it."""
+	now = [1000.0]
+	monkeypatch.setattr(rate_limit.time, 'monotonic', lambda: now[0])
+	return now
+
+
+def test_burst_is_free_then_tokens_queue_up(clock):
+	bucket = TokenBucket(rate=2, burst=3)
+
+	assert [bucket.reserve() for _ in range(3)] == [0.0, 0.0, 0.0]
+	# Every further token is half a second after the previous one
+	assert [bucket.reserve() for _ in range(3)] == [0.5, 1.0, 1.5]
+
+
+def test_tokens_refill_over_time_up_to_the_burst(clock):
+	bucket = TokenBucket(rate=2, burst=2)
+	bucket.reserve()
+	bucket.reserve()
+
+	clock[0] += 0.5
+	assert bucket.reserve() == 0.0
+	assert bucket.reserve() == 0.5
+
+	clock[0] += 60
+	assert [bucket.reserve() for _ in range(3)] == [0.0, 0.0, 0.5]
+
+
+def test_limit_for_prefers_exact_origin_then_glob_then_default():
+	exact, glob, default = RateLimit(requests_per_second=5), RateLimit(requests_per_second=1), RateLimit(requests_per_second=10)
+	limiter = OriginRateLimiter(
+		{'https://*.example.com': glob, 'https://shop.example.com': exact},
+		default=default,
+	)
+
+	assert limiter.limit_for('https://shop.example.com') is exact
+	assert limiter.limit_for('https://docs.example.com') is glob
+	assert limiter.limit_for('https://other.org') is default
+	assert OriginRateLimiter({'https://*.example.com': glob}).limit_for('https://other.org') is None
+
+
+def test_enabled():
+	assert not OriginRateLimiter().enabled
+	assert OriginRateLimiter(default=RateLimit(requests_per_second=1)).enabled
+	assert OriginRateLimiter({'https://example.com': RateLimit(requests_per_second=1)}).enabled
+
+
+def test_acquire_waits_per_origin(clock, monkeypatch):
+	slept = []
+
+	async def sleep(delay):
+		slept.append(delay)
+
+	monkeypatch.setattr(rate_limit.asyncio, 'sleep', sleep)
+	limiter = OriginRateLimiter({'https://*.example.com': RateLimit(requests_per_second=4)})
+
+	async def main():
+		return [
+			await limiter.acquire('https://a.example.com'),
+			await limiter.acquire('https://a.example.com'),
+			# Origins matched by the same glob do not share a bucket
+			await limiter.acquire('https://b.example.com'),
+			await limiter.acquire('https://other.org'),
+		]
+
+	assert asyncio.run(main()) == [0.0, 250.0, 0.0, 0.0]
+	assert slept == [0.25]
+
+
+def test_hold_caps_concurrent_actions_per_origin():
+	limiter = OriginRateLimiter(default=RateLimit(requests_per_second=1000, burst=100, max_concurrent=2))
+	running = {'now': 0, 'most': 0}
+
+	async def act(origin):
+		async with limiter.hold(origin):
+			running['now'] += 1
+			running['most'] = max(running['most'], running['now'])
+			await asyncio.sleep(0.01)
+			running['now'] -= 1
+
+	async def main():
+		await asyncio.gather(*(act('https://a.example.com') for _ in range(6)))
+		most_on_one_origin = running['most']
+		# Each origin has slots of its own
+		await asyncio.gather(act('https://a.example.com'), act('https://a.example.com'), act('https://b.example.com'))
+		return most_on_one_origin, running['most']
+
+	assert asyncio.run(main()) == (2, 3)
+
+
+def test_hold_without_cap_only_waits_for_the_rate(clock, monkeypatch):
+	async def sleep(delay):
+		pass
+
+	monkeypatch.setattr(rate_limit.asyncio, 'sleep', sleep)
+	limiter = OriginRateLimiter(default=RateLimit(requests_per_second=2))
+
+	async def main():
+		waited = []
+		for _ in range(2):
+			async with limiter.hold('https://example.com') as wait:
+				waited.append(wait)
+		return waited
+
+	assert asyncio.run(main()) == [0.0, 500.0]
+
+
+def test_least_recently_used_idle_origins_are_evicted():
+	limiter = OriginRateLimiter(default=RateLimit(requests_per_second=1, max_concurrent=1), max_origins=2)
+
+	async def main():
+		async with limiter.hold('https://busy.example.com'):
+			await limiter.acquire('https://a.example.com')
+			await limiter.acquire('https://b.example.com')
+			# The busy origin is the least recently used, but holds a slot
+			return list(limiter._origins)
+
+	assert asyncio.run(main()) == ['https://busy.example.com', 'https://b.example.com']
+	assert len(limiter._origins) == 2
@@ -0,0 +1,177 @@
+from concurrent.futures import ThreadPoolExecutor
+
+from browser_use import Controller
+from browser_use.agent.views import ActionResult, AgentBrain, AgentHistory, AgentHistoryList, AgentOutput
+from browser_use.browser.views import BrowserStateHistory
+from browser_use.dom.history_tree_processor.view import DOMHistoryElement
+
+from workflow_use.schema.views import AgenticWorkflowStep, InputStep, WorkflowDefinitionSchema
+from workflow_use.workflow.repair import RepairStore, repair_chain, repair_steps_from_history
+from workflow_use.workflow.selector_cache import workflow_fingerprint
+from workflow_use.workflow.views import WorkflowRepair
+
+ActionModel = Controller().registry.create_action_model()
+
+SEARCH_BOX = DOMHistoryElement(
+	tag_name='input',
+	xpath='html/body/form/input',
+	highlight_index=3,
+	entire_parent_branch_path=['html', 'body', 'form', 'input'],
+	attributes={'name': 'q'},
+	css_selector='form > input[name="q"]',
+)
+RESULT_LINK = DOMHistoryElement(
+	tag_name='a',
+	xpath='html/body/main/a',
+	highlight_index=5,
+	entire_parent_branch_path=['html', 'body', 'main', 'a'],
+	attributes={},
+)
+FRAMED_BUTTON = DOMHistoryElement(
+	tag_name='button',
+	xpath='html/body/button',
+	highlight_index=7,
+	entire_parent_branch_path=['html', 'body', 'iframe', 'html', 'body', 'button'],
+	attributes={},
+)
+
+
+def _history(*items):
+	"""Agent history of one item per ``(actions, elements, errors)`` tuple; *errors* may be omitted."""
+	history = []
+	for actions, elements, *errors in items:
+		errors = errors[0] if errors else [None] * len(actions)
+		history.append(
+			AgentHistory(
+				model_output=AgentOutput(
+					current_state=AgentBrain(evaluation_previous_goal='', memory='', next_goal=''),
+					action=[ActionModel(**action) for action in actions],
+				),
+				result=[ActionResult(error=error) for error in errors],
+				state=BrowserStateHistory(url='https://example.com', title='', tabs=[], interacted_element=elements),
+			)
+		)
+	return AgentHistoryList(history=history)
+
+
+def _input_step(value):
+	return InputStep(
+		type='input',
+		cssSelector='#q',
+		value=value,
+		description='Search for the query',
+		output='search',
+		wait_for={'type': 'network_idle'},
+		timestamp=1,
+		tabId=4,
+	)
+
+
+def test_agent_actions_become_steps():
+	history = _history(
+		([{'input_text': {'index': 3, 'text': 'lamps'}}, {'send_keys': {'keys': 'Enter'}}], [SEARCH_BOX, None]),
+		([{'scroll_down': {}}, {'click_element_by_index': {'index': 5}}], [None, RESULT_LINK]),
+		([{'done': {'text': 'Done', 'success': True}}], [None]),
+	)
+
+	steps = repair_steps_from_history(_input_step('{query}'), _input_step('lamps'), history)
+
+	assert [step.type for step in steps] == ['input', 'key_press', 'click']
+	# The value the agent typed came from the step, so it becomes the step's placeholder again
+	assert steps[0].value == '{query}'
+	assert steps[0].cssSelector == 'form > input[name="q"]'
+	assert (steps[1].key, steps[1].cssSelector) == ('Enter', steps[0].cssSelector)
+	assert (steps[2].cssSelector, steps[2].xpath, steps[2].elementTag) == ('xpath=/html/body/main/a', '/html/body/main/a', 'a')
+	assert all(step.description == 'Search for the query' and step.tabId == 4 and step.timestamp for step in steps)
+	assert [step.wait_for and step.wait_for.type for step in steps] == ['network_idle', None, None]
+	assert [step.output for step in steps] == [None, None, 'search']
+
+
+def test_failed_and_skipped_actions_are_left_out():
+	history = _history(
+		(
+			[{'click_element_by_index': {'index': 9}}, {'click_element_by_index': {'index': 5}}],
+			[RESULT_LINK, RESULT_LINK],
+			['Element not found', None],
+		),
+		# The page changed after the first action, so the second one never ran
+		([{'go_to_url': {'url': 'https://example.com/a'}}, {'open_tab': {'url': 'https://example.com/b'}}], [None, None], [None]),
+	)
+
+	steps = repair_steps_from_history(_input_step('{query}'), _input_step('lamps'), history)
+
+	assert [step.type for step in steps] == ['click', 'navigation']
+	assert steps[1].url == 'https://example.com/a'
+
+
+def test_inputs_from_the_context_become_placeholders():
+	step = AgenticWorkflowStep(type='agent', task='Sign in')
+	history = _history(
+		([{'input_text': {'index': 3, 'text': 'ada'}}, {'input_text': {'index': 3, 'text': 'secret'}}], [SEARCH_BOX, SEARCH_BOX])
+	)
+
+	steps = repair_steps_from_history(step, step, history, {'user': 'ada', 'password': 'secret', 'other': 'secret'})
+
+	# A value shared by two inputs stays literal, since either placeholder could be meant
+	assert [step.value for step in steps] == ['{user}', 'secret']
+	assert steps[0].tabId == 0
+
+
+def test_actions_without_deterministic_equivalent_give_no_repair():
+	step = _input_step('{query}')
+
+	assert repair_steps_from_history(step, step, _history(([{'open_tab': {'url': 'https://example.com'}}], [None]))) is None
+	assert repair_steps_from_history(step, step, _history(([{'click_element_by_index': {'index': 7}}], [FRAMED_BUTTON]))) is None
+	assert repair_steps_from_history(step, step, _history(([{'done': {'text': 'Done', 'success': True}}], [None]))) is None
+
+
+def _repair(schema, version, step_index, *urls):
+	return WorkflowRepair(
+		workflow='Test',
+		version=version,
+		parent_hash=workflow_fingerprint(schema),
+		step_index=step_index,
+		steps=[{'type': 'navigation', 'url': url} for url in urls],
+		created_at=0,
+	)
+
+
+def test_repair_chain_applies_repairs_in_order():
+	schema = WorkflowDefinitionSchema(
+		name='Test',
+		description='Test workflow',
+		version='1.0',
+		input_schema=[],
+		steps=[{'type': 'navigation', 'url': 'https://example.com'}, {'type': 'agent', 'task': 'Find the price'}],
+	)
+	first = _repair(schema, 1, 1, 'https://example.com/a', 'https://example.com/b')
+	second = _repair(repair_chain(schema, [first])[-1], 2, 0, 'https://example.org')
+	# Learned on a definition that is not in the chain, e.g. before the file was edited
+	stale = _repair(schema.model_copy(update={'description': 'Old'}), 3, 0, 'https://example.net')
+
+	chain = repair_chain(schema, [stale, second, first])
+
+	assert [definition.version for definition in chain] == ['1.0', '1.0+repair.1', '1.0+repair.2']
+	assert [step.url for step in chain[-1].steps] == ['https://example.org', 'https://example.com/a', 'https://example.com/b']
+	assert chain[0] is schema
+	assert repair_chain(schema, [second]) == [schema]
+
+
+def test_concurrent_stores_keep_every_repair(tmp_path):
+	# Separate stores share only the directory, like the workers of a sharded run
+	stores = [RepairStore(tmp_path) for _ in range(4)]
+	steps = [{'type': 'navigation', 'url': 'https://example.com'}]
+
+	def add(index):
+		return stores[index % len(stores)].add('Test', 'abc', index, steps)
+
+	with ThreadPoolExecutor(max_workers=8) as pool:
+		added = list(pool.map(add, range(40)))
+
+	repairs = RepairStore(tmp_path).load('Test')
+	assert all(added)
+	assert sorted(repair.step_index for repair in repairs) == list(range(40))
+	assert sorted(repair.version for repair in repairs) == list(range(1, 41))
+	assert not list(tmp_path.glob('*.tmp'))
+	# The same step of the same definition is only repaired once
+	assert stores[0].add('Test', 'abc', 3, steps) is None
@@ -0,0 +1,92 @@
+from typing import List, Optional
+
+from pydantic import BaseModel, Field
+
+from workflow_use.workflow.structuring import collect_candidates, partial_model, relevant_snippets, structure_locally
+
+
+class Product(BaseModel):
+	title: str
+	price: float
+	item_count: int = Field(..., description='Number of items in stock')
+	tags: List[str] = []
+
+
+class Optionals(BaseModel):
+	price: Optional[float] = None
+	title: Optional[str] = None
+
+
+def test_whole_json_output_validates_directly():
+	candidates = collect_candidates({}, ['{"title": "Lamp", "price": "9.5", "item_count": "10"}'])
+
+	instance, _, unfilled = structure_locally(Product, candidates)
+
+	assert instance == Product(title='Lamp', price=9.5, item_count=10)
+	# Not in the JSON, but maybe in other outputs: the caller may still ask the LLM for it
+	assert unfilled == ['tags']
+
+
+def test_fields_are_matched_by_normalized_name_across_outputs():
+	candidates = collect_candidates({'Title': 'Lamp', 'product': {'Price': '3', 'item-count': 7}}, ['not json'])
+
+	instance, _, _ = structure_locally(Product, candidates)
+
+	assert instance == Product(title='Lamp', price=3.0, item_count=7)
+
+
+def test_optional_fields_are_merged_from_all_candidates():
+	# Each output alone holds one field; neither may stand for the whole model
+	candidates = collect_candidates({'price': '10.5', 'title': 'Widget'}, [])
+
+	instance, _, _ = structure_locally(Optionals, candidates)
+
+	assert instance == Optionals(price=10.5, title='Widget')
+
+
+def test_optional_fields_not_found_are_left_for_the_llm():
+	# The title is only in prose, so the price alone must not end the structuring
+	candidates = collect_candidates({'price': '3'}, ['The product title is Lamp'])
+
+	instance, values, unfilled = structure_locally(Optionals, candidates)
+
+	assert instance == Optionals(price=3.0)
+	assert values == {'price': 3.0}
+	assert unfilled == ['title']
+	assert relevant_snippets(['The product title is Lamp', 'Footer'], unfilled, Optionals) == ['The product title is Lamp']
+
+
+def test_candidate_with_every_found_field_wins_over_partial_ones():
+	candidates = collect_candidates({'price': 1}, ['{"price": 2, "title": "Lamp"}'])
+
+	instance, _, _ = structure_locally(Optionals, candidates)
+
+	assert instance == Optionals(price=2, title='Lamp')
+
+
+def test_nothing_found_leaves_every_field_to_the_llm():
+	instance, values, unfilled = structure_locally(Optionals, collect_candidates({}, ['just prose']))
+
+	assert instance is None
+	assert values == {}
+	assert unfilled == ['price', 'title']
+
+
+def test_missing_required_fields_are_reported():
+	candidates = collect_candidates({}, ['{"title": "Lamp", "price": "cheap"}'])
+
+	instance, values, unfilled = structure_locally(Product, candidates)
+
+	assert instance is None
+	assert values == {'title': 'Lamp'}
+	assert unfilled == ['price', 'item_count', 'tags']
+
+
+def test_partial_model_and_snippets_cover_only_the_unfilled_fields():
+	model = partial_model(Product, ['item_count'])
+	texts = ['Lamp, 9.50 EUR', 'There are 42 items in stock', 'Footer']
+
+	assert list(model.model_fields) == ['item_count']
+	assert model.model_validate({'item_count': '42'}).item_count == 42
+	assert relevant_snippets(texts, ['item_count'], Product) == ['There are 42 items in stock']
+	assert relevant_snippets(texts, ['tags'], Product) == texts
@@ -1,7 +1,15 @@
-from typing import Any, Dict, Generic, List, Optional, TypeVar
+import asyncio
+import time
+from typing import Any, Dict, Generic, List, Literal, Optional, TypeVar
 
+from browser_use import Browser
 from browser_use.agent.views import ActionResult, AgentHistoryList
-from pydantic import BaseModel, Field
+from pydantic import BaseModel, ConfigDict, Field, InstanceOf
+
+from workflow_use.browser.service import BrowserLease
+from workflow_use.controller.views import ActionContext
+from workflow_use.schema.views import WorkflowInputSchemaDefinition, WorkflowStep
+from workflow_use.workflow.compiler import WorkflowPlan
 
 T = TypeVar('T', bound=BaseModel)
 
@@ -11,6 +19,116 @@ class WorkflowRunOutput(BaseModel, Generic[T]):
 
 	step_results: List[ActionResult | AgentHistoryList]
 	output_model: Optional[T] = None
+	readiness_wait_ms: Dict[int, float] = Field(default_factory=dict, description='Time spent waiting before each step')
+	rate_limit_wait_ms: Dict[int, float] = Field(
+		default_factory=dict, description='Time each rate-limited step spent waiting for its origin'
+	)
+	run_id: Optional[str] = Field(default=None, description='Id of the run, used to resume it from its checkpoint')
+
+
+class StepEvent(BaseModel):
+	"""Progress event yielded by ``Workflow.run_iter()``."""
+
+	type: Literal['step_started', 'step_completed', 'step_skipped', 'step_failed', 'run_finished']
+	run_id: Optional[str] = Field(default=None, description='Id of the run, when checkpointing is enabled')
+	step_index: Optional[int] = Field(default=None, description='Zero-based index of the step (None for run_finished)')
+	step_type: Optional[str] = Field(default=None, description='Type of the step, e.g. click or agent')
+	description: Optional[str] = Field(default=None, description='Description of the step')
+	result: Optional[ActionResult | AgentHistoryList] = Field(default=None, description='Result of a completed step')
+	duration_ms: Optional[float] = Field(
+		default=None, description='Execution time of the step, without readiness and rate limit waits'
+	)
+	readiness_wait_ms: Optional[float] = Field(default=None, description='Time spent waiting before the step ran')
+	rate_limit_wait_ms: Optional[float] = Field(
+		default=None, description="Time spent waiting for the rate limit of the step's origin (rate-limited steps only)"
+	)
+	fallback_used: bool = Field(default=False, description='Whether the step only succeeded through the agent fallback')
+	error: Optional[str] = Field(default=None, description='Error of a failed step')
+	status: Optional[Literal['completed', 'stopped', 'cancelled']] = Field(
+		default=None, description='How the run ended (run_finished only)'
+	)
+	message: Optional[str] = Field(default=None, description='Stop message of a conditional step (run_finished only)')
+	outputs: Optional[Dict[str, Any]] = Field(
+		default=None, description='Outputs stored by the steps of the run, by output name (run_finished only)'
+	)
+	timestamp: float = Field(default_factory=time.time)
+
+
+class Checkpoint(BaseModel):
+	"""Everything needed to continue a run after its last completed step."""
+
+	run_id: str = Field(..., description='Id of the run the checkpoint belongs to')
+	workflow: str = Field(..., description='Name of the workflow')
+	workflow_hash: str = Field(..., description='Fingerprint of the workflow definition the run used')
+	next_step: int = Field(..., description='Index of the first step that has not completed yet')
+	context: Dict[str, Any] = Field(default_factory=dict, description='Workflow inputs and step outputs so far')
+	skip_next_step: bool = Field(default=False, description='Pending skip requested by a conditional step')
+	url: Optional[str] = Field(default=None, description='URL of the current page')
+	storage_state: Dict[str, Any] = Field(default_factory=dict, description='Cookies and localStorage of the browser context')
+	created_at: float = Field(..., description='Unix timestamp of the checkpoint')
+
+
+class WorkflowRepair(BaseModel):
+	"""A patch replacing one step of a workflow definition with the steps an agent fallback performed."""
+
+	workflow: str = Field(..., description='Name of the workflow')
+	version: int = Field(..., description='Sequence number of the patch, starting at 1')
+	parent_hash: str = Field(..., description='Fingerprint of the definition the patch applies to')
+	step_index: int = Field(..., description='Index of the replaced step in that definition')
+	steps: List[WorkflowStep] = Field(..., description='Deterministic steps replacing it')
+	error: Optional[str] = Field(default=None, description='Error of the step that triggered the fallback')
+	created_at: float = Field(..., description='Unix timestamp of the patch')
+
+
+class CatalogEntry(BaseModel):
+	"""Metadata of one workflow file, as indexed by ``WorkflowCatalog``."""
+
+	file: str = Field(..., description='File name inside the catalog directory')
+	name: Optional[str] = Field(default=None, description='Name of the workflow (None if the file does not parse)')
+	description: Optional[str] = Field(default=None, description='Description of the workflow')
+	version: Optional[str] = Field(default=None, description='Version of the workflow definition')
+	step_count: int = Field(default=0, description='Number of steps')
+	inputs: List[WorkflowInputSchemaDefinition] = Field(default_factory=list, description='Declared workflow inputs')
+	content_hash: str = Field(..., description='SHA-256 of the file contents')
+	size: int = Field(..., description='File size in bytes')
+	modified_at: float = Field(..., description='Unix timestamp of the last modification')
+	error: Optional[str] = Field(default=None, description='Why the file is not a valid workflow, if it is not')
+
+
+class StepHandoff(BaseModel):
+	"""What a step's lookahead prepared for the step after it."""
+
+	step_index: int = Field(..., description='Index of the step the handoff is meant for')
+	action_context: ActionContext = Field(..., description='Hints and, if found, the located element for that step')
+	origin: Optional[str] = Field(default=None, description='Origin the selector cache was consulted for')
+
+
+class RunState(BaseModel):
+	"""Mutable state of a single workflow execution.
+
+	A Workflow itself is never mutated while running; everything that belongs to
+	one execution lives here, so the same Workflow can run many inputs concurrently.
+	"""
+
+	model_config = ConfigDict(arbitrary_types_allowed=True)
+
+	run_id: Optional[str] = Field(default=None, description='Id of the run, set when checkpointing is enabled')
+	plan: InstanceOf[WorkflowPlan] = Field(..., description='Compiled definition the run executes, fixed for its whole duration')
+	browser: InstanceOf[Browser] = Field(..., description='Browser session used by this run')
+	lease: Optional[InstanceOf[BrowserLease]] = Field(default=None, description='Pool lease the browser came from, if any')
+	cancel_event: Optional[InstanceOf[asyncio.Event]] = Field(default=None, description='Set to request cancellation')
+	context: Dict[str, Any] = Field(default_factory=dict, description='Workflow inputs and step outputs')
+	outputs: Dict[str, Any] = Field(default_factory=dict, description='Outputs stored by the steps this run executed')
+	fallback_steps: List[int] = Field(default_factory=list, description='Steps that needed the agent fallback')
+	skip_next_step: bool = Field(default=False, description='Set by a conditional step to skip the following step')
+	ready_step: Optional[int] = Field(default=None, description='Index of the step whose readiness was already awaited')
+	wait_times: Dict[int, float] = Field(default_factory=dict, description='Readiness wait per step index, in ms')
+	rate_limit_wait_times: Dict[int, float] = Field(default_factory=dict, description='Rate limit wait per step index, in ms')
+	handoff: Optional[StepHandoff] = Field(default=None, description='Lookahead result for the next step')
+
+	@property
+	def cancelled(self) -> bool:
+		return self.cancel_event is not None and self.cancel_event.is_set()
 
 
 class StructuredWorkflowOutput(BaseModel):